@@ -0,0 +1,696 @@
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import datetime as dt
+import decimal
+import getpass
+import ipaddress
+import json
+import os
+import secrets
+import urllib.parse
+
+import catalogue
+import gst
+import ledger
+import metrics
+from toolkit import books, config, invoicing, services, taxes, telemetry, workspaces
+
+
+MAX_BODY_SIZE = 1024 * 1024
+MAX_HEADER_LINES = 100
+DEFAULT_LEDGER_LIMIT = 500
+STATUS_TEXT = {
+    200: "OK",
+    201: "Created",
+    202: "Accepted",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    415: "Unsupported Media Type",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def json_default(value):
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (dt.date, dt.datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
+
+
+def is_loopback(host):
+    if host.lower() == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def check_loopback(host):
+    """The API is only ever bound to this machine."""
+    if not is_loopback(host):
+        raise ValueError(f"The API only listens on loopback addresses, not {host!r}.")
+
+
+def host_name(value):
+    """The host of a Host header ("localhost:8765", "[::1]:8765", ...), without the port."""
+    value = value.strip()
+    if value.startswith("["):
+        return value[1:].partition("]")[0]
+    if value.count(":") == 1:
+        return value.partition(":")[0]
+    return value
+
+
+def load_token(path):
+    """The API token kept at path, made (readable by this user only) the first time."""
+    try:
+        with open(path, "r", encoding="utf-8") as token_file:
+            token = token_file.read().strip()
+        if token:
+            return token
+    except FileNotFoundError:
+        pass
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    token = secrets.token_urlsafe(32)
+    descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(descriptor, "w", encoding="utf-8") as token_file:
+        token_file.write(token + "\n")
+    return token
+
+
+def check_request(headers, body, token):
+    """Refuse what a web page could send: another Host or Origin, no token, or a body that is not JSON.
+
+    The Host check stops DNS rebinding, the token stops every other local
+    page or program, and insisting on application/json keeps out the
+    "simple" cross-site POSTs a browser makes without asking first.
+    """
+    if not is_loopback(host_name(headers.get("host", ""))):
+        raise ApiError(403, "The Host header must name this machine (localhost or a loopback address).")
+    origin = headers.get("origin")
+    if origin and origin != "null" and not is_loopback(urllib.parse.urlsplit(origin).hostname or ""):
+        raise ApiError(403, f"Requests from {origin} are not allowed.")
+    if not secrets.compare_digest(headers.get("authorization", "").encode("utf-8"), f"Bearer {token}".encode("utf-8")):
+        raise ApiError(401, f"Send the token from {config.API_TOKEN_PATH} as 'Authorization: Bearer <token>'.")
+    if body and headers.get("content-type", "").partition(";")[0].strip().lower() != "application/json":
+        raise ApiError(415, "Request bodies must be sent as Content-Type: application/json.")
+
+
+def parse_date(value, name):
+    if not value:
+        return None
+    try:
+        return dt.date.fromisoformat(value)
+    except ValueError:
+        raise ApiError(400, f"{name} must be a YYYY-MM-DD date.")
+
+
+def invoice_request(payload):
+    """(fields, items, backend) from a POST /invoices body; items are priced like ItemDialog does."""
+    fields = payload.get("fields")
+    items = payload.get("items", [])
+    if not isinstance(fields, dict) or not isinstance(items, list):
+        raise ApiError(400, "Send {\"fields\": {...}, \"items\": [...]}.")
+    fields = invoicing.blank_invoice_fields() | {key: str(value) for key, value in fields.items()}
+    if not fields["billToName"].strip():
+        raise ApiError(400, "fields.billToName is required.")
+    inter_state = gst.is_inter_state(fields["companyState"], fields["placeOfSupply"])
+    try:
+        items = [
+            catalogue.invoice_item(item, item.get("quantity", 1), item.get("price"), inter_state) for item in items
+        ]
+        totals = invoicing.compute_invoice_tax(fields, items)["totals"]
+    except (KeyError, TypeError, AttributeError):
+        raise ApiError(400, "Every item needs an itemName, price and tax.")
+    except ValueError as exc:
+        raise ApiError(400, str(exc))
+    fields["totalAmount"] = f"₹{totals['total']:,.2f}"
+    backend = payload.get("backend")
+    if backend is not None and backend != "auto" and backend not in invoicing.PDF_BACKENDS:
+        raise ApiError(400, f"backend must be auto or one of {', '.join(invoicing.PDF_BACKENDS)}.")
+    recipient = str(payload.get("email") or "").strip()
+    if recipient and ("@" not in recipient or not config.SMTP_HOST):
+        raise ApiError(400, "email needs a valid address and SMTP set up in toolkit/config.py.")
+    return fields, items, backend, recipient
+
+
+def compile_invoice(fields, items, backend, recipient=""):
+    """Run on a worker thread: number the invoice, build the PDF, record it and queue the email."""
+    source_path, pdf_path = invoicing.generate_invoice_pdf(fields, items, backend)
+    result = {"invoiceNumber": fields["invoiceNumber"], "pdf_path": pdf_path, "source_path": source_path}
+    if recipient:
+        result["email_id"] = invoicing.email_invoice(fields, pdf_path, recipient)
+    return result
+
+
+class JobQueue:
+    """PDF compiles queued behind a fixed pool of worker threads, tracked by job ID.
+
+    Submitting never blocks: a full queue is refused straight away so
+    callers can back off, and only the last API_JOB_HISTORY jobs are kept.
+    """
+
+    def __init__(self, workers, limit, history):
+        self.workers = workers
+        self.history = history
+        self.queue = asyncio.Queue(maxsize=limit)
+        self.jobs = collections.OrderedDict()
+        self.executor = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix="pdf")
+        self.tasks = []
+
+    def start(self):
+        self.tasks = [asyncio.create_task(self.work()) for _ in range(self.workers)]
+
+    def submit(self, fields, items, backend, recipient=""):
+        job = {
+            "id": secrets.token_hex(8),
+            "status": "queued",
+            "submitted": dt.datetime.now().isoformat(timespec="seconds"),
+        }
+        try:
+            self.queue.put_nowait((job, fields, items, backend, recipient))
+        except asyncio.QueueFull:
+            raise ApiError(503, "Too many invoices are waiting to compile; try again shortly.")
+        self.jobs[job["id"]] = job
+        while len(self.jobs) > self.history:
+            oldest = next(iter(self.jobs.values()))
+            if oldest["status"] in ("queued", "running"):
+                break
+            self.jobs.popitem(last=False)
+        return job
+
+    async def work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job, fields, items, backend, recipient = await self.queue.get()
+            job["status"] = "running"
+            try:
+                result = await loop.run_in_executor(self.executor, compile_invoice, fields, items, backend, recipient)
+            except Exception as exc:
+                job.update(status="failed", error=str(exc))
+            else:
+                job.update(result, status="done")
+            finally:
+                job["finished"] = dt.datetime.now().isoformat(timespec="seconds")
+                self.queue.task_done()
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.executor.shutdown(wait=True)
+
+
+class LedgerWriter:
+    """Group commit for ledger appends.
+
+    Entries that arrive while a write is in progress are appended together
+    by the next one, so a burst of requests costs a handful of file opens
+    (and turnover/productivity syncs) rather than one per request.
+    """
+
+    def __init__(self):
+        self.executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="ledger")
+        self.pending = []
+        self.flusher = None
+
+    async def append(self, amount, category, note):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append(((amount, category, note), future))
+        if self.flusher is None:
+            self.flusher = asyncio.create_task(self.flush())
+        await future
+
+    async def flush(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while self.pending:
+                batch, self.pending = self.pending, []
+                try:
+                    await loop.run_in_executor(self.executor, books.write_money_flow_entries, [entry for entry, _ in batch])
+                except Exception as exc:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(exc)
+                else:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_result(None)
+        finally:
+            self.flusher = None
+
+    async def close(self):
+        if self.flusher is not None:
+            await self.flusher
+        self.executor.shutdown(wait=True)
+
+
+class ApiServer:
+    """JSON over HTTP/1.1 (keep-alive) for invoices, the ledger and the tax calculator.
+
+    Every request needs "Authorization: Bearer <token>" with the token in
+    config.API_TOKEN_PATH and a loopback Host; bodies must be
+    application/json. See check_request().
+
+    POST /invoices            {"fields", "items", "backend"?, "email"?} -> 202 {"id", "status"}
+    GET  /jobs/<id>           job status; "done" jobs carry invoiceNumber and pdf_path
+    POST /ledger              {"amount", "category", "note"?} -> 201, with any budget warnings
+    GET  /ledger              ?start=&end=&category=&limit= -> latest matching entries (with "id") and totals
+    POST /ledger/void         {"id", "reason"?, "user"?} -> the audit record
+    POST /ledger/correct      {"id", "amount", "category", "note"?, "reason"?, "user"?} -> the audit record
+    GET  /invoices            ?limit= -> latest invoice history rows (with "id")
+    POST /invoices/void       {"id", "reason"?, "user"?} -> the audit record
+    POST /invoices/correct    {"id", "changes": {field: value}, "reason"?, "user"?} -> the audit record
+    POST /ledger/attachments  {"id", "paths"} or {"links": [{"id", "path"}]} -> {"attached": {path: sha256}, "failed"}
+    GET  /ledger/attachments  ?id= -> documents attached to an entry
+    POST /invoices/attachments {"invoiceNumber", "paths"} -> {"attached": {path: sha256}, "failed"}
+    GET  /invoices/attachments ?invoiceNumber= -> documents attached to an invoice
+    GET  /audit               ?file=ledger|invoices&limit= -> latest audit records and what is pending
+    POST /audit/compact       fold pending voids and corrections into both files
+    GET  /reconciliation      ?start=&end= -> invoices matched to receipts: unpaid invoices, unmatched receipts
+    GET  /budgets             ?month=YYYY-MM -> envelope allocations, spend and balances, and category spend
+    POST /tax                 {"income", "investment_deduction"?, "health_insurance"?}
+    GET  /health
+    GET  /metrics             counters, latency histograms and queue depths as Prometheus text
+    """
+
+    def __init__(self, workers=None, queue_limit=None, token=None):
+        self.token = token or load_token(config.API_TOKEN_PATH)
+        self.jobs = JobQueue(
+            workers or config.API_PDF_WORKERS, queue_limit or config.API_JOB_QUEUE_LIMIT, config.API_JOB_HISTORY
+        )
+        self.ledger = LedgerWriter()
+        self.readers = concurrent.futures.ThreadPoolExecutor(2, thread_name_prefix="query")
+        telemetry.QUEUE_DEPTH.labels("api_pdf_jobs").set_function(self.jobs.queue.qsize)
+        telemetry.QUEUE_DEPTH.labels("api_ledger_writes").set_function(lambda: len(self.ledger.pending))
+        self.routes = {
+            ("GET", "/health"): self.health,
+            ("GET", "/metrics"): self.metrics,
+            ("POST", "/invoices"): self.create_invoice,
+            ("POST", "/ledger"): self.append_ledger,
+            ("GET", "/ledger"): self.query_ledger,
+            ("POST", "/ledger/void"): self.void_ledger_entry,
+            ("POST", "/ledger/correct"): self.correct_ledger_entry,
+            ("GET", "/invoices"): self.list_invoices,
+            ("POST", "/invoices/void"): self.void_invoice,
+            ("POST", "/invoices/correct"): self.correct_invoice,
+            ("POST", "/ledger/attachments"): self.attach_receipts,
+            ("GET", "/ledger/attachments"): self.ledger_attachments,
+            ("POST", "/invoices/attachments"): self.attach_invoice_documents,
+            ("GET", "/invoices/attachments"): self.invoice_documents,
+            ("GET", "/audit"): self.audit_trail,
+            ("POST", "/audit/compact"): self.compact,
+            ("GET", "/reconciliation"): self.reconciliation,
+            ("GET", "/budgets"): self.budgets,
+            ("POST", "/tax"): self.tax,
+        }
+        self.server = None
+
+    async def start(self, host=None, port=None):
+        host = host or config.API_HOST
+        check_loopback(host)
+        self.jobs.start()
+        self.server = await asyncio.start_server(self.handle_connection, host, config.API_PORT if port is None else port)
+        return self.server
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.jobs.close()
+        await self.ledger.close()
+        self.readers.shutdown(wait=True)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except ApiError as exc:
+                    writer.write(response_bytes(exc.status, {"error": str(exc)}, keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                status, payload = await self.dispatch(method, target, body, headers)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(response_bytes(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, body, headers):
+        url = urllib.parse.urlsplit(target)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        try:
+            check_request(headers, body, self.token)
+            if url.path.startswith("/jobs/"):
+                if method != "GET":
+                    raise ApiError(405, "Jobs are read with GET.")
+                return self.job(url.path[len("/jobs/") :])
+            handler = self.routes.get((method, url.path))
+            if handler is None:
+                if any(path == url.path for _, path in self.routes):
+                    raise ApiError(405, f"{method} is not supported on {url.path}.")
+                raise ApiError(404, f"No such endpoint: {url.path}")
+            payload = {}
+            if body:
+                try:
+                    payload = json.loads(body)
+                except ValueError:
+                    raise ApiError(400, "Request body must be JSON.")
+                if not isinstance(payload, dict):
+                    raise ApiError(400, "Request body must be a JSON object.")
+            return await handler(payload, query)
+        except ApiError as exc:
+            return exc.status, {"error": str(exc)}
+        except Exception as exc:
+            return 500, {"error": str(exc)}
+
+    async def health(self, payload, query):
+        return 200, {
+            "status": "ok",
+            "queued_jobs": self.jobs.queue.qsize(),
+            "pdf_workers": self.jobs.workers,
+            "webhooks": services.event_dispatcher.status(),
+        }
+
+    async def metrics(self, payload, query):
+        return 200, telemetry.render()
+
+    async def create_invoice(self, payload, query):
+        job = self.jobs.submit(*invoice_request(payload))
+        return 202, dict(job)
+
+    def job(self, job_id):
+        job = self.jobs.jobs.get(job_id)
+        if job is None:
+            raise ApiError(404, f"No such job: {job_id}")
+        return 200, dict(job)
+
+    async def append_ledger(self, payload, query):
+        category = payload.get("category")
+        if category not in ledger.CATEGORIES:
+            raise ApiError(400, "category must be one of the money-flow categories.")
+        try:
+            amount = gst.to_decimal(payload.get("amount"))
+        except ValueError as exc:
+            raise ApiError(400, str(exc))
+        if amount == 0:
+            raise ApiError(400, "Amount should not be zero.")
+        note = " ".join(str(payload.get("note") or "").split()) or "None"
+        warnings = await self.in_thread(books.budget_warnings, amount, category)
+        await self.ledger.append(amount, category, note)
+        return 201, {"amount": amount, "category": category, "note": note, "budget_warnings": warnings}
+
+    async def query_ledger(self, payload, query):
+        start = parse_date(query.get("start"), "start")
+        end = parse_date(query.get("end"), "end")
+        category = query.get("category")
+        try:
+            limit = int(query.get("limit", DEFAULT_LEDGER_LIMIT))
+        except ValueError:
+            raise ApiError(400, "limit must be a whole number.")
+        return 200, await asyncio.get_running_loop().run_in_executor(
+            self.readers, ledger_summary, start, end, category, max(limit, 0)
+        )
+
+    async def in_thread(self, function, *args):
+        """Run blocking file work off the event loop; a ValueError becomes a 400."""
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.readers, function, *args)
+        except ValueError as exc:
+            raise ApiError(400, str(exc))
+
+    async def void_ledger_entry(self, payload, query):
+        row_id, reason, user = audit_request(payload)
+        return 200, await self.in_thread(books.void_ledger_entry, row_id, reason, user)
+
+    async def correct_ledger_entry(self, payload, query):
+        row_id, reason, user = audit_request(payload)
+        category = payload.get("category")
+        if category not in ledger.CATEGORIES:
+            raise ApiError(400, "category must be one of the money-flow categories.")
+        try:
+            amount = gst.to_decimal(payload.get("amount"))
+        except ValueError as exc:
+            raise ApiError(400, str(exc))
+        note = " ".join(str(payload.get("note") or "").split()) or "None"
+        return 200, await self.in_thread(books.correct_ledger_entry, row_id, amount, category, note, reason, user)
+
+    async def list_invoices(self, payload, query):
+        try:
+            limit = int(query.get("limit", DEFAULT_LEDGER_LIMIT))
+        except ValueError:
+            raise ApiError(400, "limit must be a whole number.")
+        rows = await self.in_thread(lambda: list(collections.deque(invoicing.invoice_history(), maxlen=max(limit, 0))))
+        return 200, {"invoices": rows}
+
+    async def void_invoice(self, payload, query):
+        row_id, reason, user = audit_request(payload)
+        return 200, await self.in_thread(invoicing.void_invoice, row_id, reason, user)
+
+    async def correct_invoice(self, payload, query):
+        row_id, reason, user = audit_request(payload)
+        changes = payload.get("changes")
+        if not isinstance(changes, dict) or not changes:
+            raise ApiError(400, "changes must be an object of invoice history fields.")
+        return 200, await self.in_thread(invoicing.correct_invoice, row_id, changes, reason, user)
+
+    async def attach_receipts(self, payload, query):
+        if "links" in payload:
+            if not isinstance(payload["links"], list) or not payload["links"]:
+                raise ApiError(400, "links must be a list of {\"id\", \"path\"} objects.")
+            links = []
+            for link in payload["links"]:
+                if not isinstance(link, dict) or not isinstance(link.get("path"), str) or not link["path"]:
+                    raise ApiError(400, "Each link needs an id and a file path.")
+                links.append((audit_request(link)[0], link["path"]))
+        else:
+            row_id = audit_request(payload)[0]
+            links = [(row_id, path) for path in attachment_paths(payload)]
+        added, failed = await self.in_thread(books.attach_receipts, links)
+        return 201, {"attached": added, "failed": failed}
+
+    async def ledger_attachments(self, payload, query):
+        row_id = audit_request(query)[0]
+        return 200, {"id": row_id, "documents": await self.in_thread(books.ledger_attachments, row_id)}
+
+    async def attach_invoice_documents(self, payload, query):
+        invoice_number = str(payload.get("invoiceNumber") or "")
+        added, failed = await self.in_thread(invoicing.attach_invoice_documents, invoice_number, attachment_paths(payload))
+        return 201, {"attached": added, "failed": failed}
+
+    async def invoice_documents(self, payload, query):
+        invoice_number = query.get("invoiceNumber", "")
+        return 200, {"invoiceNumber": invoice_number, "documents": await self.in_thread(invoicing.invoice_documents, invoice_number)}
+
+    async def audit_trail(self, payload, query):
+        trails = {"ledger": services.ledger_audit, "invoices": services.invoice_audit}
+        trail = trails.get(query.get("file", "ledger"))
+        if trail is None:
+            raise ApiError(400, "file must be ledger or invoices.")
+        try:
+            limit = int(query.get("limit", DEFAULT_LEDGER_LIMIT))
+        except ValueError:
+            raise ApiError(400, "limit must be a whole number.")
+
+        def summary():
+            generation, pending = trail.snapshot()
+            records = list(collections.deque(trail.records(), maxlen=max(limit, 0)))
+            return {"generation": generation, "pending": len(pending), "records": records}
+
+        return 200, await self.in_thread(summary)
+
+    async def compact(self, payload, query):
+        ledger_folded = await self.in_thread(books.compact_ledger)
+        invoices_folded = await self.in_thread(invoicing.compact_invoice_history)
+        return 200, {"ledger": ledger_folded, "invoices": invoices_folded}
+
+    async def reconciliation(self, payload, query):
+        start = parse_date(query.get("start"), "start")
+        end = parse_date(query.get("end"), "end")
+        return 200, await self.in_thread(reconciliation_summary, start, end)
+
+    async def budgets(self, payload, query):
+        month = query.get("month") or None
+        if month is not None:
+            try:
+                dt.date.fromisoformat(f"{month}-01")
+            except ValueError:
+                raise ApiError(400, "month must be YYYY-MM.")
+        return 200, await self.in_thread(services.budget_monitor.status, month)
+
+    async def tax(self, payload, query):
+        try:
+            income = float(payload["income"])
+            investment = float(payload.get("investment_deduction", 0))
+            health = float(payload.get("health_insurance", 0))
+        except (KeyError, TypeError, ValueError):
+            raise ApiError(400, "Send a numeric income, and optionally investment_deduction and health_insurance.")
+        return 200, taxes.calculate_tax(income, investment, health)
+
+
+def audit_request(payload):
+    row_id = payload.get("id")
+    if not isinstance(row_id, str) or not row_id:
+        raise ApiError(400, "id must be a row id from GET /ledger or GET /invoices.")
+    return row_id, str(payload.get("reason") or ""), str(payload.get("user") or "")
+
+
+def attachment_paths(payload):
+    """The "paths" of a request: files on this machine, since the API only listens on loopback."""
+    paths = payload.get("paths")
+    if not isinstance(paths, list) or not paths or not all(isinstance(path, str) and path for path in paths):
+        raise ApiError(400, "paths must be a list of file paths.")
+    return paths
+
+
+def ledger_summary(start, end, category, limit):
+    """The latest `limit` matching entries (oldest first) with inflow/outflow totals over every match."""
+    latest = collections.deque(maxlen=limit)
+    count, inflow, outflow = 0, decimal.Decimal("0"), decimal.Decimal("0")
+    for entry in books.ledger_entries(start, end, category):
+        count += 1
+        if ledger.is_inflow(entry["category"]):
+            inflow += entry["amount"]
+        else:
+            outflow += entry["amount"]
+        latest.append(entry)
+    return {"count": count, "inflow": inflow, "outflow": outflow, "net": inflow - outflow, "entries": list(latest)}
+
+
+def reconciliation_summary(start, end):
+    """Counts and totals, the invoices not fully paid and the receipts not fully applied."""
+    result = books.reconcile_receipts(start, end)
+    invoices = [invoice for invoice in result["invoices"] if invoice["status"] != "paid"]
+    receipts = [receipt for receipt in result["receipts"] if receipt["status"] != "matched"]
+    methods = collections.Counter(allocation["method"] for allocation in result["allocations"])
+    return {
+        "invoices": len(result["invoices"]),
+        "receipts": len(result["receipts"]),
+        "matches": dict(methods),
+        "outstanding": sum((invoice["outstanding"] for invoice in invoices), decimal.Decimal("0")),
+        "unapplied": sum((receipt["remaining"] for receipt in receipts), decimal.Decimal("0")),
+        "unpaid_invoices": invoices,
+        "unmatched_receipts": receipts,
+    }
+
+
+async def read_line(reader):
+    try:
+        return await reader.readline()
+    except ValueError:
+        # StreamReader.readline() raises this for a line longer than its buffer limit
+        raise ApiError(400, "Request line or header too long.")
+
+
+async def read_request(reader):
+    """(method, target, headers, body) for the next request on the connection, or None once it closes."""
+    request_line = await read_line(reader)
+    if not request_line.strip():
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split()
+    except ValueError:
+        raise ApiError(400, "Malformed request line.")
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await read_line(reader)
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise ApiError(400, "Too many headers.")
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise ApiError(400, "Bad Content-Length.")
+    if length < 0:
+        raise ApiError(400, "Bad Content-Length.")
+    if length > MAX_BODY_SIZE:
+        raise ApiError(413, f"Request bodies are limited to {MAX_BODY_SIZE} bytes.")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+def response_bytes(status, payload, keep_alive=True):
+    """A JSON response, or a plain-text one (the metrics) when payload is a str."""
+    if isinstance(payload, str):
+        body, content_type = payload.encode("utf-8"), metrics.CONTENT_TYPE
+    else:
+        body = json.dumps(payload, default=json_default, ensure_ascii=False).encode("utf-8")
+        content_type = "application/json; charset=utf-8"
+    head = (
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+async def serve(host=None, port=None, workers=None):
+    api = ApiServer(workers=workers)
+    server = await api.start(host, port)
+    services.start_background_workers()
+    telemetry.start_exporter("api")
+    print(f"Solo Entrepreneur Toolkit API on http://{host or config.API_HOST}:{api.port}")
+    print(f"Send the token in {config.API_TOKEN_PATH} as 'Authorization: Bearer <token>'")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await api.close()
+        telemetry.stop_exporter()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local JSON API for invoices, the ledger and tax.")
+    parser.add_argument("--host", default=config.API_HOST, help="loopback address to listen on")
+    parser.add_argument("--port", type=int, default=config.API_PORT)
+    parser.add_argument("--workers", type=int, default=config.API_PDF_WORKERS, help="parallel PDF compiles")
+    parser.add_argument(
+        "--workspace", default=os.environ.get(config.WORKSPACE_ENV_VAR), help="business workspace to serve (default: the default one)"
+    )
+    args = parser.parse_args()
+    check_loopback(args.host)
+    if args.workspace:
+        workspaces.activate(args.workspace)
+    if config.ENCRYPT_DATA_FILES:
+        books.enable_encrypted_storage(os.environ.get(config.PASSPHRASE_ENV_VAR) or getpass.getpass("Passphrase: "))
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
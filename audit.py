@@ -0,0 +1,443 @@
+import bisect
+import csv
+import datetime as dt
+import getpass
+import io
+import itertools
+import json
+import os
+import threading
+import time
+
+import secure_store
+
+
+LOG_SUFFIX = ".audit.jsonl"
+COMPACT_TEMP_SUFFIX = ".compact.tmp"
+# Held, in every process, by compact() while it logs its record and swaps the file in, and by
+# readers while they pair a snapshot of the log with the file it describes
+SWAP_LOCK_SUFFIX = ".swap.lock"
+COPY_BLOCK = 1024 * 1024
+
+_trails = {}
+_registry_lock = threading.Lock()
+
+
+def log_path(path):
+    return path + LOG_SUFFIX
+
+
+def trail_for(path):
+    """The AuditTrail of a CSV file, shared by everything in the process that reads or corrects it."""
+    path = os.path.abspath(path)
+    with _registry_lock:
+        trail = _trails.get(path)
+        if trail is None:
+            trail = _trails[path] = AuditTrail(path)
+        return trail
+
+
+def revision(path):
+    """Size of the file's audit log. It grows with every void, correction and compaction, so
+    anything that keeps running totals over the file rebuilds them when it changes."""
+    log = log_path(os.path.abspath(path))
+    return secure_store.getsize(log) if os.path.exists(log) else 0
+
+
+def default_user():
+    try:
+        return getpass.getuser()
+    except (OSError, KeyError, ImportError):
+        return ""
+
+
+def _read_rows(csv_file, offset):
+    """Yield (start, row, end) for complete CSV rows of an open binary file, from offset."""
+    csv_file.seek(offset)
+    position = [offset]
+
+    def lines():
+        # A trailing line without its newline is still being written; leave it for next time
+        for line in csv_file:
+            if not line.endswith(b"\n"):
+                return
+            position[0] += len(line)
+            yield line.decode("utf-8")
+
+    start = offset
+    for row in csv.reader(lines()):
+        yield start, row, position[0]
+        start = position[0]
+
+
+def split_row_id(row_id):
+    """(generation, offset) of a "generation:offset" row id."""
+    try:
+        generation, offset = (int(part) for part in str(row_id).split(":"))
+    except ValueError:
+        raise ValueError(f"{row_id!r} is not a row id.")
+    return generation, offset
+
+
+def csv_line(cells):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(cells)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _block_lines(csv_file, start, stop):
+    """Decoded lines of the open binary file between two byte offsets, read in large blocks."""
+    csv_file.seek(start)
+    carry = b""
+    while stop is None or start < stop:
+        block = csv_file.read(COPY_BLOCK if stop is None else min(COPY_BLOCK, stop - start))
+        if not block:
+            return
+        start += len(block)
+        data = carry + block
+        cut = data.rfind(b"\n") + 1
+        carry = data[cut:]
+        yield io.StringIO(data[:cut].decode("utf-8"), newline="")
+
+
+def _open_snapshot(path):
+    """(generation, pending, open binary file), taken together so a compaction cannot swap the file in between."""
+    if not os.path.exists(log_path(os.path.abspath(path))):
+        return 0, {}, secure_store.open(path, "rb")
+    trail = trail_for(path)
+    with trail.lock, trail.swap_lock():
+        generation, pending = trail.snapshot()
+        return generation, pending, secure_store.open(path, "rb")
+
+
+def rows(path, offset=0):
+    """Yield (row_id, row, end) for the file's rows from offset, with voided rows left out and
+    corrected rows replaced, so every reader sees the file as if it had been edited."""
+    if not os.path.exists(path):
+        return
+    generation, pending, csv_file = _open_snapshot(path)
+    with csv_file:
+        for start, row, end in _read_rows(csv_file, offset):
+            if start in pending:
+                row = pending[start]
+                if row is None:
+                    continue
+            yield f"{generation}:{start}", row, end
+
+
+def current_rows(path):
+    """Just the rows rows() would give, for full scans that need no ids or offsets.
+
+    The stretches between pending rows go through the C csv reader a block at
+    a time, so a scan costs about the same with or without an audit trail.
+    """
+    if not os.path.exists(path):
+        return
+    _, pending, csv_file = _open_snapshot(path)
+    with csv_file:
+        position = 0
+        for offset in sorted(pending):
+            yield from csv.reader(itertools.chain.from_iterable(_block_lines(csv_file, position, offset)))
+            found = next(_read_rows(csv_file, offset), None)
+            if found is None:
+                return
+            if pending[offset] is not None:
+                yield pending[offset]
+            position = found[2]
+        yield from csv.reader(itertools.chain.from_iterable(_block_lines(csv_file, position, None)))
+
+
+class AuditTrail:
+    """Voids and corrections of an append-only CSV file, kept in a JSON-lines log beside it.
+
+    The CSV is never edited in place. A void or correction appends a record
+    naming the row (the byte offset its line starts at), its cells before and
+    after, who made the change, when and why; rows() lays the records still
+    pending over the file as it streams it. compact() folds them into a
+    rewritten file and logs a "compact" record, which starts a new generation
+    of row offsets. Records are never removed, so the log is the full audit
+    trail.
+
+    Row ids are "generation:offset" strings; an id from before a compaction is
+    refused rather than matched to whatever row now sits at that offset.
+    Each compact record lists how far the rows it rewrote moved, so
+    translate() can bring an old id up to date.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.log_path = log_path(path)
+        self.temp_path = path + COMPACT_TEMP_SUFFIX
+        self.lock = threading.RLock()
+        self._reset()
+
+    def swap_lock(self):
+        """Keeps compact() in any process from swapping the file between a look at the log and a read of the file."""
+        return secure_store.file_lock(self.path + SWAP_LOCK_SUFFIX)
+
+    def _reset(self):
+        self.generation = 0
+        self.overlay = {}
+        self.log_offset = 0
+        self.last_op = None
+
+    def _sync(self):
+        """Apply records appended to the log since the last call, by this process or another."""
+        size = secure_store.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+        if size < self.log_offset:
+            self._reset()
+        if size == self.log_offset:
+            return
+        first_read = self.log_offset == 0
+        with secure_store.open(self.log_path, "rb") as log_file:
+            log_file.seek(self.log_offset)
+            for line in log_file:
+                if not line.endswith(b"\n"):
+                    break
+                self.log_offset += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self._apply(record)
+        if first_read:
+            self._recover()
+
+    def _apply(self, record):
+        self.last_op = record.get("op")
+        if self.last_op == "compact":
+            self.generation = record["generation"]
+            self.overlay = {}
+        elif record.get("generation") == self.generation:
+            self.overlay[record["row"]] = record.get("after")
+
+    def _recover(self):
+        # compact() logs its record before swapping the new file in, both under the swap lock, so a
+        # record with its file still waiting beside it means a crash in between: finish the swap.
+        # Any other leftover may be a compaction under way in another process; the next one overwrites it.
+        with self.swap_lock():
+            if self.last_op == "compact" and os.path.exists(self.temp_path):
+                os.replace(self.temp_path, self.path)
+
+    def _append(self, record):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        with secure_store.open(self.log_path, "ab") as log_file:
+            log_file.write(line)
+        self._sync()
+
+    def snapshot(self):
+        """(generation, {offset: cells, or None if voided}) pending right now, as a copy."""
+        with self.lock:
+            self._sync()
+            return self.generation, dict(self.overlay)
+
+    def pending_count(self):
+        with self.lock:
+            self._sync()
+            return len(self.overlay)
+
+    def _offset(self, row_id):
+        generation, offset = split_row_id(row_id)
+        if generation != self.generation:
+            raise ValueError(f"Row {row_id} predates the last compaction of {os.path.basename(self.path)}; look it up again.")
+        return offset
+
+    def row(self, row_id):
+        """Current cells of a row, corrections applied. Raises ValueError for voided or unknown rows."""
+        with self.lock, self.swap_lock():
+            self._sync()
+            offset = self._offset(row_id)
+            if offset in self.overlay:
+                if self.overlay[offset] is None:
+                    raise ValueError(f"Row {row_id} has been voided.")
+                return list(self.overlay[offset])
+            with secure_store.open(self.path, "rb") as csv_file:
+                if offset > 0:
+                    csv_file.seek(offset - 1)
+                    if csv_file.read(1) != b"\n":
+                        raise ValueError(f"No row starts at {row_id}.")
+                found = next(_read_rows(csv_file, offset), None)
+            if found is None:
+                raise ValueError(f"No row starts at {row_id}.")
+            return found[1]
+
+    def void(self, row_id, user="", reason=""):
+        return self._change(row_id, None, user, reason)
+
+    def correct(self, row_id, cells, user="", reason=""):
+        return self._change(row_id, [str(cell) for cell in cells], user, reason)
+
+    def _change(self, row_id, after, user, reason):
+        with self.lock:
+            before = self.row(row_id)
+            record = {
+                "op": "void" if after is None else "correct",
+                "generation": self.generation,
+                "row": self._offset(row_id),
+                "time": dt.datetime.now().isoformat(timespec="seconds"),
+                "user": user or default_user(),
+                "reason": reason,
+                "before": before,
+                "after": after,
+            }
+            self._append(record)
+        return record
+
+    def translate(self, row_ids):
+        """{row id: the same row's id now} for ids from earlier generations.
+
+        A row voided by a compaction since maps to None, and so does an id
+        the log cannot account for.
+        """
+        with self.lock:
+            self._sync()
+            current = self.generation
+        steps = {}
+        for record in self.records():
+            if record.get("op") == "compact" and "shifts" in record:
+                offsets, moved, total = [], [0], 0
+                for offset, change in record["shifts"]:
+                    offsets.append(offset)
+                    total += change
+                    moved.append(total)
+                steps[record["generation"]] = (offsets, moved, set(record["voided"]))
+        result = {}
+        for row_id in row_ids:
+            try:
+                generation, offset = split_row_id(row_id)
+            except ValueError:
+                result[row_id] = None
+                continue
+            while offset is not None and generation < current:
+                step = steps.get(generation + 1)
+                if step is None or offset in step[2]:
+                    offset = None
+                    break
+                offsets, moved, _ = step
+                # Rows are moved by the change in length of every rewritten row before them
+                offset += moved[bisect.bisect_left(offsets, offset)]
+                generation += 1
+            result[row_id] = None if offset is None or generation > current else f"{generation}:{offset}"
+        return result
+
+    def records(self):
+        """Every record in the log, oldest first: the audit trail."""
+        if not os.path.exists(self.log_path):
+            return
+        with secure_store.open(self.log_path, "rb") as log_file:
+            for line in log_file:
+                if line.endswith(b"\n"):
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def compact(self, user=""):
+        """Rewrite the file with the pending records folded in; returns how many were folded.
+
+        The caller holds off appends to the file for the duration, in every
+        process that writes it (see books._ledger_writes()). Readers and
+        corrections carry on while the new file is written; if a correction
+        lands meanwhile, the rewrite is dropped and left for the next round.
+        Logging the record and swapping the file happen under swap_lock(),
+        so no reader sees the new generation paired with the old file.
+        """
+        with self.lock:
+            self._sync()
+            if not self.overlay:
+                return 0
+            generation, pending, seen = self.generation, dict(self.overlay), self.log_offset
+        shifts = []
+        secure_store.write_file(self.temp_path, self._compacted(pending, shifts), like=self.path)
+        with self.lock, self.swap_lock():
+            self._sync()
+            if self.log_offset != seen:
+                os.remove(self.temp_path)
+                return 0
+            self._append(
+                {
+                    "op": "compact",
+                    "generation": generation + 1,
+                    "time": dt.datetime.now().isoformat(timespec="seconds"),
+                    "user": user or default_user(),
+                    "folded": len(pending),
+                    "shifts": shifts,
+                    "voided": sorted(offset for offset, cells in pending.items() if cells is None),
+                }
+            )
+            os.replace(self.temp_path, self.path)
+        return len(pending)
+
+    def _compacted(self, pending, shifts):
+        """The file's bytes with pending rows replaced or dropped; everything else is copied as is.
+
+        Appends [offset, change in length] for each rewritten row to shifts.
+        """
+        with secure_store.open(self.path, "rb") as source:
+            position = 0
+            for offset in sorted(pending):
+                source.seek(position)
+                remaining = offset - position
+                while remaining > 0:
+                    block = source.read(min(COPY_BLOCK, remaining))
+                    if not block:
+                        break
+                    remaining -= len(block)
+                    yield block
+                found = next(_read_rows(source, offset), None)
+                if found is None:
+                    continue
+                line = b"" if pending[offset] is None else csv_line(pending[offset])
+                shifts.append([offset, len(line) - (found[2] - offset)])
+                yield line
+                position = found[2]
+            source.seek(position)
+            while True:
+                block = source.read(COPY_BLOCK)
+                if not block:
+                    return
+                yield block
+
+
+class Compactor:
+    """Background thread that compacts each trail once `threshold` records are pending.
+
+    jobs are (trail, compact) pairs, where compact() holds off the file's
+    writers and calls trail.compact().
+    """
+
+    def __init__(self, jobs, interval=600, threshold=100):
+        self.jobs = list(jobs)
+        self.interval = interval
+        self.threshold = threshold
+        self.stopping = threading.Event()
+        self.thread = None
+        self.last_run = None
+
+    def run_once(self, force=False):
+        folded = 0
+        for trail, compact in self.jobs:
+            if trail.pending_count() >= (1 if force else self.threshold):
+                folded += compact()
+        self.last_run = time.time()
+        return folded
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, name="audit-compactor", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=10):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def _run(self):
+        while not self.stopping.wait(self.interval):
+            try:
+                self.run_once()
+            except (OSError, ValueError, secure_store.EncryptionError):
+                continue  # tried again next round; the pending records keep the data correct meanwhile
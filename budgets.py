@@ -0,0 +1,255 @@
+import datetime as dt
+import decimal
+import hashlib
+import json
+import os
+import threading
+
+import audit
+import gst
+import ledger
+import secure_store
+
+
+ZERO = decimal.Decimal("0")
+# Warn once spending reaches this share of a budget
+BUDGET_WARNING_SHARE = decimal.Decimal("0.9")
+COUNTER_KEYS = ("spent", "envelope_spent", "allocated")
+
+
+def month_key(date):
+    return f"{date.year:04d}-{date.month:02d}"
+
+
+def envelope_of(category):
+    """The envelope an expense is paid from: its group in the money-flow chart (Needs, Wants, ...)."""
+    return ledger.category_group(category)
+
+
+def budget_level(spent, limit):
+    if spent > limit:
+        return "over"
+    if spent >= limit * BUDGET_WARNING_SHARE:
+        return "near"
+    return "ok"
+
+
+class AllocationRules:
+    """Splits each inflow into envelopes by percentage.
+
+    rules are {"categories": [...], "split": {envelope: percent}} dicts; a
+    rule naming the inflow's category wins over one listing "*". Each share
+    is rounded to the paisa and the rounding difference goes to the largest
+    one, so the parts always add up to the allocated amount. Percentages
+    adding up to less than 100 leave the rest unallocated.
+    """
+
+    def __init__(self, rules):
+        rules = list(rules)
+        # Saved with the budget state, which is rebuilt when the rules change
+        self.fingerprint = hashlib.sha256(json.dumps(rules, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        self.by_category = {}
+        self.default = None
+        self.envelopes = set()
+        for rule in rules:
+            split = {envelope: decimal.Decimal(str(percent)) for envelope, percent in rule["split"].items()}
+            if any(percent < 0 for percent in split.values()) or sum(split.values()) > gst.HUNDRED:
+                raise ValueError(f"Allocation split {rule['split']} must be percentages adding up to at most 100.")
+            self.envelopes.update(split)
+            for category in rule.get("categories", ["*"]):
+                if category == "*":
+                    if self.default is None:
+                        self.default = split
+                else:
+                    self.by_category.setdefault(category, split)
+
+    def split(self, amount, category):
+        shares = self.by_category.get(category, self.default)
+        if not shares:
+            return {}
+        parts = {envelope: gst.to_paise(amount * percent / gst.HUNDRED) for envelope, percent in shares.items()}
+        largest = max(shares, key=shares.get)
+        parts[largest] += gst.to_paise(amount * sum(shares.values()) / gst.HUNDRED) - sum(parts.values())
+        return parts
+
+
+class BudgetMonitor:
+    """Monthly spend per category and per envelope, and what the allocation rules put into each envelope.
+
+    Envelope balances (everything allocated less everything spent) carry
+    over from month to month; budgets are per calendar month. The counters
+    live in memory and are saved with the ledger offset they reach, so
+    sync() only folds in rows appended since the last call; a void,
+    correction or compaction rebuilds them, as in TurnoverMonitor, and so
+    does a change to the allocation rules. check()
+    looks at the counters alone, so an entry is checked against its budgets
+    in constant time however long the ledger grows.
+    """
+
+    def __init__(self, state_path, ledger_path, category_budgets=None, envelope_budgets=None, rules=()):
+        self.state_path = state_path
+        self.ledger_path = ledger_path
+        self.category_budgets = {name: decimal.Decimal(str(limit)) for name, limit in (category_budgets or {}).items()}
+        self.envelope_budgets = {name: decimal.Decimal(str(limit)) for name, limit in (envelope_budgets or {}).items()}
+        self.rules = AllocationRules(rules)
+        self.lock = threading.RLock()
+        self.loaded = False
+        self._reset()
+
+    def _reset(self):
+        self.months = {}
+        self.balances = {}
+        self.ledger_offset = 0
+        self.ledger_revision = 0
+
+    def load(self):
+        with self.lock:
+            self._reset()
+            if os.path.exists(self.state_path):
+                try:
+                    with secure_store.open(self.state_path, "r", encoding="utf-8") as state_file:
+                        state = json.load(state_file)
+                    if state.get("rules") != self.rules.fingerprint:
+                        raise ValueError("The allocation rules have changed since the state was saved.")
+                    self.months = {
+                        month: {key: {name: decimal.Decimal(value) for name, value in counters[key].items()} for key in COUNTER_KEYS}
+                        for month, counters in state["months"].items()
+                    }
+                    self.balances = {name: decimal.Decimal(value) for name, value in state["balances"].items()}
+                    self.ledger_offset = int(state["ledger_offset"])
+                    self.ledger_revision = int(state.get("ledger_revision", 0))
+                except (OSError, ValueError, KeyError, TypeError, AttributeError, decimal.InvalidOperation):
+                    self._reset()
+            self.loaded = True
+            self.sync(force_save=True)
+
+    def _month(self, key):
+        counters = self.months.get(key)
+        if counters is None:
+            counters = self.months[key] = {name: {} for name in COUNTER_KEYS}
+        return counters
+
+    def _add_row(self, row):
+        entry = ledger.parse_ledger_row(row)
+        if entry is None:
+            return
+        counters = self._month(month_key(entry["timestamp"]))
+        if ledger.is_inflow(entry["category"]):
+            for envelope, part in self.rules.split(entry["amount"], entry["category"]).items():
+                counters["allocated"][envelope] = counters["allocated"].get(envelope, ZERO) + part
+                self.balances[envelope] = self.balances.get(envelope, ZERO) + part
+            return
+        envelope = envelope_of(entry["category"])
+        counters["spent"][entry["category"]] = counters["spent"].get(entry["category"], ZERO) + entry["amount"]
+        counters["envelope_spent"][envelope] = counters["envelope_spent"].get(envelope, ZERO) + entry["amount"]
+        self.balances[envelope] = self.balances.get(envelope, ZERO) - entry["amount"]
+
+    def sync(self, force_save=False):
+        """Fold in rows appended to the ledger since the last sync."""
+        with self.lock:
+            if not self.loaded:
+                self.load()
+                return
+            changed = force_save
+            size = secure_store.getsize(self.ledger_path) if os.path.exists(self.ledger_path) else 0
+            revision = audit.revision(self.ledger_path)
+            if size < self.ledger_offset or revision != self.ledger_revision:
+                self._reset()
+                self.ledger_revision = revision
+                changed = True
+            for row, offset in ledger.iter_csv_rows_from(self.ledger_path, self.ledger_offset):
+                self._add_row(row)
+                self.ledger_offset = offset
+                changed = True
+            if changed:
+                self.save()
+
+    def save(self):
+        state = {
+            "rules": self.rules.fingerprint,
+            "ledger_offset": self.ledger_offset,
+            "ledger_revision": self.ledger_revision,
+            "balances": {name: str(value) for name, value in self.balances.items()},
+            "months": {
+                month: {key: {name: str(value) for name, value in counters[key].items()} for key in COUNTER_KEYS}
+                for month, counters in self.months.items()
+            },
+        }
+        temp_path = self.state_path + ".tmp"
+        # Encrypted along with the ledger when that is
+        secure_store.write_file(temp_path, [json.dumps(state, indent=2, sort_keys=True).encode("utf-8")], like=self.state_path)
+        os.replace(temp_path, self.state_path)
+
+    def check(self, amount, category, date=None):
+        """The budgets an expense of `amount` in `category` would run into this month.
+
+        Returns warnings as dicts with the budget's name, its kind ("category",
+        "envelope", or "balance" for spending more than the envelope holds),
+        the limit (for "balance", what the envelope holds), the month's spend
+        including this entry (for "balance", the entry alone) and a level of
+        "near" or "over". Inflows are never warned about.
+        """
+        amount = decimal.Decimal(str(amount))
+        if amount <= 0 or ledger.is_inflow(category):
+            return []
+        with self.lock:
+            # Cheap unless the ledger changed, here or in another process, since the last look
+            self.sync()
+            counters = self.months.get(month_key(date or dt.date.today())) or {name: {} for name in COUNTER_KEYS}
+            envelope = envelope_of(category)
+            spent = counters["spent"].get(category, ZERO)
+            envelope_spent = counters["envelope_spent"].get(envelope, ZERO)
+            balance = self.balances.get(envelope, ZERO)
+        warnings = []
+        for kind, name, limit, before in (
+            ("category", category, self.category_budgets.get(category), spent),
+            ("envelope", envelope, self.envelope_budgets.get(envelope), envelope_spent),
+        ):
+            if limit is None:
+                continue
+            level = budget_level(before + amount, limit)
+            if level == "over" or (level == "near" and budget_level(before, limit) == "ok"):
+                warnings.append({"budget": name, "kind": kind, "limit": limit, "spent": before + amount, "level": level})
+        if envelope in self.rules.envelopes and amount > balance:
+            warnings.append({"budget": envelope, "kind": "balance", "limit": balance, "spent": amount, "level": "over"})
+        return warnings
+
+    def status(self, month=None):
+        """For one month: budget, allocation and spend per envelope with its balance to date, and budget and spend per category."""
+        month = month or month_key(dt.date.today())
+        with self.lock:
+            # Cheap unless the ledger changed, here or in another process, since the last look
+            self.sync()
+            counters = self.months.get(month) or {name: {} for name in COUNTER_KEYS}
+            envelopes = sorted(set(self.envelope_budgets) | self.rules.envelopes | set(counters["envelope_spent"]))
+            categories = sorted(set(self.category_budgets) | set(counters["spent"]))
+            return {
+                "month": month,
+                "envelopes": {
+                    name: {
+                        "budget": self.envelope_budgets.get(name),
+                        "allocated": counters["allocated"].get(name, ZERO),
+                        "spent": counters["envelope_spent"].get(name, ZERO),
+                        "balance": self.balances.get(name, ZERO),
+                    }
+                    for name in envelopes
+                },
+                "categories": {
+                    name: {"budget": self.category_budgets.get(name), "spent": counters["spent"].get(name, ZERO)}
+                    for name in categories
+                },
+            }
+
+
+def warning_text(warnings):
+    """One line per check() warning, for the GUI and the CLI."""
+    lines = []
+    for warning in warnings:
+        name, limit, spent = warning["budget"], warning["limit"], warning["spent"]
+        if warning["kind"] == "balance":
+            lines.append(f"{name} envelope: ₹{spent:,.2f} spent with only ₹{limit:,.2f} left in it.")
+        elif warning["level"] == "over":
+            lines.append(f"{name}: ₹{spent:,.2f} spent, ₹{spent - limit:,.2f} over the ₹{limit:,.2f} monthly budget.")
+        else:
+            lines.append(f"{name}: ₹{spent:,.2f} spent, {spent * gst.HUNDRED / limit:.0f}% of the ₹{limit:,.2f} monthly budget.")
+    return "\n".join(lines)
@@ -0,0 +1,208 @@
+import collections
+import datetime as dt
+import sqlite3
+import threading
+
+import gst
+from clients import name_key
+
+
+ITEM_FIELDS = ["itemName", "description", "hsn", "price", "tax"]
+LRU_SIZE = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    item_key TEXT PRIMARY KEY,
+    itemName TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    hsn TEXT NOT NULL DEFAULT '',
+    price TEXT NOT NULL DEFAULT '',
+    tax TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS last_prices (
+    item_key TEXT NOT NULL,
+    client_key TEXT NOT NULL,
+    paise INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    PRIMARY KEY (item_key, client_key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS price_history (
+    item_key TEXT NOT NULL,
+    client_key TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    paise INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS price_history_item_client ON price_history (item_key, client_key, day);
+"""
+
+
+class LruCache:
+    """Most recently used entries; safe to share between the Tk thread and the workers."""
+
+    def __init__(self, size=LRU_SIZE):
+        self.size = size
+        self.lock = threading.Lock()
+        self.entries = collections.OrderedDict()
+
+    def get(self, key, default=None):
+        with self.lock:
+            try:
+                self.entries.move_to_end(key)
+            except KeyError:
+                return default
+            return self.entries[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+def invoice_item(record, quantity=1, price=None, inter_state=False):
+    """An invoice item dict (as ItemDialog builds them) from a catalogue record."""
+    quantity = gst.to_decimal(quantity)
+    price = gst.to_decimal(record.get("price") if price is None else price)
+    taxable, cgst, sgst, igst = gst.line_tax(quantity, price, gst.to_decimal(record.get("tax")), inter_state)
+    return {
+        "itemName": record["itemName"],
+        "description": record.get("description", ""),
+        "hsn": record.get("hsn", ""),
+        "quantity": f"{quantity.normalize():f}",
+        "price": f"{price:.2f}",
+        "tax": record.get("tax", ""),
+        "amount": f"{taxable + cgst + sgst + igst:.2f}",
+    }
+
+
+class Catalogue:
+    """Products and services with default price and tax, plus the prices each client was charged.
+
+    Items are looked up by their case-folded name through the primary key,
+    with the most used records held in an LRU cache. The last price per
+    (item, client) pair has its own keyed table, so it is a single lookup;
+    every charge is also appended to price_history as integer paise and days.
+    """
+
+    def __init__(self, db_path, cache_size=LRU_SIZE):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self._connection = None
+        self.items = LruCache(cache_size)
+        self.prices = LruCache(cache_size)
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def get(self, name):
+        key = name_key(name)
+        record = self.items.get(key)
+        if record is None:
+            with self.lock:
+                row = self.connection.execute(
+                    f"SELECT {', '.join(ITEM_FIELDS)} FROM items WHERE item_key = ?", (key,)
+                ).fetchone()
+            if row is None:
+                return None
+            record = dict(row)
+            self.items.put(key, record)
+        return dict(record)
+
+    def names(self, prefix="", limit=50):
+        """Item names starting with prefix, in name order."""
+        key = name_key(prefix)
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT itemName FROM items WHERE item_key >= ? AND item_key < ? ORDER BY item_key LIMIT ?",
+                (key, key + "\uffff", limit),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def save(self, item, overwrite=True):
+        """Add or update a catalogue record from an item dict; returns False if it existed and overwrite is off."""
+        key = name_key(item.get("itemName"))
+        if not key:
+            raise ValueError("Item name is required.")
+        record = {field: str(item.get(field) or "").strip() for field in ITEM_FIELDS}
+        verb = "INSERT OR REPLACE" if overwrite else "INSERT OR IGNORE"
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                f"{verb} INTO items (item_key, {', '.join(ITEM_FIELDS)}) VALUES (?, {', '.join('?' for _ in ITEM_FIELDS)})",
+                [key, *(record[field] for field in ITEM_FIELDS)],
+            )
+        if cursor.rowcount:
+            self.items.discard(key)
+        return bool(cursor.rowcount)
+
+    def last_price(self, item_name, client):
+        """Last price charged to this client for the item as a Decimal, or None."""
+        key = (name_key(item_name), name_key(client))
+        price = self.prices.get(key)
+        if price is None:
+            with self.lock:
+                row = self.connection.execute(
+                    "SELECT paise FROM last_prices WHERE item_key = ? AND client_key = ?", key
+                ).fetchone()
+            if row is None:
+                return None
+            price = gst.to_decimal(row[0]) / 100
+            self.prices.put(key, price)
+        return price
+
+    def record_invoice(self, fields, items, date=None):
+        """Learn new items and remember the price each line charged the invoice's client."""
+        client_key = name_key(fields.get("billToName"))
+        day = (date or dt.date.today()).toordinal()
+        records, charges = {}, []
+        for item in items:
+            item_key = name_key(item.get("itemName"))
+            if not item_key:
+                continue
+            records.setdefault(item_key, [str(item.get(field) or "").strip() for field in ITEM_FIELDS])
+            try:
+                paise = int(gst.to_paise(gst.to_decimal(item.get("price"))) * 100)
+            except ValueError:
+                continue
+            charges.append((item_key, client_key, day, paise))
+        if not records:
+            return
+        with self.lock, self.connection:
+            self.connection.executemany(
+                f"INSERT OR IGNORE INTO items (item_key, {', '.join(ITEM_FIELDS)}) "
+                f"VALUES (?, {', '.join('?' for _ in ITEM_FIELDS)})",
+                [[item_key, *values] for item_key, values in records.items()],
+            )
+            self.connection.executemany(
+                "INSERT INTO price_history (item_key, client_key, day, paise) VALUES (?, ?, ?, ?)", charges
+            )
+            # An older invoice recorded late (seeding from history, an edit) must not replace a newer price
+            self.connection.executemany(
+                "INSERT INTO last_prices (item_key, client_key, day, paise) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (item_key, client_key) DO UPDATE SET day = excluded.day, paise = excluded.paise "
+                "WHERE excluded.day >= last_prices.day",
+                charges,
+            )
+        for item_key, client_key, _, _ in charges:
+            self.prices.discard((item_key, client_key))
+
+    def price_history(self, item_name, client=None):
+        """[(date, client_key, Decimal price)] oldest first."""
+        query = "SELECT day, client_key, paise FROM price_history WHERE item_key = ?"
+        params = [name_key(item_name)]
+        if client is not None:
+            query += " AND client_key = ?"
+            params.append(name_key(client))
+        with self.lock:
+            rows = self.connection.execute(query + " ORDER BY day", params).fetchall()
+        return [(dt.date.fromordinal(day), client_key, gst.to_decimal(paise) / 100) for day, client_key, paise in rows]
@@ -0,0 +1,302 @@
+import collections
+import getpass
+import os
+
+import budgets
+import catalogue
+import gst
+import ledger
+import secure_store
+import turnover
+from toolkit import books, config, invoicing, performance, services, taxes, telemetry, workspaces
+
+
+MENU = """
+Welcome to Solo Entrepreneur Toolkit
+Menu
+1) Invoice Generator
+2) Tax Calculator
+3) Productivity Calculator
+4) Money Monitor
+5) Void or Correct an Entry
+6) Switch Business
+7) Attach Receipts
+8) Exit
+"""
+
+# Rows listed when picking one to void, correct or attach receipts to
+RECENT_ROWS = 20
+
+
+def ask_float(prompt):
+    while True:
+        try:
+            return float(input(prompt) or 0)
+        except ValueError:
+            print("Please enter a number.")
+
+
+def invoice_generator():
+    print("----- INVOICE GENERATOR -----")
+    fields = invoicing.blank_invoice_fields()
+    for label, key in invoicing.INVOICE_FIELD_KEYS:
+        if key == "totalAmount":
+            continue
+        fields[key] = input(f"{label}: ").strip()
+    fields["notesText"] = input("Notes: ").strip()
+    inter_state = gst.is_inter_state(fields["companyState"], fields["placeOfSupply"])
+    items = []
+    while True:
+        name = input("Item name (blank to finish): ").strip()
+        if not name:
+            break
+        record = services.item_catalogue.get(name) or {"itemName": name}
+        record = dict(record, description=input("Description: ").strip() or record.get("description", ""))
+        quantity = input("Quantity [1]: ").strip() or "1"
+        price = input(f"Price [{record.get('price', '')}]: ").strip() or record.get("price") or "0"
+        record["tax"] = input(f"Tax % [{record.get('tax', '0')}]: ").strip() or record.get("tax") or "0"
+        try:
+            items.append(catalogue.invoice_item(record, quantity, price, inter_state))
+        except ValueError as exc:
+            print(f"Skipped: {exc}")
+    fields["totalAmount"] = f"₹{invoicing.compute_invoice_tax(fields, items)['totals']['total']:,.2f}"
+
+    print("\nGenerating...")
+    try:
+        _, pdf_path = invoicing.generate_invoice_pdf(fields, items)
+    except (OSError, RuntimeError, ValueError) as exc:
+        print(f"ERROR: {exc}")
+        return
+    print(f"\nPDF generated successfully: {pdf_path}")
+    if config.SMTP_HOST:
+        recipient = input("Email it to (blank to skip): ").strip()
+        if recipient:
+            try:
+                invoicing.email_invoice(fields, pdf_path, recipient)
+            except ValueError as exc:
+                print(f"ERROR: {exc}")
+                return
+            print(f"Queued for {recipient}.")
+
+
+def tax_calculator():
+    print("----- TAX CALCULATOR -----")
+    income = ask_float("Yearly income (₹): ")
+    investment = ask_float("Investment under 80C (max ₹150000): ")
+    health = ask_float("Health insurance premium under 80D (max ₹25000): ")
+    result = taxes.calculate_tax(income, investment, health)
+    print("--------------------------------")
+    print(f"Total deductions applied: ₹{result['total_deductions']:.2f}")
+    print(f"Taxable income: ₹{result['taxable_income']:.2f}")
+    print(result["rebate_text"])
+    print(f"Final income tax payable: ₹{result['tax']:.2f}")
+    print("--------------------------------")
+    print("Note:")
+    print("- keep all proofs for deductions claimed.")
+    print("- file ITR-3 or ITR-4 as applicable.")
+    print("--------------------------------")
+    print(turnover.status_text(services.turnover_monitor.status()))
+    print("--------------------------------")
+
+
+def productivity_calculator():
+    print("----- PRODUCTIVITY CALCULATOR -----")
+    try:
+        result = performance.calculate_productivity(
+            ask_float("Hours worked per day: "), ask_float("Profit per month (₹): ")
+        )
+    except ValueError as exc:
+        print(f"ERROR: {exc}")
+        return
+    print(f"Your productivity is {result['productivity']:.2f}%")
+    print(
+        f"You are at ₹{result['daily_rate']:.2f}/day, {result['comparison']} "
+        f"the ₹{config.INDUSTRY_AVERAGE_RATE}/hr industry average.\n"
+    )
+    print("Pro Tip: \n" + performance.get_pro_tip())
+
+
+def money_monitor():
+    print("----- MONEY MONITOR -----")
+    for group, categories in ledger.CATEGORY_GROUPS.items():
+        print(f"{group}:")
+        for category in categories:
+            print(f"  {ledger.CATEGORIES.index(category) + 1:>2}) {category}")
+    try:
+        category = ledger.CATEGORIES[int(input("Enter the number of your category: ")) - 1]
+    except (ValueError, IndexError):
+        print("Invalid category.")
+        return
+    amount = ask_float("Enter amount: ")
+    note = input("Enter note: ").strip()
+    warnings = books.budget_warnings(amount, category)
+    books.write_money_flow_entry(amount, category, note)
+    print(f"\nEntry saved successfully under '{category}' category!\n")
+    if warnings:
+        print(budgets.warning_text(warnings) + "\n")
+
+
+def fix_ledger_entry():
+    entries = {entry["id"]: entry for entry in collections.deque(books.ledger_entries(), maxlen=RECENT_ROWS)}
+    for row_id, entry in entries.items():
+        print(f"  [{row_id}] {entry['timestamp']:%Y-%m-%d %H:%M}  {entry['category']}  ₹{entry['amount']:,.2f}  {entry['note']}")
+    entry = entries.get(input("Row id: ").strip())
+    if entry is None:
+        print("Pick one of the ids above.")
+        return
+    action = input("Void or correct? (v/c): ").strip().lower()
+    reason = input("Reason: ").strip()
+    try:
+        if action.startswith("v"):
+            books.void_ledger_entry(entry["id"], reason)
+        else:
+            amount = input(f"Amount [{entry['amount']}]: ").strip() or entry["amount"]
+            category = input(f"Category [{entry['category']}]: ").strip() or entry["category"]
+            note = input(f"Note [{entry['note']}]: ").strip() or entry["note"]
+            books.correct_ledger_entry(entry["id"], amount, category, note, reason)
+    except ValueError as exc:
+        print(f"ERROR: {exc}")
+        return
+    print("Done. The change is in the audit trail; the ledger file is folded up later.")
+
+
+def fix_invoice():
+    rows = {row["id"]: row for row in collections.deque(invoicing.invoice_history(), maxlen=RECENT_ROWS)}
+    for row_id, row in rows.items():
+        print(f"  [{row_id}] {row['invoiceNumber']}  {row['invoiceDate']}  {row['billToName']}  {row['totalAmount']}")
+    row = rows.get(input("Row id: ").strip())
+    if row is None:
+        print("Pick one of the ids above.")
+        return
+    action = input("Void or correct? (v/c): ").strip().lower()
+    reason = input("Reason: ").strip()
+    try:
+        if action.startswith("v"):
+            invoicing.void_invoice(row["id"], reason)
+        else:
+            changes = {}
+            for key in ("invoiceDate", "billToName", "totalAmount"):
+                value = input(f"{key} [{row[key]}]: ").strip()
+                if value:
+                    changes[key] = value
+            if not changes:
+                print("Nothing changed.")
+                return
+            invoicing.correct_invoice(row["id"], changes, reason)
+    except ValueError as exc:
+        print(f"ERROR: {exc}")
+        return
+    print("Done. The change is in the audit trail; the history file is folded up later.")
+
+
+def fix_entry():
+    print("----- VOID OR CORRECT AN ENTRY -----")
+    if input("Ledger entry or invoice? (l/i): ").strip().lower().startswith("i"):
+        fix_invoice()
+    else:
+        fix_ledger_entry()
+
+
+def attach_receipts():
+    print("----- ATTACH RECEIPTS -----")
+    entries = {entry["id"]: entry for entry in collections.deque(books.ledger_entries(), maxlen=RECENT_ROWS)}
+    for row_id, entry in entries.items():
+        print(f"  [{row_id}] {entry['timestamp']:%Y-%m-%d %H:%M}  {entry['category']}  ₹{entry['amount']:,.2f}  {entry['note']}")
+    entry = entries.get(input("Row id: ").strip())
+    if entry is None:
+        print("Pick one of the ids above.")
+        return
+    for document in books.ledger_attachments(entry["id"]):
+        print(f"  Attached: {document['name']}  ({document['size']:,} bytes)  {document['path']}")
+    path = input("File or folder to attach (blank to skip): ").strip()
+    if not path:
+        return
+    if os.path.isdir(path):
+        paths = [os.path.join(path, name) for name in sorted(os.listdir(path))]
+        paths = [file_path for file_path in paths if os.path.isfile(file_path)]
+    else:
+        paths = [path]
+    try:
+        added, failed = books.attach_receipts((entry["id"], file_path) for file_path in paths)
+    except ValueError as exc:
+        print(f"ERROR: {exc}")
+        return
+    print(f"Attached {len(added)} file(s).")
+    for file_path, error in failed.items():
+        print(f"  Could not read {file_path}: {error}")
+
+
+def unlock():
+    books.enable_encrypted_storage(os.environ.get(config.PASSPHRASE_ENV_VAR) or getpass.getpass("Passphrase: "))
+
+
+def switch_business():
+    print("----- SWITCH BUSINESS -----")
+    names = workspaces.workspace_names()
+    for index, name in enumerate(names, 1):
+        print(f"  {index}) {name}{'  (current)' if name == config.WORKSPACE else ''}")
+    print("  n) New business")
+    choice = input("Choose a business: ").strip()
+    previous = config.WORKSPACE
+    try:
+        if choice.lower() == "n":
+            name = input("Name: ").strip()
+            workspaces.create_workspace(name)
+        elif choice.isdigit() and 1 <= int(choice) <= len(names):
+            name = names[int(choice) - 1]
+        else:
+            print("Invalid choice.")
+            return
+        if name == previous:
+            return
+        workspaces.activate(name)
+    except (ValueError, OSError) as exc:
+        print(f"ERROR: {exc}")
+        return
+    if config.ENCRYPT_DATA_FILES:
+        try:
+            unlock()
+        except secure_store.EncryptionError as exc:
+            print(f"ERROR: {exc}")
+            workspaces.activate(previous)
+            services.start_background_workers()
+            return
+    services.start_background_workers()
+    print(f"Now working in {name}.")
+
+
+ACTIONS = {
+    "1": invoice_generator,
+    "2": tax_calculator,
+    "3": productivity_calculator,
+    "4": money_monitor,
+    "5": fix_entry,
+    "6": switch_business,
+    "7": attach_receipts,
+}
+
+
+def main():
+    if os.environ.get(config.WORKSPACE_ENV_VAR):
+        workspaces.activate(os.environ[config.WORKSPACE_ENV_VAR])
+    if config.ENCRYPT_DATA_FILES:
+        unlock()
+    services.start_background_workers()
+    telemetry.start_exporter("cli", config.METRICS_PORT)
+    while True:
+        print(MENU)
+        print(f"Business: {config.WORKSPACE}")
+        choice = input("Choose an option (1-8): ").strip()
+        if choice == "8":
+            print("Exiting.\nHave a nice time ahead.")
+            telemetry.stop_exporter()
+            break
+        action = ACTIONS.get(choice)
+        if action is None:
+            print("Invalid option. Please choose between 1 and 8.")
+            continue
+        action()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import collections
+import sqlite3
+import threading
+
+
+CLIENT_FIELDS = ["billToName", "billToAddress", "billToCity", "billToCountry", "billToPostal", "placeOfSupply"]
+COMPANY_FIELDS = ["companyName", "companyAddress", "companyCity", "companyCountry", "companyPostal", "companyState"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clients (
+    name_key TEXT PRIMARY KEY,
+    billToName TEXT NOT NULL,
+    billToAddress TEXT NOT NULL DEFAULT '',
+    billToCity TEXT NOT NULL DEFAULT '',
+    billToCountry TEXT NOT NULL DEFAULT '',
+    billToPostal TEXT NOT NULL DEFAULT '',
+    placeOfSupply TEXT NOT NULL DEFAULT '',
+    updated TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS company_profile (
+    field TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def name_key(name):
+    return " ".join(str(name or "").split()).casefold()
+
+
+class PrefixTrie:
+    """Map prefixes of each word in a name to the name's key.
+
+    Every word is inserted, so "sharma" finds "Priya Sharma Designs" as well
+    as "Sharma & Sons". Insertion is incremental; nothing is ever rebuilt.
+    """
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, key):
+        words = key.split()
+        for start in range(len(words)):
+            node = self.root
+            for ch in " ".join(words[start:]):
+                node = node.setdefault(ch, {})
+            node.setdefault(None, set()).add(key)
+
+    def complete(self, prefix, limit=10):
+        node = self.root
+        for ch in name_key(prefix):
+            node = node.get(ch)
+            if node is None:
+                return []
+        # Breadth-first, so the shortest completions come back first
+        found = []
+        queue = collections.deque([node])
+        while queue and len(found) < limit:
+            node = queue.popleft()
+            for key in sorted(node.get(None, ())):
+                if key not in found:
+                    found.append(key)
+            queue.extend(child for ch, child in node.items() if ch is not None)
+        return found[:limit]
+
+
+class ClientDirectory:
+    """Bill-to details per client in SQLite, with an in-memory trie over client names for autocomplete.
+
+    The table is read once on first use; remember() writes through to SQLite
+    and adds new names to the trie as it goes. Every method can be called
+    from any thread.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self._connection = None
+        self.clients = None
+        self.trie = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    @property
+    def loaded(self):
+        return self.clients is not None
+
+    def load(self):
+        with self.lock:
+            clients, trie = {}, PrefixTrie()
+            for row in self.connection.execute(f"SELECT name_key, {', '.join(CLIENT_FIELDS)} FROM clients"):
+                record = dict(row)
+                key = record.pop("name_key")
+                clients[key] = record
+                trie.insert(key)
+            self.clients, self.trie = clients, trie
+
+    def remember(self, fields):
+        """Store or update a client from invoice fields; blank fields keep what was stored."""
+        key = name_key(fields.get("billToName"))
+        if not key:
+            return None
+        with self.lock:
+            stored = (self.clients or {}).get(key)
+            if stored is None and self.clients is None:
+                row = self.connection.execute("SELECT * FROM clients WHERE name_key = ?", (key,)).fetchone()
+                stored = {field: row[field] for field in CLIENT_FIELDS} if row else None
+            record = dict(stored or {field: "" for field in CLIENT_FIELDS})
+            for field in CLIENT_FIELDS:
+                value = " ".join(str(fields.get(field) or "").split())
+                if value:
+                    record[field] = value
+            if record == stored:
+                return record
+            with self.connection:
+                self.connection.execute(
+                    f"INSERT OR REPLACE INTO clients (name_key, {', '.join(CLIENT_FIELDS)}, updated) "
+                    f"VALUES (?, {', '.join('?' for _ in CLIENT_FIELDS)}, CURRENT_TIMESTAMP)",
+                    [key, *(record[field] for field in CLIENT_FIELDS)],
+                )
+            if self.clients is not None:
+                if key not in self.clients:
+                    self.trie.insert(key)
+                self.clients[key] = record
+        return record
+
+    def complete(self, prefix, limit=10):
+        """Client records whose name (or any word in it) starts with prefix."""
+        if not self.loaded:
+            self.load()
+        if not prefix.strip():
+            return []
+        # remember() may be adding to the trie from another thread
+        with self.lock:
+            return [self.clients[key] for key in self.trie.complete(prefix, limit)]
+
+    def get(self, name):
+        if not self.loaded:
+            self.load()
+        with self.lock:
+            return self.clients.get(name_key(name))
+
+    def is_empty(self):
+        with self.lock:
+            return self.connection.execute("SELECT 1 FROM clients LIMIT 1").fetchone() is None
+
+    def company_profile(self):
+        with self.lock:
+            return {row["field"]: row["value"] for row in self.connection.execute("SELECT field, value FROM company_profile")}
+
+    def save_company_profile(self, fields):
+        values = [(field, str(fields.get(field) or "").strip()) for field in COMPANY_FIELDS]
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO company_profile (field, value) VALUES (?, ?)",
+                [(field, value) for field, value in values if value],
+            )
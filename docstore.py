@@ -0,0 +1,249 @@
+import concurrent.futures
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+
+import secure_store
+
+
+CHUNK_SIZE = 1024 * 1024
+# objects/ab/cd/abcd...: two levels of 256 directories keep each one small even with millions of files
+SHARD_LEVELS = 2
+DEFAULT_WORKERS = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest BLOB PRIMARY KEY,
+    size INTEGER NOT NULL,
+    added TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS links (
+    target TEXT NOT NULL,
+    key TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    added TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (target, key, digest)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS links_digest ON links (digest);
+"""
+
+
+def check_digest(digest):
+    """The raw 32 bytes of a hex SHA-256 digest; raises ValueError for anything else."""
+    try:
+        raw = bytes.fromhex(digest)
+    except (TypeError, ValueError):
+        raw = b""
+    if len(raw) != hashlib.sha256().digest_size:
+        raise ValueError(f"{digest!r} is not a SHA-256 digest.")
+    return raw
+
+
+def file_digest(path, like=None):
+    """Hex SHA-256 of a file's contents (decrypted, given the protected file `like`), read in CHUNK_SIZE pieces."""
+    sha = hashlib.sha256()
+    with secure_store.open(path, "rb", like=like) as source:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class DocumentStore:
+    """Receipts and other supporting files, stored once each under their SHA-256.
+
+    add() copies a file into the store while hashing it, one chunk at a
+    time, so a large PDF is read once and never held in memory; a file
+    already in the store is dropped again and costs no space. Blobs are
+    never changed once written. The SQLite index records each blob's size
+    and which ledger rows, invoices or other (target, key) pairs it is
+    linked to.
+
+    Blobs are encrypted whenever the file `like` (the ledger) is; see
+    secure_store.write_file(). Their names are still the digests of the
+    plaintext, and open() decrypts.
+    """
+
+    def __init__(self, root, index_path, workers=DEFAULT_WORKERS, like=None):
+        self.root = root
+        self.index_path = index_path
+        self.workers = workers
+        self.like = like
+        self.objects_dir = os.path.join(root, "objects")
+        self.temp_dir = os.path.join(root, "tmp")
+        self.lock = threading.Lock()
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            directory = os.path.dirname(self.index_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.index_path, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def close(self):
+        with self.lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def path_of(self, digest):
+        check_digest(digest)
+        digest = digest.lower()
+        shards = [digest[2 * level : 2 * level + 2] for level in range(SHARD_LEVELS)]
+        return os.path.join(self.objects_dir, *shards, digest)
+
+    def add(self, path):
+        """Store a file; returns its hex digest. Adding the same content twice stores it once."""
+        os.makedirs(self.temp_dir, exist_ok=True)
+        sha = hashlib.sha256()
+        size = 0
+
+        def hashed(source):
+            nonlocal size
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                sha.update(chunk)
+                size += len(chunk)
+                yield chunk
+
+        # Written beside the objects so the final move is a rename on the same filesystem
+        descriptor, temp_path = tempfile.mkstemp(dir=self.temp_dir)
+        os.close(descriptor)
+        try:
+            with open(path, "rb") as source:
+                secure_store.write_file(temp_path, hashed(source), like=self.like or temp_path)
+            digest = sha.hexdigest()
+            blob_path = self.path_of(digest)
+            if os.path.exists(blob_path):
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(temp_path, blob_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR IGNORE INTO blobs (digest, size) VALUES (?, ?)", (sha.digest(), size))
+        return digest
+
+    def add_many(self, paths):
+        """Store many files, hashed side by side on worker threads (hashlib lets go of the GIL).
+
+        Returns ({path: digest}, {path: error message}); one unreadable
+        file does not stop the rest.
+        """
+        paths = list(dict.fromkeys(paths))
+        added, failed = {}, {}
+        with concurrent.futures.ThreadPoolExecutor(max(self.workers, 1), thread_name_prefix="docstore") as pool:
+            futures = {pool.submit(self.add, path): path for path in paths}
+            for future in concurrent.futures.as_completed(futures):
+                path = futures[future]
+                try:
+                    added[path] = future.result()
+                except OSError as exc:
+                    failed[path] = str(exc)
+        return added, failed
+
+    def has(self, digest):
+        with self.lock:
+            row = self.connection.execute("SELECT 1 FROM blobs WHERE digest = ?", (check_digest(digest),)).fetchone()
+        return row is not None
+
+    def open(self, digest):
+        """The blob, opened for binary reading (and decrypted if it is encrypted)."""
+        return secure_store.open(self.path_of(digest), "rb", like=self.like)
+
+    def verify(self, digest):
+        """True when the blob on disk still hashes to its name."""
+        path = self.path_of(digest)
+        return os.path.exists(path) and file_digest(path, self.like) == digest.lower()
+
+    def link(self, target, key, digest, name=""):
+        """Attach a stored blob to (target, key), e.g. ("ledger", row id) or ("invoice", invoice number)."""
+        raw = check_digest(digest)
+        with self.lock, self.connection:
+            if self.connection.execute("SELECT 1 FROM blobs WHERE digest = ?", (raw,)).fetchone() is None:
+                raise ValueError(f"{digest} is not in the document store.")
+            self.connection.execute(
+                "INSERT OR IGNORE INTO links (target, key, digest, name) VALUES (?, ?, ?, ?)", (target, str(key), raw, name)
+            )
+
+    def link_many(self, links):
+        """link() for many (target, key, digest, name) tuples in one transaction."""
+        rows = [(target, str(key), check_digest(digest), name) for target, key, digest, name in links]
+        with self.lock, self.connection:
+            self.connection.executemany("INSERT OR IGNORE INTO links (target, key, digest, name) VALUES (?, ?, ?, ?)", rows)
+
+    def unlink(self, target, key, digest):
+        """Detach a blob; returns True if it was attached. The blob stays until prune()."""
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                "DELETE FROM links WHERE target = ? AND key = ? AND digest = ?", (target, str(key), check_digest(digest))
+            )
+        return cursor.rowcount > 0
+
+    def attachments(self, target, key):
+        """[{"digest", "name", "size", "added", "path"}] attached to (target, key), oldest first.
+
+        With encryption on, "path" holds ciphertext; read the blob through open().
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT links.digest, links.name, blobs.size, links.added FROM links JOIN blobs USING (digest) "
+                "WHERE target = ? AND key = ? ORDER BY links.added, links.name",
+                (target, str(key)),
+            ).fetchall()
+        return [dict(row, digest=row["digest"].hex(), path=self.path_of(row["digest"].hex())) for row in rows]
+
+    def linked_to(self, digest):
+        """[(target, key, name)] a blob is attached to."""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT target, key, name FROM links WHERE digest = ? ORDER BY target, key", (check_digest(digest),)
+            ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def keys(self, target):
+        """Every key of a target that has something attached."""
+        with self.lock:
+            rows = self.connection.execute("SELECT DISTINCT key FROM links WHERE target = ?", (target,)).fetchall()
+        return [row[0] for row in rows]
+
+    def rekey(self, target, mapping):
+        """Move attachments from old to new keys ({old: new}), e.g. after row ids change."""
+        moves = [(str(new), target, str(old)) for old, new in mapping.items() if new is not None and new != old]
+        with self.lock, self.connection:
+            # OR REPLACE: a blob already attached under the new key is simply kept once
+            self.connection.executemany("UPDATE OR REPLACE links SET key = ? WHERE target = ? AND key = ?", moves)
+        return len(moves)
+
+    def prune(self):
+        """Delete blobs nothing is attached to; returns the bytes freed. Run it while nothing is being added."""
+        with self.lock, self.connection:
+            rows = self.connection.execute(
+                "SELECT digest, size FROM blobs WHERE NOT EXISTS (SELECT 1 FROM links WHERE links.digest = blobs.digest)"
+            ).fetchall()
+            self.connection.executemany("DELETE FROM blobs WHERE digest = ?", [(row["digest"],) for row in rows])
+        freed = 0
+        for row in rows:
+            try:
+                os.remove(self.path_of(row["digest"].hex()))
+            except FileNotFoundError:
+                continue
+            freed += row["size"]
+        return freed
+
+    def stats(self):
+        with self.lock:
+            blobs, size = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+            links = self.connection.execute("SELECT COUNT(*) FROM links").fetchone()[0]
+        return {"blobs": blobs, "bytes": size, "links": links}
@@ -0,0 +1,168 @@
+import csv
+import decimal
+import os
+
+
+PAISE = decimal.Decimal("0.01")
+RUPEE = decimal.Decimal("1")
+HUNDRED = decimal.Decimal("100")
+ZERO = decimal.Decimal("0")
+
+# A starter set of HSN/SAC prefixes; extend or override it with a gstRates.csv (code,rate[,description])
+DEFAULT_RATES = {
+    "9954": "18",  # construction services
+    "9971": "18",  # financial and related services
+    "9973": "18",  # leasing and rental services
+    "9983": "18",  # other professional, technical and business services
+    "998311": "18",  # management consulting
+    "998313": "18",  # IT consulting and support
+    "998314": "18",  # IT design and development
+    "998361": "18",  # advertising services
+    "998391": "18",  # specialty design services
+    "9984": "18",  # telecommunications and information services
+    "9985": "18",  # support services
+    "9987": "18",  # maintenance and repair services
+    "9997": "18",  # other services
+    "4901": "0",  # printed books
+}
+
+
+def to_decimal(value):
+    try:
+        return decimal.Decimal(str(value or "0").strip().replace("₹", "").replace(",", "").rstrip("%") or "0")
+    except decimal.InvalidOperation:
+        raise ValueError(f"{value!r} is not a number.")
+
+
+def parse_amount(value):
+    """Like to_decimal() for an amount already on an invoice ("₹1,234.50"), but blanks and junk count as zero."""
+    try:
+        return to_decimal(value)
+    except ValueError:
+        return ZERO
+
+
+def to_paise(value):
+    return value.quantize(PAISE, rounding=decimal.ROUND_HALF_UP)
+
+
+class GstRateTable:
+    """HSN/SAC code to GST rate, matched on the longest known prefix of the code."""
+
+    def __init__(self, rates=None):
+        self.rates = {code: decimal.Decimal(rate) for code, rate in (rates or DEFAULT_RATES).items()}
+        self._cache = {}
+
+    @classmethod
+    def load(cls, path):
+        rates = dict(DEFAULT_RATES)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8", newline="") as rates_file:
+                for row in csv.reader(rates_file):
+                    if len(row) >= 2 and row[0].strip().isdigit():
+                        rates[row[0].strip()] = row[1].strip().rstrip("%")
+        return cls(rates)
+
+    def lookup(self, code):
+        code = "".join(ch for ch in str(code or "") if ch.isdigit())
+        if not code:
+            return None
+        if code not in self._cache:
+            rate = None
+            for length in range(len(code), 1, -1):
+                rate = self.rates.get(code[:length])
+                if rate is not None:
+                    break
+            self._cache[code] = rate
+        return self._cache[code]
+
+
+def normalize_state(state):
+    return " ".join(str(state or "").split()).casefold()
+
+
+def is_inter_state(supplier_state, place_of_supply):
+    """IGST applies when supply crosses state lines; unknown states are treated as intra-state."""
+    supplier, supply = normalize_state(supplier_state), normalize_state(place_of_supply)
+    return bool(supplier and supply and supplier != supply)
+
+
+def line_tax(quantity, price, rate, inter_state):
+    """Taxable value and CGST/SGST/IGST for one line, each rounded to the paisa."""
+    taxable = to_paise(quantity * price)
+    if inter_state:
+        igst = to_paise(taxable * rate / HUNDRED)
+        cgst = sgst = ZERO
+    else:
+        cgst = sgst = to_paise(taxable * rate / HUNDRED / 2)
+        igst = ZERO
+    return taxable, cgst, sgst, igst
+
+
+def compute_invoice_tax(items, supplier_state="", place_of_supply="", rate_table=None, round_total=False):
+    """Tax every line and summarise by rate slab in a single pass over items.
+
+    A line's rate is its "tax" value when given, otherwise the rate for its
+    "hsn" code. Returns {"lines", "slabs", "totals"} with Decimal amounts;
+    with round_total the grand total is rounded to the rupee and the
+    difference reported as totals["round_off"].
+    """
+    inter_state = is_inter_state(supplier_state, place_of_supply)
+    lines = []
+    slabs = {}
+    taxable_total = cgst_total = sgst_total = igst_total = ZERO
+    for item in items:
+        quantity = to_decimal(item.get("quantity"))
+        price = to_decimal(item.get("price"))
+        if str(item.get("tax") or "").strip():
+            rate = to_decimal(item.get("tax"))
+        else:
+            rate = (rate_table.lookup(item.get("hsn")) if rate_table else None) or ZERO
+        taxable, cgst, sgst, igst = line_tax(quantity, price, rate, inter_state)
+        amount = taxable + cgst + sgst + igst
+        lines.append({"taxable": taxable, "rate": rate, "cgst": cgst, "sgst": sgst, "igst": igst, "amount": amount})
+        slab = slabs.get(rate)
+        if slab is None:
+            slab = slabs[rate] = {"taxable": ZERO, "cgst": ZERO, "sgst": ZERO, "igst": ZERO}
+        slab["taxable"] += taxable
+        slab["cgst"] += cgst
+        slab["sgst"] += sgst
+        slab["igst"] += igst
+        taxable_total += taxable
+        cgst_total += cgst
+        sgst_total += sgst
+        igst_total += igst
+
+    tax_total = cgst_total + sgst_total + igst_total
+    total = taxable_total + tax_total
+    round_off = ZERO
+    if round_total:
+        rounded = total.quantize(RUPEE, rounding=decimal.ROUND_HALF_UP)
+        round_off, total = rounded - total, rounded
+    return {
+        "lines": lines,
+        "slabs": dict(sorted(slabs.items())),
+        "totals": {
+            "taxable": taxable_total,
+            "cgst": cgst_total,
+            "sgst": sgst_total,
+            "igst": igst_total,
+            "tax": tax_total,
+            "round_off": round_off,
+            "total": total,
+            "inter_state": inter_state,
+        },
+    }
+
+
+def tax_summary_text(totals):
+    """One-line breakdown such as "Taxable ₹1,000.00 + CGST ₹90.00 + SGST ₹90.00"."""
+    parts = [f"Taxable ₹{totals['taxable']:,.2f}"]
+    if totals["inter_state"]:
+        parts.append(f"IGST ₹{totals['igst']:,.2f}")
+    else:
+        parts.append(f"CGST ₹{totals['cgst']:,.2f}")
+        parts.append(f"SGST ₹{totals['sgst']:,.2f}")
+    if totals["round_off"]:
+        parts.append(f"Round off ₹{totals['round_off']:,.2f}")
+    return " + ".join(parts)
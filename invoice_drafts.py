@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+
+import secure_store
+
+
+COMPACT_EVERY = 200
+
+
+def diff_items(old_items, new_items):
+    """Describe new_items as one splice of old_items: (start, delete_count, inserted)."""
+    limit = min(len(old_items), len(new_items))
+    start = 0
+    while start < limit and old_items[start] == new_items[start]:
+        start += 1
+    old_end, new_end = len(old_items), len(new_items)
+    while old_end > start and new_end > start and old_items[old_end - 1] == new_items[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+    if start == old_end and start == new_end:
+        return None
+    return start, old_end - start, new_items[start:new_end]
+
+
+class DraftStore:
+    """Persist the in-progress invoice as an append-only delta log.
+
+    The first record is a full snapshot; every save after that appends only
+    the fields that changed and a single splice describing how the item list
+    changed. Once the log holds COMPACT_EVERY deltas it is rewritten as one
+    snapshot.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.fields = {}
+        self.items = []
+        self.delta_count = 0
+
+    def load(self):
+        """Replay the log and return (fields, items), or None when there is no draft."""
+        with self.lock:
+            self.fields, self.items, self.delta_count = {}, [], 0
+            if not os.path.exists(self.path):
+                return None
+            with secure_store.open(self.path, "r", encoding="utf-8") as log_file:
+                for line in log_file:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # torn final write from a crash; keep what replayed cleanly
+                    if record["op"] == "snapshot":
+                        self.fields = dict(record["fields"])
+                        self.items = list(record["items"])
+                        self.delta_count = 0
+                    else:
+                        self.fields.update(record.get("fields", {}))
+                        if "splice" in record:
+                            start, delete_count, inserted = record["splice"]
+                            self.items[start : start + delete_count] = inserted
+                        self.delta_count += 1
+            if not self.fields and not self.items:
+                return None
+            return dict(self.fields), list(self.items)
+
+    def save(self, fields, items):
+        """Append whatever changed since the last save. Returns True if anything was written."""
+        with self.lock:
+            if not os.path.exists(self.path) and not any(fields.values()) and not items:
+                return False  # nothing typed yet, so there is no draft worth creating
+            changed = {key: value for key, value in fields.items() if self.fields.get(key) != value}
+            splice = diff_items(self.items, items)
+            if not changed and splice is None:
+                return False
+            self.fields.update(changed)
+            if splice is not None:
+                start, delete_count, inserted = splice
+                self.items[start : start + delete_count] = inserted
+            if self.delta_count >= COMPACT_EVERY or not os.path.exists(self.path):
+                self._write_snapshot()
+                return True
+            record = {"op": "delta", "fields": changed}
+            if splice is not None:
+                record["splice"] = list(splice)
+            with secure_store.open(self.path, "a", encoding="utf-8") as log_file:
+                log_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.delta_count += 1
+            return True
+
+    def _write_snapshot(self):
+        temp_path = self.path + ".tmp"
+        record = {"op": "snapshot", "fields": self.fields, "items": self.items}
+        secure_store.write_file(temp_path, [(json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")], like=self.path)
+        os.replace(temp_path, self.path)
+        self.delta_count = 0
+
+    def compact(self):
+        with self.lock:
+            if os.path.exists(self.path):
+                self._write_snapshot()
+
+    def discard(self, backup_path=None):
+        """Drop the draft, optionally keeping the log at backup_path so it can be restored.
+
+        With no draft to keep, an older backup is removed too, so a restore
+        never brings back an invoice from before this one.
+        """
+        with self.lock:
+            if os.path.exists(self.path):
+                if backup_path:
+                    os.replace(self.path, backup_path)
+                else:
+                    os.remove(self.path)
+            elif backup_path and os.path.exists(backup_path):
+                os.remove(backup_path)
+            self.fields, self.items, self.delta_count = {}, [], 0
@@ -0,0 +1,114 @@
+import csv
+import datetime as dt
+import json
+import os
+import re
+import threading
+
+import secure_store
+
+
+SEQ_PATTERN = re.compile(r"\{seq(?::(\d+))?\}")
+
+
+def format_invoice_number(pattern, seq, date):
+    """Expand {YYYY}, {YY}, {MM}, {DD} and {seq} / {seq:04} in an invoice number pattern."""
+    number = pattern.replace("{YYYY}", f"{date.year:04d}").replace("{YY}", f"{date.year % 100:02d}")
+    number = number.replace("{MM}", f"{date.month:02d}").replace("{DD}", f"{date.day:02d}")
+    return SEQ_PATTERN.sub(lambda match: str(seq).zfill(int(match.group(1) or 0)), number)
+
+
+def sequence_key(pattern, date):
+    """Counter name for a pattern: the date-expanded pattern, so {YYYY} patterns restart every year."""
+    return format_invoice_number(SEQ_PATTERN.sub("{seq}", pattern), "{seq}", date)
+
+
+class InvoiceNumberAllocator:
+    """Hand out invoice numbers from a persisted, lock-protected counter file.
+
+    Numbers already present in invoice history (e.g. typed in by hand) are
+    skipped; history is read once into a set and kept current through
+    mark_used().
+    """
+
+    def __init__(self, counter_path, history_path, pattern):
+        self.counter_path = counter_path
+        self.history_path = history_path
+        self.pattern = pattern
+        self.thread_lock = threading.Lock()
+        self._used = None
+
+    @property
+    def used(self):
+        if self._used is None:
+            used = set()
+            if os.path.exists(self.history_path):
+                with secure_store.open(self.history_path, "r", encoding="utf-8", newline="") as history_file:
+                    for row in csv.reader(history_file):
+                        if row and row[0] != "invoiceNumber":
+                            used.add(row[0])
+            self._used = used
+        return self._used
+
+    def is_used(self, invoice_number):
+        return invoice_number in self.used
+
+    def mark_used(self, invoice_number):
+        if invoice_number:
+            self.used.add(invoice_number)
+
+    def _read_counters(self):
+        if not os.path.exists(self.counter_path):
+            return {}
+        with open(self.counter_path, "r", encoding="utf-8") as counter_file:
+            try:
+                return json.load(counter_file)
+            except json.JSONDecodeError:
+                return {}
+
+    def _write_counters(self, counters):
+        temp_path = self.counter_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as counter_file:
+            json.dump(counters, counter_file, indent=2, sort_keys=True)
+        os.replace(temp_path, self.counter_path)
+
+    def reserve(self, count, date=None):
+        """Atomically claim the next count unused numbers, e.g. for one batch worker."""
+        if count < 1:
+            raise ValueError("count must be at least 1.")
+        date = date or dt.date.today()
+        key = sequence_key(self.pattern, date)
+        numbers = []
+        with self.thread_lock, secure_store.file_lock(self.counter_path + ".lock"):
+            counters = self._read_counters()
+            seq = counters.get(key, 0)
+            while len(numbers) < count:
+                seq += 1
+                number = format_invoice_number(self.pattern, seq, date)
+                if number not in self.used:
+                    numbers.append(number)
+            counters[key] = seq
+            self._write_counters(counters)
+            self.used.update(numbers)
+        return numbers
+
+    def allocate(self, date=None):
+        return self.reserve(1, date)[0]
+
+    def release(self, invoice_number, date=None):
+        """Give back a number from allocate() that no invoice was built with.
+
+        Only the last number handed out for its sequence can go back, so
+        nothing is renumbered; returns True if it went back.
+        """
+        date = date or dt.date.today()
+        key = sequence_key(self.pattern, date)
+        with self.thread_lock, secure_store.file_lock(self.counter_path + ".lock"):
+            counters = self._read_counters()
+            seq = counters.get(key, 0)
+            if not seq or format_invoice_number(self.pattern, seq, date) != invoice_number:
+                return False
+            counters[key] = seq - 1
+            self._write_counters(counters)
+            self.used.discard(invoice_number)
+        return True
@@ -0,0 +1,90 @@
+import datetime as dt
+import os
+import re
+import shutil
+import tempfile
+
+
+OUTPUT_LAYOUTS = ("flat", "month", "client")
+INVOICE_DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%m/%d/%y"]
+TMPFS_CANDIDATES = ["/dev/shm", os.environ.get("XDG_RUNTIME_DIR", "")]
+
+
+def slugify(value):
+    return re.sub(r"[^\w\-]+", "_", str(value or "")).strip("_") or "unknown"
+
+
+def parse_invoice_date(value):
+    """The date an invoice date string names, or None if it is in none of the known formats."""
+    value = str(value or "").strip()
+    try:
+        return dt.date.fromisoformat(value)
+    except ValueError:
+        pass
+    for fmt in INVOICE_DATE_FORMATS:
+        try:
+            return dt.datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def invoice_date(fields):
+    """Date of an invoice being issued; today if its form has no readable date.
+
+    Rows read back from the history should use parse_invoice_date() and deal
+    with None themselves, rather than be counted as issued today.
+    """
+    return parse_invoice_date(fields.get("invoiceDate")) or dt.date.today()
+
+
+def output_dir_for(fields, layout, root):
+    """Directory an invoice's .tex/.pdf belong in: root, root/YYYY/MM, or root/<client>."""
+    if layout == "flat":
+        directory = root
+    elif layout == "month":
+        date = invoice_date(fields)
+        directory = os.path.join(root, f"{date.year:04d}", f"{date.month:02d}")
+    elif layout == "client":
+        directory = os.path.join(root, slugify(fields.get("billToName")))
+    else:
+        raise ValueError(f"Unknown invoice output layout {layout!r}; expected one of {', '.join(OUTPUT_LAYOUTS)}.")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def build_root():
+    """A RAM-backed scratch directory when the OS offers one, otherwise the normal temp dir."""
+    for candidate in TMPFS_CANDIDATES:
+        if candidate and os.path.isdir(candidate) and os.access(candidate, os.W_OK | os.X_OK):
+            return candidate
+    return tempfile.gettempdir()
+
+
+def make_build_dir():
+    return tempfile.mkdtemp(prefix="invoice-build-", dir=build_root())
+
+
+def remove_build_dir(build_dir):
+    shutil.rmtree(build_dir, ignore_errors=True)
+
+
+def keep_failure_log(log_path, log_dir, keep, name=None):
+    """Copy a failed build's .log into log_dir, keeping only the newest `keep` logs there."""
+    if not os.path.exists(log_path) or keep <= 0:
+        return None
+    os.makedirs(log_dir, exist_ok=True)
+    target = os.path.join(log_dir, name or os.path.basename(log_path))
+    shutil.copyfile(log_path, target)
+    with os.scandir(log_dir) as entries:
+        logs = sorted(
+            (entry for entry in entries if entry.is_file() and entry.name.endswith(".log")),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True,
+        )
+    for entry in logs[keep:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+    return target
@@ -0,0 +1,303 @@
+import decimal
+import zlib
+
+import gst
+
+
+PAGE_WIDTH, PAGE_HEIGHT = 595.28, 841.89  # A4 in points
+MARGIN = 51.02  # 18mm, same as invoiceTemplate.tex
+CONTENT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+
+PRIMARY_BLUE = (0x2E / 255, 0x78 / 255, 0xB4 / 255)
+ACCENT_BLUE = (0xE8 / 255, 0xF4 / 255, 0xFB / 255)
+FOOTER_GRAY = (0.45, 0.45, 0.45)
+WHITE = (1, 1, 1)
+BLACK = (0, 0, 0)
+
+# The standard 14 fonts have no rupee glyph
+CURRENCY = "Rs. "
+
+# Advance widths (1/1000 em) for ASCII 32..126 from the Adobe core font metrics
+HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+HELVETICA_BOLD_WIDTHS = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+]
+
+# Items table columns: (heading, key, width or None for the flexible one, alignment)
+ITEM_COLUMNS = [
+    ("ITEMS", "itemName", 110, "left"),
+    ("DESCRIPTION", "description", None, "left"),
+    ("QUANTITY", "quantity", 58, "right"),
+    ("PRICE", "price", 70, "right"),
+    ("TAX", "tax", 42, "right"),
+    ("AMOUNT", "amount", 78, "right"),
+]
+ROW_HEIGHT = 16
+SUMMARY_HEIGHT = 120  # notes and total boxes
+FOOTER_HEIGHT = 30
+
+
+def clean_text(value):
+    return str(value or "").replace("₹", CURRENCY).replace("\\%", "%")
+
+
+def text_width(text, size, bold=False):
+    widths = HELVETICA_BOLD_WIDTHS if bold else HELVETICA_WIDTHS
+    total = 0
+    for char in text:
+        code = ord(char)
+        total += widths[code - 32] if 32 <= code <= 126 else 556
+    return total * size / 1000
+
+
+def fit_text(text, width, size, bold=False):
+    """Trim text with an ellipsis so it fits in width."""
+    if text_width(text, size, bold) <= width:
+        return text
+    while text and text_width(text + "...", size, bold) > width:
+        text = text[:-1]
+    return text + "..."
+
+
+def wrap_text(text, width, size, bold=False):
+    lines = []
+    for paragraph in text.splitlines() or [""]:
+        line = ""
+        for word in paragraph.split():
+            candidate = f"{line} {word}" if line else word
+            if text_width(candidate, size, bold) <= width:
+                line = candidate
+            else:
+                if line:
+                    lines.append(line)
+                line = fit_text(word, width, size, bold)
+        lines.append(line)
+    return lines
+
+
+def pdf_string(text):
+    data = text.encode("cp1252", "replace")
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+class PdfCanvas:
+    """Just enough of PDF to draw filled rectangles, rules and Helvetica text on A4 pages.
+
+    Each page is written to the file as soon as the next one starts, so only
+    one page of drawing operations is ever held in memory.
+    """
+
+    # Fixed object numbers; pages and their content streams are numbered from 5 up
+    CATALOG, PAGES, FONT_REGULAR, FONT_BOLD = 1, 2, 3, 4
+
+    def __init__(self, path):
+        self.pdf_file = open(path, "wb")
+        self.pdf_file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self.offsets = {}
+        self.page_numbers = []
+        self.next_number = 5
+        self.ops = []
+        self._write_object(self.FONT_REGULAR, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        self._write_object(self.FONT_BOLD, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+    def _write_object(self, number, body):
+        self.offsets[number] = self.pdf_file.tell()
+        self.pdf_file.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+
+    def _flush_page(self):
+        stream = zlib.compress(b"\n".join(self.ops))
+        content_number, page_number = self.next_number, self.next_number + 1
+        self.next_number += 2
+        self._write_object(content_number, b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(stream), stream))
+        self._write_object(
+            page_number,
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] "
+            b"/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> /Contents %d 0 R >>"
+            % (self.PAGES, PAGE_WIDTH, PAGE_HEIGHT, self.FONT_REGULAR, self.FONT_BOLD, content_number),
+        )
+        self.page_numbers.append(page_number)
+        self.ops = []
+
+    def new_page(self):
+        self._flush_page()
+
+    def rect(self, x, y, width, height, color):
+        self.ops.append(b"%.3f %.3f %.3f rg %.2f %.2f %.2f %.2f re f" % (*color, x, y, width, height))
+
+    def rule(self, x1, y1, x2, y2, width=0.5, color=BLACK):
+        self.ops.append(b"%.3f %.3f %.3f RG %.2f w %.2f %.2f m %.2f %.2f l S" % (*color, width, x1, y1, x2, y2))
+
+    def text(self, x, y, text, size, bold=False, color=BLACK, align="left"):
+        if align == "right":
+            x -= text_width(text, size, bold)
+        elif align == "center":
+            x -= text_width(text, size, bold) / 2
+        font = b"F2" if bold else b"F1"
+        self.ops.append(
+            b"BT %.3f %.3f %.3f rg /%s %.1f Tf %.2f %.2f Td %s Tj ET" % (*color, font, size, x, y, pdf_string(text))
+        )
+
+    def close(self):
+        self._flush_page()
+        kids = b" ".join(b"%d 0 R" % number for number in self.page_numbers)
+        self._write_object(self.PAGES, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.page_numbers)))
+        self._write_object(self.CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % self.PAGES)
+        xref_offset = self.pdf_file.tell()
+        size = self.next_number
+        self.pdf_file.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        for number in range(1, size):
+            self.pdf_file.write(b"%010d 00000 n \n" % self.offsets[number])
+        self.pdf_file.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, self.CATALOG, xref_offset))
+        self.pdf_file.close()
+
+
+def column_layout():
+    fixed = sum(width for _, _, width, _ in ITEM_COLUMNS if width)
+    layout, x = [], MARGIN
+    for heading, key, width, align in ITEM_COLUMNS:
+        width = width or CONTENT_WIDTH - fixed
+        layout.append((heading, key, x, width, align))
+        x += width
+    return layout
+
+
+def draw_header(canvas, fields, top):
+    height = 84
+    canvas.rect(MARGIN, top - height, CONTENT_WIDTH, height, PRIMARY_BLUE)
+    canvas.text(MARGIN + 12, top - 44, "Invoice", 28, bold=True, color=WHITE)
+    right = MARGIN + CONTENT_WIDTH - 12
+    y = top - 22
+    canvas.text(right, y, clean_text(fields.get("companyName")), 11, bold=True, color=WHITE, align="right")
+    for key in ("companyAddress", "companyCity", "companyCountry", "companyPostal"):
+        y -= 12
+        canvas.text(right, y, clean_text(fields.get(key)), 9, color=WHITE, align="right")
+    return top - height - 24
+
+
+def draw_bill_to(canvas, fields, y):
+    canvas.text(MARGIN, y, "Bill To", 11, bold=True)
+    canvas.text(MARGIN, y - 18, clean_text(fields.get("billToName")), 13)
+    line_y = y - 18
+    for key in ("billToAddress", "billToCity", "billToCountry", "billToPostal"):
+        line_y -= 12
+        canvas.text(MARGIN, line_y, clean_text(fields.get(key)), 9)
+
+    right = MARGIN + CONTENT_WIDTH
+    info_y = y
+    for label, key in (("Invoice #: ", "invoiceNumber"), ("Date: ", "invoiceDate"), ("Due Date: ", "invoiceDueDate")):
+        value = clean_text(fields.get(key))
+        canvas.text(right, info_y, value, 10, align="right")
+        canvas.text(right - text_width(value, 10), info_y, label, 10, bold=True, align="right")
+        info_y -= 18
+    y = min(line_y, info_y) - 12
+    canvas.rule(MARGIN, y, MARGIN + CONTENT_WIDTH, y, 0.4)
+    return y - 14
+
+
+def draw_table_header(canvas, columns, y):
+    canvas.rule(MARGIN, y, MARGIN + CONTENT_WIDTH, y, 0.8)
+    y -= 13
+    for heading, _, x, width, align in columns:
+        canvas.text(x + width - 3 if align == "right" else x + 3, y, heading, 8.5, bold=True, align=align)
+    y -= 6
+    canvas.rule(MARGIN, y, MARGIN + CONTENT_WIDTH, y, 0.5)
+    return y - ROW_HEIGHT + 4
+
+
+def item_cell(item, key):
+    value = clean_text(item.get(key))
+    if key in ("price", "amount") and value and not value.startswith(CURRENCY):
+        return CURRENCY + value
+    if key == "tax" and value and not value.endswith("%"):
+        return value + "%"
+    return value
+
+
+def draw_summary(canvas, fields, y):
+    notes_width = CONTENT_WIDTH * 0.65
+    total_width = CONTENT_WIDTH * 0.32
+    notes = wrap_text(clean_text(fields.get("notesText")), notes_width - 16, 9)[:6]
+    notes_height = 34 + 12 * len(notes)
+    canvas.rect(MARGIN, y - notes_height, notes_width, notes_height, ACCENT_BLUE)
+    canvas.text(MARGIN + 8, y - 16, "Notes", 10, bold=True)
+    for index, line in enumerate(notes):
+        canvas.text(MARGIN + 8, y - 32 - 12 * index, line, 9)
+
+    total_x = MARGIN + CONTENT_WIDTH - total_width
+    canvas.rect(total_x, y - 78, total_width, 78, PRIMARY_BLUE)
+    center = total_x + total_width / 2
+    canvas.text(center, y - 24, "Total", 11, bold=True, color=WHITE, align="center")
+    amount = fit_text(clean_text(fields.get("totalAmount")), total_width - 12, 20, bold=True)
+    canvas.text(center, y - 56, amount, 20, bold=True, color=WHITE, align="center")
+    for index, line in enumerate(wrap_text(clean_text(fields.get("taxSummary")), total_width - 12, 6.5)[:2]):
+        canvas.text(center, y - 68 - 7 * index, line, 6.5, color=WHITE, align="center")
+
+
+def draw_footer(canvas):
+    center = PAGE_WIDTH / 2
+    canvas.text(center, MARGIN + 10, "Powered by Wave", 8, color=FOOTER_GRAY, align="center")
+    canvas.text(center, MARGIN, "To learn more, visit waveapps.com", 6, color=FOOTER_GRAY, align="center")
+
+
+def draw_page_subtotal(canvas, columns, y, subtotal):
+    y += ROW_HEIGHT - 8
+    canvas.rule(MARGIN, y, MARGIN + CONTENT_WIDTH, y, 0.5)
+    _, _, x, width, _ = columns[-1]
+    canvas.text(x - 6, y - 12, "Page subtotal", 9, bold=True, align="right")
+    canvas.text(x + width - 3, y - 12, f"{CURRENCY}{subtotal:,.2f}", 9, align="right")
+
+
+def render_invoice_pdf(fields, items, pdf_path):
+    """Write the invoiceTemplate.tex layout straight to a PDF.
+
+    The items table breaks across pages with a repeated header and a page
+    subtotal on every page when it spans more than one.
+    """
+    canvas = PdfCanvas(pdf_path)
+    try:
+        columns = column_layout()
+        top = PAGE_HEIGHT - MARGIN
+        bottom = MARGIN + FOOTER_HEIGHT + 20  # room for a page subtotal line
+
+        y = draw_header(canvas, fields, top)
+        y = draw_bill_to(canvas, fields, y)
+        y = draw_table_header(canvas, columns, y)
+        rows = items or [{"itemName": "No items added"}]
+        page_subtotal = decimal.Decimal("0")
+        paged = False
+        for index, item in enumerate(rows):
+            # The last row must leave room for the notes and total boxes below it
+            reserve = SUMMARY_HEIGHT if index == len(rows) - 1 else 0
+            if y - reserve < bottom:
+                draw_page_subtotal(canvas, columns, y, page_subtotal)
+                draw_footer(canvas)
+                canvas.new_page()
+                y = draw_table_header(canvas, columns, top)
+                page_subtotal, paged = decimal.Decimal("0"), True
+            for _, key, x, width, align in columns:
+                text = fit_text(item_cell(item, key), width - 6, 9)
+                canvas.text(x + width - 3 if align == "right" else x + 3, y, text, 9, align=align)
+            page_subtotal += gst.parse_amount(item.get("amount"))
+            y -= ROW_HEIGHT
+        if paged:
+            draw_page_subtotal(canvas, columns, y, page_subtotal)
+            y -= 18
+        y += ROW_HEIGHT - 8
+        canvas.rule(MARGIN, y, MARGIN + CONTENT_WIDTH, y, 0.5)
+        draw_summary(canvas, fields, y - 18)
+        draw_footer(canvas)
+    finally:
+        canvas.close()
+    return pdf_path
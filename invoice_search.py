@@ -0,0 +1,306 @@
+import bisect
+import json
+import os
+import re
+import threading
+
+import audit
+import invoice_output
+import secure_store
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+NEWCOMMAND_PATTERN = re.compile(r"\\newcommand\{\\(\w+)\}\{([^\}]*)\}")
+ITEM_ROW_PATTERN = re.compile(r"^\{(.*?)\}&\{(.*?)\}&\{(.*?)\}&\{(.*?)\}&\{(.*?)\}&\{(.*?)\}\\\\$", re.MULTILINE)
+
+HISTORY_FIELDS = ["invoiceNumber", "invoiceDate", "billToName", "totalAmount", "filePath"]
+INDEXED_FIELDS = [
+    "invoiceNumber",
+    "invoiceDate",
+    "invoiceDueDate",
+    "billToName",
+    "billToAddress",
+    "billToCity",
+    "billToCountry",
+    "billToPostal",
+    "companyName",
+    "notesText",
+]
+INDEXED_ITEM_FIELDS = ["itemName", "description"]
+
+PREFIX_EXPANSION_LIMIT = 256
+FUZZY_MIN_LENGTH = 3
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(str(text or "").casefold())
+
+
+def date_tokens(value):
+    """Year and month tokens so queries like "march 2025" hit the invoice date."""
+    date = invoice_output.parse_invoice_date(value)
+    if date is None:
+        return []
+    return [str(date.year), date.strftime("%B").casefold(), date.strftime("%b").casefold(), date.strftime("%Y-%m")]
+
+
+def amount_tokens(value):
+    digits = str(value or "").replace("₹", "").replace(",", "").strip()
+    if not digits:
+        return []
+    tokens = [digits]
+    if "." in digits:
+        tokens.append(digits.split(".", 1)[0])
+    return tokens
+
+
+def invoice_tokens(fields, items):
+    tokens = set()
+    for key in INDEXED_FIELDS:
+        tokens.update(tokenize(fields.get(key)))
+    tokens.update(date_tokens(fields.get("invoiceDate")))
+    tokens.update(amount_tokens(fields.get("totalAmount")))
+    tokens.update(tokenize(fields.get("filePath")))
+    for item in items:
+        for key in INDEXED_ITEM_FIELDS:
+            tokens.update(tokenize(item.get(key)))
+    return tokens
+
+
+def sidecar_path(document_path):
+    return os.path.splitext(document_path)[0] + ".json"
+
+
+def write_invoice_sidecar(tex_path, fields, items, like=None):
+    """Save the invoice model next to its .tex so it can be indexed or reopened without parsing TeX.
+
+    It is encrypted when `like` (the invoice history) is; see secure_store.write_file().
+    """
+    path = sidecar_path(tex_path)
+    data = json.dumps({"fields": fields, "items": items}, ensure_ascii=False).encode("utf-8")
+    secure_store.write_file(path, [data], like=like or path)
+    return path
+
+
+def parse_invoice_tex(tex):
+    fields = {key: value for key, value in NEWCOMMAND_PATTERN.findall(tex)}
+    items = []
+    for name, description, quantity, price, tax, amount in ITEM_ROW_PATTERN.findall(tex):
+        if name == "No items added":
+            continue
+        items.append(
+            {
+                "itemName": name,
+                "description": description,
+                "quantity": quantity,
+                "price": price.lstrip("₹"),
+                "tax": tax.replace("\\%", ""),
+                "amount": amount.lstrip("₹"),
+            }
+        )
+    return fields, items
+
+
+def load_invoice_document(document_path, like=None):
+    """Return (fields, items) for an invoice from its JSON sidecar, falling back to the rendered .tex."""
+    json_path = sidecar_path(document_path)
+    if os.path.exists(json_path):
+        with secure_store.open(json_path, "r", encoding="utf-8", like=like) as sidecar_file:
+            data = json.load(sidecar_file)
+        return data.get("fields", {}), data.get("items", [])
+    tex_path = os.path.splitext(document_path)[0] + ".tex"
+    if os.path.exists(tex_path):
+        with open(tex_path, "r", encoding="utf-8", errors="ignore") as tex_file:
+            return parse_invoice_tex(tex_file.read())
+    return None
+
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance, giving up early once every cell in a row exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class InvoiceSearchIndex:
+    """Inverted index over invoice history, persisted as an append-only JSON lines log.
+
+    Each history row becomes one document. The log records the byte offset of
+    invoiceHistory.csv that has been indexed, so syncing only reads rows
+    appended since the last call. Voided and corrected rows are read as they
+    now stand, and any change to the history's audit trail reindexes it.
+    """
+
+    def __init__(self, index_path, history_path, base_dir):
+        self.index_path = index_path
+        self.history_path = history_path
+        self.base_dir = base_dir
+        self.lock = threading.Lock()
+        self.loaded = False
+        self._reset()
+
+    def _reset(self):
+        self.documents = []
+        self.postings = {}
+        self.vocabulary = []
+        # Tokens seen since the vocabulary was last sorted; merged in by the next prefix lookup
+        self.new_tokens = []
+        self.trigram_map = {}
+        self.by_number = {}
+        self.history_offset = 0
+        self.history_revision = 0
+
+    def _add_document(self, meta, tokens):
+        doc_id = len(self.documents)
+        self.documents.append(meta)
+        if meta.get("invoiceNumber"):
+            self.by_number[meta["invoiceNumber"]] = doc_id
+        for token in tokens:
+            postings = self.postings.get(token)
+            if postings is None:
+                self.postings[token] = [doc_id]
+                self.new_tokens.append(token)
+                for gram in trigrams(token):
+                    self.trigram_map.setdefault(gram, set()).add(token)
+            else:
+                postings.append(doc_id)
+        return doc_id
+
+    def load(self):
+        with self.lock:
+            self._reset()
+            rebuild = False
+            if os.path.exists(self.index_path):
+                with secure_store.open(self.index_path, "r", encoding="utf-8") as log_file:
+                    for line in log_file:
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            rebuild = True
+                            break
+                        self._add_document(entry["meta"], entry["tokens"])
+                        self.history_offset = entry["offset"]
+                        self.history_revision = entry.get("revision", 0)
+            history_size = secure_store.getsize(self.history_path) if os.path.exists(self.history_path) else 0
+            revision = audit.revision(self.history_path)
+            if rebuild or history_size < self.history_offset or revision != self.history_revision:
+                # Torn log write, or history rewritten or corrected underneath us; start over from the top.
+                self._reset()
+                self.history_revision = revision
+                secure_store.open(self.index_path, "w", encoding="utf-8").close()
+            self.loaded = True
+        self.sync()
+
+    def _resolve(self, file_path):
+        if not file_path or os.path.isabs(file_path):
+            return file_path
+        return os.path.join(self.base_dir, file_path)
+
+    def find_by_number(self, invoice_number):
+        """Latest history row recorded under invoice_number, or None."""
+        with self.lock:
+            doc_id = self.by_number.get(invoice_number)
+            return None if doc_id is None else dict(self.documents[doc_id])
+
+    def load_document(self, meta):
+        """(fields, items) for a history row, with the row's own values filling any gaps."""
+        document = load_invoice_document(self._resolve(meta["filePath"]), self.history_path) if meta.get("filePath") else None
+        fields, items = document if document else ({}, [])
+        merged = {key: value for key, value in meta.items() if key in HISTORY_FIELDS and key != "filePath"}
+        merged.update({key: value for key, value in fields.items() if value})
+        return merged, items
+
+    def sync(self):
+        """Index history rows appended since the last sync. Returns the number of new documents."""
+        if not self.loaded:
+            self.load()
+            return len(self.documents)
+        if not os.path.exists(self.history_path):
+            return 0
+        added = 0
+        with self.lock:
+            revision = audit.revision(self.history_path)
+            if revision != self.history_revision:
+                # An invoice was voided or corrected, or the history compacted: reindex from the top
+                self._reset()
+                self.history_revision = revision
+                secure_store.open(self.index_path, "w", encoding="utf-8").close()
+            entries = []
+            for _, values, offset in audit.rows(self.history_path, self.history_offset):
+                if not values or values == HISTORY_FIELDS:
+                    self.history_offset = offset
+                    continue
+                meta = dict(zip(HISTORY_FIELDS, values + [""] * (len(HISTORY_FIELDS) - len(values))))
+                document = load_invoice_document(self._resolve(meta["filePath"]), self.history_path) if meta["filePath"] else None
+                fields, items = document if document else ({}, [])
+                tokens = invoice_tokens(fields, items) | invoice_tokens(meta, [])
+                self._add_document(meta, tokens)
+                self.history_offset = offset
+                entries.append({"offset": offset, "revision": revision, "meta": meta, "tokens": sorted(tokens)})
+                added += 1
+            if entries:
+                with secure_store.open(self.index_path, "a", encoding="utf-8") as log_file:
+                    for entry in entries:
+                        log_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return added
+
+    def _expand(self, term, fuzzy):
+        """Map a query term to {token: weight} via exact, prefix and (if nothing else hits) fuzzy matching."""
+        matches = {}
+        if self.new_tokens:
+            # One sort for a whole load or sync rather than an insort per new token
+            self.vocabulary.extend(self.new_tokens)
+            self.vocabulary.sort()
+            self.new_tokens = []
+        start = bisect.bisect_left(self.vocabulary, term)
+        for token in self.vocabulary[start : start + PREFIX_EXPANSION_LIMIT]:
+            if not token.startswith(term):
+                break
+            matches[token] = 3 if token == term else 2
+        if matches or not fuzzy or len(term) < FUZZY_MIN_LENGTH:
+            return matches
+        limit = 1 if len(term) <= 5 else 2
+        candidates = set()
+        for gram in trigrams(term):
+            candidates.update(self.trigram_map.get(gram, ()))
+        for token in candidates:
+            if edit_distance(term, token, limit) <= limit:
+                matches[token] = 1
+        return matches
+
+    def search(self, query, limit=50, fuzzy=True):
+        """Return history rows matching every query term, best matches and most recent first."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self.lock:
+            scores = None
+            for term in terms:
+                term_scores = {}
+                for token, weight in self._expand(term, fuzzy).items():
+                    for doc_id in self.postings[token]:
+                        if term_scores.get(doc_id, 0) < weight:
+                            term_scores[doc_id] = weight
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {doc_id: score + term_scores[doc_id] for doc_id, score in scores.items() if doc_id in term_scores}
+                if not scores:
+                    return []
+            ranked = sorted(scores.items(), key=lambda pair: (-pair[1], -pair[0]))[:limit]
+            return [dict(self.documents[doc_id], score=score) for doc_id, score in ranked]
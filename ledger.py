@@ -0,0 +1,124 @@
+import datetime as dt
+import decimal
+
+import audit
+
+
+# Same grouping as printMoneyFlowChart
+INFLOW_CATEGORIES = [
+    "Sales Revenue",
+    "Customer Prepayments",
+    "Royalties & Licensing",
+    "Investment Returns",
+    "Grants & Subsidies",
+    "Financing Activities",
+    "Asset Liquidation",
+    "Affiliate/Referral",
+]
+NEEDS_CATEGORIES = [
+    "Rent & Utilities",
+    "Salaries & Wages",
+    "Software Licenses",
+    "Raw Materials / Inventory",
+    "Taxes & Compliance",
+    "Insurance",
+]
+WANTS_CATEGORIES = [
+    "Branding & Design",
+    "Team Retreats / Perks",
+    "Premium Tools",
+    "Marketing Campaigns",
+    "Office Decor / Furniture",
+]
+INVESTMENT_CATEGORIES = [
+    "R&D",
+    "Capital Expenditure",
+    "Hiring for Scale",
+    "Market Expansion",
+    "Training & Upskilling",
+    "Data Infrastructure",
+]
+CATEGORIES = INFLOW_CATEGORIES + NEEDS_CATEGORIES + WANTS_CATEGORIES + INVESTMENT_CATEGORIES
+CATEGORY_GROUPS = {
+    "Inflow": INFLOW_CATEGORIES,
+    "Needs": NEEDS_CATEGORIES,
+    "Wants": WANTS_CATEGORIES,
+    "Investments": INVESTMENT_CATEGORIES,
+}
+_GROUP_BY_CATEGORY = {category: group for group, members in CATEGORY_GROUPS.items() for category in members}
+
+HEADER_FIRST_CELLS = {"dateTime", "timestamp"}
+TIMESTAMP_FORMATS = ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M", "%Y-%m-%d"]
+
+
+def category_group(category):
+    """Inflow, Needs, Wants or Investments; anything else is "Other Income" or "Other Expenses"."""
+    group = _GROUP_BY_CATEGORY.get(category)
+    if group:
+        return group
+    return "Other Income" if "income" in category.casefold() else "Other Expenses"
+
+
+def is_inflow(category):
+    return category_group(category) in ("Inflow", "Other Income")
+
+
+def parse_timestamp(value):
+    value = value.strip()
+    try:
+        return dt.datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            return dt.datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_ledger_row(row):
+    """Normalise a moneyFlow.csv row, or None for headers and junk.
+
+    The file mixes the original dateTime,transactionCategory,transactionAmount
+    rows with the timestamp,amount,category,note rows written by
+    write_money_flow_entry and moneyMonitor.
+    """
+    if len(row) < 3 or row[0] in HEADER_FIRST_CELLS:
+        return None
+    timestamp = parse_timestamp(row[0])
+    if timestamp is None:
+        return None
+    if len(row) == 3:
+        category, amount, note = row[1], row[2], ""
+    else:
+        amount, category, note = row[1], row[2], ",".join(row[3:])
+    try:
+        amount = decimal.Decimal(amount.strip().replace(",", ""))
+    except decimal.InvalidOperation:
+        return None
+    return {"timestamp": timestamp, "category": category.strip(), "amount": amount, "note": note.strip()}
+
+
+def iter_csv_rows_from(path, offset=0):
+    """Yield (row, end_offset) for complete CSV rows starting at byte offset, voids and corrections applied."""
+    for _, row, end in audit.rows(path, offset):
+        yield row, end
+
+
+def read_ledger(path):
+    """Every entry in the ledger, streamed, with voids and corrections applied."""
+    for row in audit.current_rows(path):
+        entry = parse_ledger_row(row)
+        if entry is not None:
+            yield entry
+
+
+def financial_year(date):
+    """Indian financial year label (April to March), e.g. "2025-26"."""
+    start = date.year if date.month >= 4 else date.year - 1
+    return f"{start}-{(start + 1) % 100:02d}"
+
+
+def financial_year_start(label):
+    return dt.date(int(label[:4]), 4, 1)
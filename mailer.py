@@ -0,0 +1,352 @@
+import contextlib
+import email.header
+import email.mime.application
+import email.mime.multipart
+import email.mime.text
+import email.utils
+import os
+import queue
+import random
+import smtplib
+import socket
+import sqlite3
+import threading
+import time
+
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 30.0
+RETRY_MAX_DELAY = 3600.0
+# A pooled session idle for longer than this is checked with NOOP before reuse
+SESSION_CHECK_AFTER = 30.0
+# The worker hangs up once the queue has been empty this long
+SESSION_IDLE_CLOSE = 60.0
+# A message claimed for sending ('sending') goes back in the queue if it is still unsent this
+# long after, e.g. because the process sending it died
+SEND_LEASE = 600.0
+# Transient trouble: retried with backoff. Anything else from the server is final.
+TRANSIENT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, socket.timeout, ConnectionError)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outgoing (
+    id INTEGER PRIMARY KEY,
+    recipient TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    attachment TEXT NOT NULL DEFAULT '',
+    invoice_number TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    last_error TEXT NOT NULL DEFAULT '',
+    created TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    sent TEXT
+);
+CREATE INDEX IF NOT EXISTS outgoing_due ON outgoing (status, next_attempt);
+"""
+
+
+class SmtpPool:
+    """Reusable SMTP sessions, connected and logged in once and handed out again after each use.
+
+    A session that has sat idle is checked with NOOP before it is reused,
+    and one the server dropped is replaced transparently.
+    """
+
+    def __init__(self, host, port=587, username="", password="", starttls=True, use_ssl=False, size=1, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+        self.connects = 0
+
+    def _connect(self):
+        if self.use_ssl:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                smtp.starttls()
+        if self.username:
+            smtp.login(self.username, self.password)
+        self.connects += 1
+        return smtp
+
+    def _alive(self, smtp):
+        try:
+            return smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    @contextlib.contextmanager
+    def session(self):
+        """An open session; it goes back to the pool afterwards unless the connection failed."""
+        with self.slots:
+            smtp = None
+            try:
+                smtp, last_used = self.idle.get_nowait()
+                if time.monotonic() - last_used > SESSION_CHECK_AFTER and not self._alive(smtp):
+                    self._quit(smtp)
+                    smtp = None
+            except queue.Empty:
+                pass
+            if smtp is None:
+                smtp = self._connect()
+            healthy = True
+            try:
+                yield smtp
+            except TRANSIENT_ERRORS:
+                healthy = False
+                raise
+            finally:
+                if healthy:
+                    self.idle.put((smtp, time.monotonic()))
+                else:
+                    self._quit(smtp)
+
+    def _quit(self, smtp):
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+    def close(self):
+        while True:
+            try:
+                smtp, _ = self.idle.get_nowait()
+            except queue.Empty:
+                return
+            self._quit(smtp)
+
+
+class RateLimiter:
+    """Token bucket: `rate` messages per minute on average, bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=None):
+        self.interval = 60.0 / rate if rate else 0.0
+        self.capacity = burst or max(1, int(rate // 6) or 1)
+        self.tokens = float(self.capacity)
+        self.stamp = time.monotonic()
+
+    def wait_time(self):
+        if not self.interval:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) / self.interval)
+        self.stamp = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) * self.interval
+
+    def take(self):
+        if self.interval:
+            self.tokens -= 1
+
+
+def build_message(sender, row):
+    """The message as bytes. The compat32 MIME classes are used because the default
+    email policy re-parses every header and costs several times more per message."""
+    message = email.mime.multipart.MIMEMultipart()
+    message["From"] = sender
+    message["To"] = row["recipient"]
+    message["Subject"] = email.header.Header(row["subject"], "us-ascii" if row["subject"].isascii() else "utf-8").encode()
+    message["Date"] = email.utils.formatdate(localtime=True)
+    # The domain of the address itself, not of "Acme <billing@acme.in>"; the host name if it has none
+    _, at, domain = email.utils.parseaddr(sender)[1].rpartition("@")
+    message["Message-ID"] = email.utils.make_msgid(domain=domain if at and domain else None)
+    message.attach(email.mime.text.MIMEText(row["body"], "plain", "utf-8"))
+    if row["attachment"]:
+        with open(row["attachment"], "rb") as attachment:
+            part = email.mime.application.MIMEApplication(attachment.read(), "pdf")
+        part.add_header("Content-Disposition", "attachment", filename=os.path.basename(row["attachment"]))
+        message.attach(part)
+    return message.as_bytes()
+
+
+class MailQueue:
+    """Outgoing invoice emails kept in SQLite until they are sent, sent in order by one worker.
+
+    The worker drains every message that is due through a single pooled
+    SMTP session, paced by the rate limiter, so a batch of hundreds of
+    invoices goes out without reconnecting. Transient failures are retried
+    with exponential backoff up to MAX_ATTEMPTS; a message the server
+    rejects outright is marked failed with the server's answer.
+
+    Several processes can share the database: each message is claimed
+    (queued -> sending) in one UPDATE before it is sent, so only one of
+    them sends it.
+    """
+
+    def __init__(self, db_path, pool, sender, rate_per_minute=60, max_attempts=MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.pool = pool
+        self.sender = sender
+        self.limiter = RateLimiter(rate_per_minute)
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            # Every send is marked in its own commit; NORMAL skips the fsync per commit in WAL mode,
+            # at worst re-sending the last few messages after a power cut.
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def enqueue(self, recipient, subject, body, attachment="", invoice_number=""):
+        if "@" not in (recipient or ""):
+            raise ValueError(f"{recipient!r} is not an email address.")
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO outgoing (recipient, subject, body, attachment, invoice_number) VALUES (?, ?, ?, ?, ?)",
+                (recipient.strip(), subject, body, attachment or "", invoice_number or ""),
+            )
+        self.wake.set()
+        return cursor.lastrowid
+
+    def counts(self):
+        with self.lock:
+            rows = self.connection.execute("SELECT status, COUNT(*) FROM outgoing GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def failed(self, limit=50):
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT * FROM outgoing WHERE status = 'failed' ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def retry_failed(self):
+        with self.lock, self.connection:
+            self.connection.execute("UPDATE outgoing SET status = 'queued', attempts = 0, next_attempt = 0 WHERE status = 'failed'")
+        self.wake.set()
+
+    def _next_due(self):
+        """Claim the next message that is due; None when there is none."""
+        with self.lock, self.connection:
+            now = time.time()
+            # Claims whose lease ran out belong to a sender that is gone
+            self.connection.execute(
+                "UPDATE outgoing SET status = 'queued' WHERE status = 'sending' AND next_attempt <= ?", (now,)
+            )
+            while True:
+                row = self.connection.execute(
+                    "SELECT * FROM outgoing WHERE status = 'queued' AND next_attempt <= ? ORDER BY next_attempt, id LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    return None
+                # next_attempt doubles as the claim's lease while the message is 'sending'
+                claimed = self.connection.execute(
+                    "UPDATE outgoing SET status = 'sending', next_attempt = ? WHERE id = ? AND status = 'queued'",
+                    (now + SEND_LEASE, row["id"]),
+                ).rowcount
+                if claimed:
+                    return row
+
+    def _mark(self, message_id, **values):
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        with self.lock, self.connection:
+            self.connection.execute(f"UPDATE outgoing SET {assignments} WHERE id = ?", [*values.values(), message_id])
+
+    def _seconds_until_due(self):
+        with self.lock:
+            row = self.connection.execute("SELECT MIN(next_attempt) FROM outgoing WHERE status = 'queued'").fetchone()
+        return None if row[0] is None else max(row[0] - time.time(), 0.0)
+
+    def send_due(self):
+        """Send everything that is due through one session; returns the number sent."""
+        sent = 0
+        row = self._next_due()
+        if row is None:
+            return 0
+        try:
+            with self.pool.session() as smtp:
+                while row is not None and not self.stopping.is_set():
+                    delay = self.limiter.wait_time()
+                    if delay:
+                        self.stopping.wait(delay)
+                        continue
+                    self.limiter.take()
+                    sent += self._send_one(smtp, row)
+                    row = self._next_due()
+        except TRANSIENT_ERRORS + (smtplib.SMTPException, OSError) as exc:
+            # The session itself failed (connect, login or a dropped line): back off the message in hand
+            if row is not None:
+                self._retry_later(row, exc)
+            return sent
+        if row is not None:
+            # Stopped with a message claimed but not sent: hand it back
+            self._mark(row["id"], status="queued", next_attempt=row["next_attempt"])
+        return sent
+
+    def _send_one(self, smtp, row):
+        try:
+            message = build_message(self.sender, row)
+        except OSError as exc:
+            self._mark(row["id"], status="failed", attempts=row["attempts"] + 1, last_error=f"Attachment: {exc}")
+            return 0
+        try:
+            refused = smtp.sendmail(self.sender, [row["recipient"]], message)
+        except smtplib.SMTPResponseException as exc:
+            if 400 <= exc.smtp_code < 500:
+                self._retry_later(row, exc)
+            else:
+                self._mark(row["id"], status="failed", attempts=row["attempts"] + 1, last_error=str(exc))
+            return 0
+        except smtplib.SMTPRecipientsRefused as exc:
+            # 450/451 and friends (mailbox busy, greylisting) are worth another go; 5xx are not
+            if all(400 <= code < 500 for code, _ in exc.recipients.values()):
+                self._retry_later(row, exc.recipients)
+            else:
+                self._mark(row["id"], status="failed", attempts=row["attempts"] + 1, last_error=str(exc.recipients))
+            return 0
+        if refused:
+            self._mark(row["id"], status="failed", attempts=row["attempts"] + 1, last_error=str(refused))
+            return 0
+        self._mark(row["id"], status="sent", attempts=row["attempts"] + 1, sent=time.strftime("%Y-%m-%d %H:%M:%S"), last_error="")
+        return 1
+
+    def _retry_later(self, row, exc):
+        attempts = row["attempts"] + 1
+        if attempts >= self.max_attempts:
+            self._mark(row["id"], status="failed", attempts=attempts, last_error=str(exc))
+            return
+        delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY) * random.uniform(0.5, 1)
+        self._mark(row["id"], status="queued", attempts=attempts, next_attempt=time.time() + delay, last_error=str(exc))
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, name="mail-queue", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=10):
+        self.stopping.set()
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+        self.pool.close()
+
+    def _run(self):
+        while not self.stopping.is_set():
+            self.wake.clear()
+            self.send_due()
+            wait = self._seconds_until_due()
+            if not self.wake.wait(SESSION_IDLE_CLOSE if wait is None else min(wait, SESSION_IDLE_CLOSE)):
+                if wait is None:
+                    self.pool.close()
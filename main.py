@@ -1,343 +1,20 @@
-import csv
 import datetime as dt
 import os
-import random as r
-import re
-import subprocess
 import threading
 import tkinter as tk
-from tkinter import messagebox, simpledialog, ttk
-
-
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-INVOICE_TEMPLATE_PATH = os.path.join(BASE_DIR, "invoiceTemplate.tex")
-INVOICE_HISTORY_PATH = os.path.join(BASE_DIR, "invoiceHistory.csv")
-MONEY_FLOW_PATH = os.path.join(BASE_DIR, "moneyFlow.csv")
-LOGO_PATH = os.path.join(BASE_DIR, "logo.png")
-
-
-INVOICE_FIELD_KEYS = [
-    ("Company Name", "companyName"),
-    ("Company Address", "companyAddress"),
-    ("Company City", "companyCity"),
-    ("Company Country", "companyCountry"),
-    ("Company Postal", "companyPostal"),
-    ("Bill To Name", "billToName"),
-    ("Bill To Address", "billToAddress"),
-    ("Bill To City", "billToCity"),
-    ("Bill To Country", "billToCountry"),
-    ("Bill To Postal", "billToPostal"),
-    ("Invoice Number", "invoiceNumber"),
-    ("Invoice Date", "invoiceDate"),
-    ("Invoice Due Date", "invoiceDueDate"),
-    ("Total Amount", "totalAmount"),
-]
-
-
-def blank_invoice_fields():
-    return {key: "" for _, key in INVOICE_FIELD_KEYS} | {"notesText": ""}
-
-
-def render_invoice_tex(fields, items):
-    if not os.path.exists(INVOICE_TEMPLATE_PATH):
-        raise FileNotFoundError("invoiceTemplate.tex is missing.")
-
-    with open(INVOICE_TEMPLATE_PATH, "r", encoding="utf-8") as template_file:
-        tex = template_file.read()
-
-    for key, val in fields.items():
-        pattern = r"(\\newcommand\{\\" + re.escape(key) + r"\}\{)[^\}]*\}"
-
-        def repl(match, value=val):
-            return match.group(1) + (value or "") + "}"
-
-        tex = re.sub(pattern, repl, tex)
-
-    rows = []
-    for item in items:
-        row = (
-            f"{{{item['itemName']}}}&"
-            f"{{{item['description']}}}&"
-            f"{{{item['quantity']}}}&"
-            f"{{₹{item['price']}}}&"
-            f"{{{item['tax']}\\%}}&"
-            f"{{₹{item['amount']}}}\\\\"
-        )
-        rows.append(row)
-
-    if not rows:
-        rows.append("{No items added}&{}&{}&{}&{}&{}\\\\")
-
-    tex = tex.replace("%%ITEM_ROWS%%", "\n".join(rows))
-
-    invoice_number = fields.get("invoiceNumber") or dt.datetime.now().strftime("%Y%m%d%H%M")
-    safe_invoice_number = str(invoice_number).replace("/", "-").strip() or "0000"
-    output_tex_path = os.path.join(BASE_DIR, f"invoice_{safe_invoice_number}.tex")
-    with open(output_tex_path, "w", encoding="utf-8") as tex_file:
-        tex_file.write(tex)
-    return output_tex_path
-
-
-def compile_tex_to_pdf(tex_path):
-    work_dir = os.path.dirname(tex_path)
-    tex_name = os.path.basename(tex_path)
-    pdf_path = os.path.splitext(tex_path)[0] + ".pdf"
-    base_name = os.path.splitext(tex_name)[0]
-    
-    try:
-        # Use timeout to prevent hanging (60 seconds should be enough)
-        subprocess_kwargs = {
-            "args": ["xelatex", "-interaction=batchmode", "-halt-on-error", tex_name],
-            "cwd": work_dir,
-            "check": False,
-            "stdout": subprocess.PIPE,
-            "stderr": subprocess.STDOUT,
-            "text": True,
-            "timeout": 60,
-        }
-        # Add CREATE_NO_WINDOW flag on Windows to prevent console window
-        if os.name == 'nt':
-            try:
-                subprocess_kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
-            except AttributeError:
-                # CREATE_NO_WINDOW not available in this Python version, skip it
-                pass
-        
-        result = subprocess.run(**subprocess_kwargs)
-    except FileNotFoundError as exc:
-        raise RuntimeError(
-            "xelatex is not installed or not available in PATH. Please install it to generate PDFs."
-        ) from exc
-    except subprocess.TimeoutExpired:
-        raise RuntimeError("PDF generation timed out after 60 seconds. The LaTeX file might be too complex or there's an issue with xelatex.")
-    except Exception as exc:
-        raise RuntimeError(f"Error during PDF generation: {str(exc)}")
-
-    # Check if PDF was created
-    if not os.path.exists(pdf_path):
-        # Try to get error details from log file
-        log_file = os.path.join(work_dir, f"{base_name}.log")
-        error_details = ""
-        if os.path.exists(log_file):
-            try:
-                with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    log_content = f.read()
-                    # Extract error lines
-                    error_lines = [line for line in log_content.split('\n') if '!' in line or 'Error' in line or 'Fatal' in line]
-                    if error_lines:
-                        error_details = "\n".join(error_lines[-10:])  # Last 10 error lines
-            except Exception:
-                pass
-        
-        raise RuntimeError(
-            f"PDF generation failed (exit code {result.returncode}).\n"
-            f"xelatex output:\n{result.stdout[-1000:] if result.stdout else 'No output'}\n"
-            f"{error_details if error_details else ''}"
-        )
-
-    # Move LaTeX auxiliary files (.aux, .log, .out, .fls, .fdb_latexmk, .synctex.gz) to log folder
-    log_dir = os.path.join(work_dir, "log")
-    os.makedirs(log_dir, exist_ok=True)
-    
-    # List of common LaTeX auxiliary file extensions
-    aux_extensions = [".aux", ".log", ".out", ".fls", ".fdb_latexmk", ".synctex.gz"]
-    
-    for ext in aux_extensions:
-        aux_file = os.path.join(work_dir, f"{base_name}{ext}")
-        if os.path.exists(aux_file):
-            try:
-                os.rename(aux_file, os.path.join(log_dir, f"{base_name}{ext}"))
-            except Exception:
-                pass  # Ignore if move fails
-
-    if result.returncode != 0:
-        # PDF was created but there were warnings
-        pass
-
-    return pdf_path
-
-
-def record_invoice(fields, pdf_path):
-    file_exists = os.path.exists(INVOICE_HISTORY_PATH) and os.path.getsize(INVOICE_HISTORY_PATH) > 0
-    fieldnames = ["invoiceNumber", "invoiceDate", "billToName", "totalAmount", "filePath"]
-    with open(INVOICE_HISTORY_PATH, "a", newline="", encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(
-            {
-                "invoiceNumber": fields.get("invoiceNumber", ""),
-                "invoiceDate": fields.get("invoiceDate", ""),
-                "billToName": fields.get("billToName", ""),
-                "totalAmount": fields.get("totalAmount", ""),
-                "filePath": pdf_path,
-            }
-        )
-
+from tkinter import filedialog, messagebox, simpledialog, ttk
 
-def generate_invoice_pdf(fields, items):
-    tex_path = render_invoice_tex(fields, items)
-    pdf_path = compile_tex_to_pdf(tex_path)
-    record_invoice(fields, pdf_path)
-    return tex_path, pdf_path
-
-
-def write_money_flow_entry(amount, category, note):
-    timestamp = dt.datetime.now().isoformat(sep=" ", timespec="seconds")
-    header_needed = not os.path.exists(MONEY_FLOW_PATH) or os.path.getsize(MONEY_FLOW_PATH) == 0
-    with open(MONEY_FLOW_PATH, "a", newline="", encoding="utf-8") as file:
-        writer = csv.writer(file)
-        if header_needed:
-            writer.writerow(["timestamp", "amount", "category", "note"])
-        writer.writerow([timestamp, amount, category, note])
-
-
-def calculate_productivity(hours, profit):
-    if hours <= 0:
-        raise ValueError("Hours worked per day must be greater than 0.")
-    industrial_avg = 5411
-    your_rate = (profit / 30) / hours
-    productivity = (your_rate / industrial_avg) * 100
-    return {
-        "productivity": productivity,
-        "daily_rate": profit / 30,
-        "comparison": (
-            "below" if your_rate < industrial_avg else "above" if your_rate > industrial_avg else "at"
-        ),
-    }
-
-
-def calculate_tax(income, investment_deduction, health_insurance):
-    standard_deduction = 50000
-    investment_deduction = min(max(investment_deduction, 0), 150000)
-    health_insurance = min(max(health_insurance, 0), 25000)
-
-    total_deductions = standard_deduction + investment_deduction + health_insurance
-    taxable_income = max(income - total_deductions, 0)
-
-    tax = 0
-    if taxable_income <= 250000:
-        tax = 0
-    elif taxable_income <= 500000:
-        tax = (taxable_income - 250000) * 0.05
-    elif taxable_income <= 1000000:
-        tax = (250000 * 0.05) + (taxable_income - 500000) * 0.20
-    else:
-        tax = (250000 * 0.05) + (500000 * 0.20) + (taxable_income - 1000000) * 0.30
-
-    if taxable_income <= 500000:
-        tax = 0
-        rebate_text = "Rebate under section 87A applied."
-    else:
-        rebate_text = "No rebate available."
-
-    return {
-        "taxable_income": taxable_income,
-        "tax": round(tax, 2),
-        "total_deductions": total_deductions,
-        "rebate_text": rebate_text,
-    }
-
-
-PRO_TIPS = [
-    r"Take regular breaks to maintain productivity.",
-    r"Prioritize tasks using the Eisenhower Matrix.",
-    r"Set specific goals for each work session.",
-    r"Eliminate distractions by turning off notifications.",
-    r"Use the Pomodoro Technique to manage time effectively.",
-    r"Frame your product as a transformation tool, not a utility—sell the future state, not the feature list.",
-    r"Mine competitor’s 1-star reviews to reverse-engineer your unique value proposition and preempt objections in copy.",
-    r"Start with a premium offer and down-sell later—reverse funnels attract high-intent buyers with low acquisition cost.",
-    r"Build a brand around one metric that matters—like “10x ROI in 30 days” or “zero churn.”",
-    r"#HARD Use customer interviews to uncover latent needs—what they don’t know they want is often more valuable than what they do.",
-    r"Invent a new category name for your product to avoid direct comparison and pricing pressure from incumbents.",
-    r"Use a rolling 13-week cash flow model to forecast liquidity gaps before they become existential threats.",
-    r"Pre-sell services with milestone-based billing to fund delivery without dipping into operational reserves.",
-    r"Create a “minimum lovable product” that delights early adopters and builds word-of-mouth before scaling.",
-    r"Use customer journey mapping to identify friction points and optimize conversion rates at every stage.",
-    r"Leverage social proof by showcasing user-generated content—real results from real users build trust faster.",
-    r"Create a “value ladder” of offerings that ascend in price and complexity, guiding customers to higher-value solutions.",
-    r"Use scarcity tactics like limited-time offers or exclusive access to drive urgency and increase conversions.",
-    r"Automate lead qualification with chatbots that ask key questions and route prospects to the right sales rep.",
-    r"Use A/B testing to optimize landing pages, email campaigns, and ad creatives for maximum conversion.",
-    r"Create a content syndication strategy to distribute your expertise across multiple platforms and reach new audiences.",
-    r"Build a community around your brand—engage users in forums, social media, or Slack/Discord channels to foster loyalty and advocacy.",
-    r"Factor invoices through fintech platforms to unlock cash early and reinvest before competitors even collect.",
-    r"Split your bank accounts into profit-first envelopes—automate transfers to isolate savings from operational burn.",
-    r"Use dynamic pricing algorithms that adjust based on demand signals, urgency, and customer segmentation tags.",
-    r"Automate onboarding with conditional logic forms that route clients into tailored flows based on budget or goals.",
-    r"Use n8n or Zapier to auto-generate invoices from form submissions and log them in your finance tracker.",
-    r"Build a shadow CRM using Google Sheets and Apps Script—lightweight, scalable, and fully customizable.",
-    r"Track internal assets using QR codes linked to Google Sheets for real-time inventory and location updates.",
-    r"Auto-assign tasks based on keywords in incoming emails using a simple NLP classifier and webhook trigger.",
-    r"Create a content calendar with Trello or Notion—visualize themes, deadlines, and publishing cadence.",
-    r"Bundle your core service with complementary tools or templates to increase perceived value and reduce churn.",
-    r"Create limited-edition versions of your product with countdown timers to drive urgency and exclusivity.",
-    r"Use LaTeX to generate premium-looking invoices and reports that signal professionalism and justify pricing.",
-    r"Offer white-label versions of your product to agencies who want to resell without building from scratch.",
-    r"Use feedback loops to evolve pricing tiers based on actual usage patterns and customer willingness to pay.",
-    r"Use Reddit and Quora to answer niche questions with embedded CTAs—organic traffic with high conversion intent.",
-    r"Turn micro case studies into carousel posts for LinkedIn—each slide a hook, each metric a proof.",
-    r"Pay users to post about your product instead of influencers—authenticity scales better than reach.",
-    r"Build a referral engine with double-sided rewards and automated tracking—turn every customer into a marketer.",
-    r"Use UTM parameters religiously to track every campaign, every click, and every conversion path across platforms.",
-    r"Use async video onboarding to reduce training time and standardize knowledge transfer across remote hires.",
-    r"Create a skill matrix for hiring decisions—map roles to capabilities, not just resumes or degrees.",
-    r"Assign trial tasks before full-time offers—filter for execution, not just interview performance.",
-    r"Automate payroll using conditional logic—trigger bonuses, deductions, and compliance filings without manual effort.",
-    r"Build an internal wiki for SOPs—make tribal knowledge searchable, editable, and version-controlled.",
-    r"Offer micro-equity to retain top talent—align incentives without diluting control or burning cash.",
-    r"Gamify performance dashboards—turn KPIs into scoreboards that drive engagement and accountability.",
-    r"Maintain a “talent pool” of pre-vetted freelancers—scale instantly without recruitment lag.",
-    r"Create a “no-code” version of your product for non-technical users—expand your market without alienating devs.",
-    r"Use AI to screen resumes by skill tags—filter for relevance, not keyword stuffing.",
-    r"Automate feedback collection post-project—use forms and sentiment analysis to improve delivery cycles.",
-    r"Sell unused domain names—your parked assets could be someone’s dream brand, and a quick cash win.",
-    r"Create a business-in-a-box template—package your operations, branding, and SOPs for resale or licensing.",
-    r"Use browser automation to scrape competitor pricing—stay ahead of market shifts without manual tracking.",
-    r"Offer lifetime deals to fund early growth—front-load cash flow while building a loyal user base.",
-    r"Run reverse auctions for vendor selection—let suppliers compete to offer you the best terms.",
-    r"Test demand with a ghost product—launch a landing page before building anything to validate interest.",
-    r"Simulate customer support with AI before hiring—train bots on FAQs and escalate only when needed.",
-    r"Build internal micro-SaaS tools, then sell them—your ops solution might be someone else’s missing piece.",
-    r"Turn your analytics into a product—offer dashboards or insights as a service to clients.",
-    r"Create a profitability simulator—let clients model ROI before buying, increasing trust and conversion.",
-    r"Use decision trees for client onboarding—route leads based on budget, urgency, and service fit.",
-    r"Build a modular business model—each unit should be plug-and-play, scalable, and independently profitable.",
-    r"Design your org chart around workflows, not hierarchy—optimize for throughput, not titles.",
-    r"Use time-blocking for team operations—batch similar tasks to reduce context switching and increase velocity.",
-    r"Create a “fail-fast” sandbox—test risky ideas in isolated environments before scaling.",
-    r"Use version-controlled business plans—track pivots, assumptions, and learnings like a codebase.",
-    r"Build a KPI tree—map every metric to its upstream driver and downstream impact.",
-    r"Automate decision logging—record why choices were made to avoid repeating mistakes.",
-    r"Use a “one-page strategy” doc—distill your entire business model into a visual map.",
-    r"Create a feedback flywheel—every customer touchpoint should feed insights back into product or ops.",
-    r"Trademark your internal frameworks—protect your methodology as intellectual capital.",
-    r"License your onboarding flow to other agencies—turn your process into a revenue stream.",
-    r"Create a proprietary scoring system—use it to evaluate clients, deals, or product fit.",
-    r"Build a data moat—aggregate unique insights that competitors can’t easily replicate.",
-    r"Use naming conventions as brand assets—own the language your market uses to describe your solution.",
-    r"Integrate with platforms your users already love—reduce friction and increase adoption.",
-    r"Offer embeddable widgets—let users bring your product into their own workflows.",
-    r"Create a Zapier or n8n connector—unlock automation for power users and agencies.",
-    r"Use webhooks to trigger external workflows—extend your product’s reach without building everything.",
-    r"Build a plugin for a popular CMS or IDE—ride the wave of existing ecosystems.",
-    r"Use the “regret minimization” framework for decisions—ask what future-you would wish you’d done.",
-    r"Apply the “inversion” principle—ask how to fail, then avoid those paths deliberately.",
-    r"Use the “barbell strategy”—balance safe bets with high-risk, high-reward experiments.",
-    r"Apply the “80/20 of the 80/20”—find the 4% of actions that drive 64% of results.",
-    r"Use “second-order thinking”—consider not just the immediate impact, but the ripple effects.",
-    r"Build with exit in mind—structure your business so it can be sold, licensed, or franchised.",
-    r"Create a valuation dashboard—track metrics that investors or acquirers care about.",
-    r"Use deferred revenue models—lock in future cash flow while optimizing tax timing.",
-    r"License your brand to regional operators—expand without managing every location.",
-    r"Create a “silent partner” model—let others run your playbook while you earn passive income.",
-    r"Document everything as if you’ll sell tomorrow—clarity and structure increase valuation instantly.",
-]
-
-
-def get_pro_tip():
-    return r.choice(PRO_TIPS)
+import budgets
+import catalogue
+import clients
+import gst
+import invoice_drafts
+import invoice_output
+import ledger
+import reports
+import secure_store
+import turnover
+from toolkit import books, config, invoicing, performance, services, taxes, telemetry, workspaces
 
 
 class SoloEntrepreneurApp(tk.Tk):
@@ -358,28 +35,88 @@ class SoloEntrepreneurApp(tk.Tk):
         style.configure("Subheader.TLabel", font=("Segoe UI", 11))
         style.configure("Primary.TButton", font=("Segoe UI", 11), padding=8)
 
-        container = ttk.Frame(self)
-        container.pack(fill="both", expand=True)
-        container.grid_columnconfigure(0, weight=1)
-        container.grid_rowconfigure(0, weight=1)
+        workspace = os.environ.get(config.WORKSPACE_ENV_VAR)
+        if workspace:
+            workspaces.activate(workspace)
+        if config.ENCRYPT_DATA_FILES and not self.unlock_data_files():
+            raise SystemExit(1)
+        telemetry.start_exporter("gui", config.METRICS_PORT)
+
+        self.container = ttk.Frame(self)
+        self.container.pack(fill="both", expand=True)
+        self.container.grid_columnconfigure(0, weight=1)
+        self.container.grid_rowconfigure(0, weight=1)
+        self.frames = {}
+        self.build_frames()
 
+    def build_frames(self):
+        """(Re)create every screen for the active workspace and start its services."""
+        for frame in self.frames.values():
+            frame.destroy()
         self.frames = {}
         for FrameClass in (
             HomeFrame,
             InvoiceFrame,
+            InvoiceSearchFrame,
+            TimeTrackerFrame,
             TaxFrame,
             ProductivityFrame,
             MoneyMonitorFrame,
         ):
-            frame = FrameClass(parent=container, controller=self)
+            frame = FrameClass(parent=self.container, controller=self)
             self.frames[FrameClass.__name__] = frame
             frame.grid(row=0, column=0, sticky="nsew")
 
+        self.title(f"Solo Entrepreneur Toolkit — {config.WORKSPACE}")
         self.show_frame("HomeFrame")
+        self.after(0, invoicing.prewarm_tex_service)
+        # Seeding the client directory reads every past invoice; keep it off the Tk thread
+        threading.Thread(target=invoicing.load_client_directory, name="client-directory", daemon=True).start()
+        # Likewise the turnover and budget totals, rebuilt from the ledger on a first run or after it changed
+        threading.Thread(target=books.load_ledger_views, name="ledger-views", daemon=True).start()
+        self.after(0, services.start_background_workers)
+
+    def switch_workspace(self, name):
+        previous = config.WORKSPACE
+        if name == previous:
+            return
+        for frame in self.frames.values():
+            if hasattr(frame, "on_workspace_change"):
+                frame.on_workspace_change()
+        try:
+            workspaces.activate(name)
+        except (OSError, ValueError) as exc:
+            messagebox.showerror("Switch Business", str(exc), parent=self)
+            return
+        if config.ENCRYPT_DATA_FILES and not self.unlock_data_files():
+            workspaces.activate(previous)
+        self.build_frames()
+
+    def unlock_data_files(self):
+        passphrase = os.environ.get(config.PASSPHRASE_ENV_VAR)
+        while True:
+            if passphrase is None:
+                self.withdraw()
+                passphrase = simpledialog.askstring(
+                    "Unlock Data", "Passphrase for the encrypted ledger and invoice history:", parent=self, show="*"
+                )
+                self.deiconify()
+                if not passphrase:
+                    return False
+            try:
+                books.enable_encrypted_storage(passphrase)
+                return True
+            except secure_store.EncryptionError as exc:
+                messagebox.showerror("Encrypted Storage", str(exc), parent=self)
+                if secure_store.AESGCM is None:
+                    return False
+                passphrase = None
 
     def show_frame(self, name):
         frame = self.frames[name]
         frame.tkraise()
+        if hasattr(frame, "on_show"):
+            frame.on_show()
 
 
 class HomeFrame(ttk.Frame):
@@ -397,6 +134,8 @@ class HomeFrame(ttk.Frame):
 
         buttons = [
             ("Invoice Generator", "InvoiceFrame"),
+            ("Invoice Search", "InvoiceSearchFrame"),
+            ("Time Tracker", "TimeTrackerFrame"),
             ("Tax Calculator", "TaxFrame"),
             ("Productivity Calculator", "ProductivityFrame"),
             ("Money Monitor", "MoneyMonitorFrame"),
@@ -414,14 +153,44 @@ class HomeFrame(ttk.Frame):
             )
             btn.grid(row=idx // 2, column=idx % 2, padx=15, pady=15, sticky="ew")
 
+        business = ttk.Frame(self)
+        business.pack(pady=(30, 0))
+        ttk.Label(business, text="Business").pack(side="left", padx=(0, 10))
+        self.workspace_var = tk.StringVar(value=config.WORKSPACE)
+        workspace_combo = ttk.Combobox(
+            business, textvariable=self.workspace_var, values=workspaces.workspace_names(), state="readonly"
+        )
+        workspace_combo.pack(side="left")
+        # The switch rebuilds this frame, so it runs after the combobox event has finished
+        workspace_combo.bind(
+            "<<ComboboxSelected>>", lambda _: controller.after_idle(controller.switch_workspace, self.workspace_var.get())
+        )
+        ttk.Button(business, text="New Business...", command=self.new_workspace).pack(side="left", padx=10)
+
+    def new_workspace(self):
+        name = simpledialog.askstring("New Business", "Name for the new business workspace:", parent=self)
+        if not name:
+            return
+        try:
+            workspaces.create_workspace(name.strip())
+        except (OSError, ValueError) as exc:
+            messagebox.showerror("New Business", str(exc), parent=self)
+            return
+        self.controller.after_idle(self.controller.switch_workspace, name.strip())
+
 
 class InvoiceFrame(ttk.Frame):
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
-        self.field_vars = {key: tk.StringVar(value="") for _, key in INVOICE_FIELD_KEYS}
+        self.field_vars = {key: tk.StringVar(value="") for _, key in invoicing.INVOICE_FIELD_KEYS}
         self.notes_text = tk.Text(self, height=4, width=40, font=("Segoe UI", 10))
         self.items = []
+        # Time-tracker sessions billed on this invoice; marked invoiced once it is generated
+        self.tracked_session_ids = []
+        self.draft_store = invoice_drafts.DraftStore(config.INVOICE_DRAFT_PATH)
+        self._autosave_job = None
+        self._autosave_suspended = False
 
         # Header
         header_bar = ttk.Frame(self)
@@ -462,9 +231,15 @@ class InvoiceFrame(ttk.Frame):
         # Form fields in scrollable area
         form_frame = ttk.LabelFrame(scrollable_frame, text="Invoice Details")
         form_frame.pack(fill="x", padx=30, pady=10)
-        for idx, (label, key) in enumerate(INVOICE_FIELD_KEYS):
+        for idx, (label, key) in enumerate(invoicing.INVOICE_FIELD_KEYS):
             lbl = ttk.Label(form_frame, text=label)
-            entry = ttk.Entry(form_frame, textvariable=self.field_vars[key])
+            if key == "billToName":
+                # Autocompletes from the client directory and fills the rest of the bill-to block
+                entry = self.client_combo = ttk.Combobox(form_frame, textvariable=self.field_vars[key])
+                entry.bind("<KeyRelease>", self.suggest_clients)
+                entry.bind("<<ComboboxSelected>>", self.fill_client)
+            else:
+                entry = ttk.Entry(form_frame, textvariable=self.field_vars[key])
             row, col = divmod(idx, 2)
             lbl.grid(row=row, column=col * 2, sticky="w", pady=4, padx=(10, 8))
             entry.grid(row=row, column=col * 2 + 1, sticky="ew", pady=4, padx=(0, 10))
@@ -483,7 +258,10 @@ class InvoiceFrame(ttk.Frame):
         action_bar = ttk.Frame(items_frame)
         action_bar.pack(fill="x", padx=10, pady=(10, 5))
         ttk.Button(action_bar, text="+ Add Item", command=self.add_item_dialog).pack(side="left", padx=5)
+        ttk.Button(action_bar, text="+ From Catalogue", command=self.add_catalogue_items_dialog).pack(side="left", padx=5)
         ttk.Button(action_bar, text="Remove Selected", command=self.remove_selected_item).pack(side="left", padx=5)
+        self.tax_summary_label = ttk.Label(action_bar, text="")
+        self.tax_summary_label.pack(side="right", padx=5)
 
         # Treeview for items
         columns = ("itemName", "description", "quantity", "price", "tax", "amount")
@@ -508,48 +286,192 @@ class InvoiceFrame(ttk.Frame):
         footer = ttk.Frame(self)
         footer.pack(fill="x", padx=30, pady=15)
         ttk.Button(footer, text="Clear Form", command=self.reset_form).pack(side="left")
+        ttk.Button(footer, text="Restore Draft", command=self.restore_draft).pack(side="left", padx=5)
+        ttk.Button(footer, text="Reopen Invoice", command=self.reopen_invoice_dialog).pack(side="left")
         self.generate_button = ttk.Button(footer, text="Generate Invoice PDF", style="Primary.TButton", command=self.generate_invoice)
         self.generate_button.pack(side="right")
+        self.backend_var = tk.StringVar(value=config.DEFAULT_PDF_BACKEND)
+        ttk.Combobox(
+            footer, textvariable=self.backend_var, values=["auto", *invoicing.PDF_BACKENDS], state="readonly", width=8
+        ).pack(side="right", padx=10)
+        ttk.Label(footer, text="Renderer").pack(side="right")
 
-    def reset_form(self):
+        # Autosave the draft shortly after the user stops typing
         for var in self.field_vars.values():
-            var.set("")
-        self.notes_text.delete("1.0", tk.END)
-        self.items.clear()
-        for row in self.items_tree.get_children():
-            self.items_tree.delete(row)
-        # Clear total amount
-        self.field_vars["totalAmount"].set("")
+            var.trace_add("write", lambda *args: self.schedule_autosave())
+        self.notes_text.bind("<KeyRelease>", lambda event: self.schedule_autosave())
+
+        # Bring back whatever was being edited when the app last closed or crashed
+        try:
+            draft = self.draft_store.load()
+        except (OSError, ValueError):
+            draft = None
+        if draft:
+            self.load_invoice(*draft)
+        else:
+            self.fill_company_profile()
+
+    def suggest_clients(self, event=None):
+        if event is not None and event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        try:
+            matches = services.client_directory.complete(self.field_vars["billToName"].get())
+        except Exception:
+            return
+        self.client_combo.config(values=[record["billToName"] for record in matches])
+
+    def fill_client(self, event=None):
+        record = services.client_directory.get(self.field_vars["billToName"].get())
+        if record is None:
+            return
+        for field in clients.CLIENT_FIELDS:
+            if record[field]:
+                self.field_vars[field].set(record[field])
+
+    def fill_company_profile(self):
+        try:
+            profile = services.client_directory.company_profile()
+        except Exception:
+            return
+        for field, value in profile.items():
+            if field in self.field_vars and not self.field_vars[field].get():
+                self.field_vars[field].set(value)
+
+    def collect_fields(self):
+        fields = invoicing.blank_invoice_fields()
+        for _, key in invoicing.INVOICE_FIELD_KEYS:
+            fields[key] = self.field_vars[key].get().strip()
+        fields["notesText"] = self.notes_text.get("1.0", tk.END).strip()
+        return fields
+
+    def schedule_autosave(self):
+        if self._autosave_suspended:
+            return
+        if self._autosave_job is not None:
+            self.after_cancel(self._autosave_job)
+        self._autosave_job = self.after(800, self.autosave)
+
+    def on_workspace_change(self):
+        # Save a pending autosave into the draft of the workspace being left
+        if self._autosave_job is not None:
+            self.after_cancel(self._autosave_job)
+            self.autosave()
+
+    def autosave(self):
+        self._autosave_job = None
+        try:
+            self.draft_store.save(self.collect_fields(), self.items)
+        except OSError:
+            pass  # autosave is best effort; the form itself is untouched
+
+    def clear_form_widgets(self):
+        self._autosave_suspended = True
+        try:
+            for var in self.field_vars.values():
+                var.set("")
+            self.notes_text.delete("1.0", tk.END)
+            self.items.clear()
+            self.tracked_session_ids = []
+            for row in self.items_tree.get_children():
+                self.items_tree.delete(row)
+        finally:
+            self._autosave_suspended = False
+
+    def load_invoice(self, fields, items):
+        """Fill the form from an invoice model (a restored draft or a past invoice)."""
+        self.clear_form_widgets()
+        self._autosave_suspended = True
+        try:
+            for _, key in invoicing.INVOICE_FIELD_KEYS:
+                self.field_vars[key].set(fields.get(key, ""))
+            self.notes_text.insert("1.0", fields.get("notesText", ""))
+            self.add_items(items)
+        finally:
+            self._autosave_suspended = False
+
+    def reset_form(self):
+        if self._autosave_job is not None:
+            self.after_cancel(self._autosave_job)
+        self.autosave()
+        # Keep the cleared draft around so "Restore Draft" can undo an accidental clear
+        self.draft_store.discard(backup_path=config.INVOICE_DRAFT_BACKUP_PATH)
+        self.clear_form_widgets()
+        self.fill_company_profile()
+
+    def restore_draft(self):
+        backup = invoice_drafts.DraftStore(config.INVOICE_DRAFT_BACKUP_PATH).load()
+        if not backup:
+            messagebox.showinfo("Restore Draft", "There is no cleared draft to restore.")
+            return
+        self.load_invoice(*backup)
+        self.autosave()
+
+    def reopen_invoice_dialog(self):
+        invoice_number = simpledialog.askstring("Reopen Invoice", "Invoice number:", parent=self)
+        if not invoice_number:
+            return
+        services.invoice_index.sync()
+        meta = services.invoice_index.find_by_number(invoice_number.strip())
+        if meta is None:
+            messagebox.showwarning("Reopen Invoice", f"No invoice numbered {invoice_number} in the history.")
+            return
+        self.reopen_invoice(meta)
+
+    def reopen_invoice(self, meta):
+        fields, items = services.invoice_index.load_document(meta)
+        self.load_invoice(fields, items)
+        self.autosave()
+
+    def is_inter_state(self):
+        return gst.is_inter_state(self.field_vars["companyState"].get(), self.field_vars["placeOfSupply"].get())
 
     def add_item_dialog(self):
-        ItemDialog(self, self.add_item)
+        ItemDialog(self, self.add_item, inter_state=self.is_inter_state(), client=self.field_vars["billToName"].get())
 
-    def calculate_total_amount(self):
-        """Calculate total amount by summing all item amounts"""
-        total = 0.0
-        for item in self.items:
-            try:
-                amount_str = item.get("amount", "0").strip().replace("₹", "").replace(",", "")
-                if amount_str:
-                    total += float(amount_str)
-            except (ValueError, TypeError):
-                continue
-        return total
+    def add_catalogue_items_dialog(self):
+        CatalogueDialog(
+            self, self.add_items, inter_state=self.is_inter_state(), client=self.field_vars["billToName"].get()
+        )
+
+    def add_items(self, items):
+        if not items:
+            return
+        for item in items:
+            self.insert_item(item)
+        # Totals once for the lot rather than once per row
+        self.update_total_amount()
+        self.schedule_autosave()
+
+    def calculate_invoice_tax(self):
+        """GST breakdown of the current items for the form's supplier state and place of supply"""
+        fields = {key: var.get() for key, var in self.field_vars.items()}
+        try:
+            return invoicing.compute_invoice_tax(fields, self.items)
+        except ValueError:
+            return None
 
     def update_total_amount(self):
         """Update the totalAmount field with calculated total"""
-        total = self.calculate_total_amount()
+        tax = self.calculate_invoice_tax()
+        if tax is None:
+            self.tax_summary_label.config(text="Check item quantities and prices.")
+            return
         # Format as currency with ₹ symbol
-        formatted_total = f"₹{total:,.2f}"
+        formatted_total = f"₹{tax['totals']['total']:,.2f}"
         self.field_vars["totalAmount"].set(formatted_total)
+        self.tax_summary_label.config(text=gst.tax_summary_text(tax["totals"]) if self.items else "")
 
-    def add_item(self, item):
+    def insert_item(self, item):
         self.items.append(item)
         self.items_tree.insert(
             "", "end", values=(item["itemName"], item["description"], item["quantity"], item["price"], item["tax"], item["amount"])
         )
+
+    def add_item(self, item):
+        self.insert_item(item)
         # Auto-update total amount
         self.update_total_amount()
+        self.schedule_autosave()
 
     def remove_selected_item(self):
         selected = self.items_tree.selection()
@@ -561,19 +483,25 @@ class InvoiceFrame(ttk.Frame):
         self.items.pop(index)
         # Auto-update total amount
         self.update_total_amount()
+        self.schedule_autosave()
 
     def generate_invoice(self):
         # Update total amount before generating
         self.update_total_amount()
         
-        fields = blank_invoice_fields()
-        for _, key in INVOICE_FIELD_KEYS:
-            fields[key] = self.field_vars[key].get().strip()
-        fields["notesText"] = self.notes_text.get("1.0", tk.END).strip()
-        if not fields["invoiceNumber"]:
-            fields["invoiceNumber"] = dt.datetime.now().strftime("%Y%m%d-%H%M")
+        fields = self.collect_fields()
+        tax = self.calculate_invoice_tax()
+        if tax is not None and self.items:
+            fields["taxSummary"] = gst.tax_summary_text(tax["totals"])
         if not fields["invoiceDate"]:
             fields["invoiceDate"] = dt.datetime.now().strftime("%d/%m/%Y")
+        if fields["invoiceNumber"] and services.invoice_allocator.is_used(fields["invoiceNumber"]):
+            proceed = messagebox.askyesno(
+                "Duplicate Invoice Number",
+                f"Invoice {fields['invoiceNumber']} already exists and its files will be overwritten. Continue?",
+            )
+            if not proceed:
+                return
         if not self.items:
             proceed = messagebox.askyesno(
                 "No Items Added",
@@ -582,6 +510,9 @@ class InvoiceFrame(ttk.Frame):
             if not proceed:
                 return
         
+        backend = self.backend_var.get()
+        turnover_level = services.turnover_monitor.status()["level"]
+
         # Disable the generate button to prevent multiple clicks
         self.generate_button.config(state="disabled")
         
@@ -612,7 +543,10 @@ class InvoiceFrame(ttk.Frame):
                 self.after(0, lambda: status_label.config(text="Creating LaTeX file...\nPlease wait..."))
                 self.after(0, lambda: progress_window.update())
                 
-                tex_path, pdf_path = generate_invoice_pdf(fields, self.items)
+                # A blank invoice number is allocated only now, past the confirmations, and
+                # given back if the build fails
+                with telemetry.GUI_ACTION_SECONDS.labels("generate_invoice").time():
+                    tex_path, pdf_path = invoicing.generate_invoice_pdf(fields, self.items, backend)
                 
                 # Schedule UI updates on main thread
                 self.after(0, lambda p=pdf_path: on_success(p))
@@ -629,10 +563,31 @@ class InvoiceFrame(ttk.Frame):
                 pass
             if self.generate_button:
                 self.generate_button.config(state="normal")
+            self._autosave_suspended = True
+            try:
+                self.field_vars["invoiceNumber"].set(fields["invoiceNumber"])
+            finally:
+                self._autosave_suspended = False
+            self.draft_store.discard()
+            if self.tracked_session_ids:
+                services.session_tracker.mark_invoiced(self.tracked_session_ids, fields["invoiceNumber"])
+                self.tracked_session_ids = []
             messagebox.showinfo(
                 "Success",
                 f"Invoice PDF generated successfully!\n\nSaved to:\n{pdf_path}",
             )
+            if config.SMTP_HOST:
+                recipient = simpledialog.askstring(
+                    "Email Invoice", f"Email {fields['invoiceNumber']} to (leave blank to skip):", parent=self
+                )
+                if recipient and recipient.strip():
+                    try:
+                        invoicing.email_invoice(fields, pdf_path, recipient.strip())
+                    except (RuntimeError, ValueError) as exc:
+                        messagebox.showerror("Email Invoice", str(exc))
+            status = services.turnover_monitor.status()
+            if status["level"] != turnover_level and status["level"] != "ok":
+                messagebox.showwarning("GST Threshold", turnover.status_text(status))
             # Return to home page
             self.controller.show_frame("HomeFrame")
         
@@ -665,16 +620,19 @@ class InvoiceFrame(ttk.Frame):
 
 
 class ItemDialog(tk.Toplevel):
-    def __init__(self, parent, callback):
+    def __init__(self, parent, callback, inter_state=False, client=""):
         super().__init__(parent)
         self.title("Add Invoice Item")
         self.callback = callback
+        self.inter_state = inter_state
+        self.client = client
         self.resizable(False, False)
         self.grab_set()
 
         fields = [
             ("Item Name", "itemName"),
             ("Description", "description"),
+            ("HSN/SAC Code", "hsn"),
             ("Quantity", "quantity"),
             ("Price (₹)", "price"),
             ("Tax (%)", "tax"),
@@ -683,7 +641,11 @@ class ItemDialog(tk.Toplevel):
         self.vars = {}
         for idx, (label, key) in enumerate(fields):
             ttk.Label(self, text=label).grid(row=idx, column=0, sticky="e", padx=10, pady=6)
-            entry = ttk.Entry(self)
+            if key == "itemName":
+                entry = ttk.Combobox(self, width=18, postcommand=self.suggest_items)
+                entry.bind("<<ComboboxSelected>>", self.fill_from_catalogue)
+            else:
+                entry = ttk.Entry(self)
             entry.grid(row=idx, column=1, padx=10, pady=6)
             self.vars[key] = entry
             
@@ -691,17 +653,52 @@ class ItemDialog(tk.Toplevel):
             if key in ["quantity", "price", "tax"]:
                 entry.bind("<KeyRelease>", self.calculate_amount)
                 entry.bind("<FocusOut>", self.calculate_amount)
+            elif key == "hsn":
+                entry.bind("<FocusOut>", self.fill_tax_rate)
 
         # Make amount field read-only (auto-calculated)
         self.vars["amount"].config(state="readonly")
         
+        self.save_to_catalogue_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self, text="Save as catalogue default", variable=self.save_to_catalogue_var).grid(
+            row=len(fields), column=1, sticky="w", padx=10
+        )
+
         button_frame = ttk.Frame(self)
-        button_frame.grid(row=len(fields), column=0, columnspan=2, pady=10)
+        button_frame.grid(row=len(fields) + 1, column=0, columnspan=2, pady=10)
         ttk.Button(button_frame, text="Cancel", command=self.destroy).pack(side="right", padx=5)
         ttk.Button(button_frame, text="Add", command=self.submit).pack(side="right")
 
+    def suggest_items(self):
+        try:
+            self.vars["itemName"].config(values=services.item_catalogue.names(self.vars["itemName"].get()))
+        except Exception:
+            pass
+
+    def fill_from_catalogue(self, event=None):
+        """Fill the line from the catalogue, using the last price charged to this client if there is one"""
+        record = services.item_catalogue.get(self.vars["itemName"].get())
+        if record is None:
+            return
+        last_price = services.item_catalogue.last_price(record["itemName"], self.client) if self.client else None
+        if last_price is not None:
+            record["price"] = f"{last_price:.2f}"
+        for key in ("description", "hsn", "price", "tax"):
+            self.vars[key].delete(0, tk.END)
+            self.vars[key].insert(0, record[key])
+        if not self.vars["quantity"].get().strip():
+            self.vars["quantity"].insert(0, "1")
+        self.calculate_amount()
+
+    def fill_tax_rate(self, event=None):
+        """Fill Tax (%) from the HSN/SAC rate table when it is still blank"""
+        rate = services.gst_rate_table.lookup(self.vars["hsn"].get())
+        if rate is not None and not self.vars["tax"].get().strip():
+            self.vars["tax"].insert(0, f"{rate.normalize():f}")
+            self.calculate_amount()
+
     def calculate_amount(self, event=None):
-        """Calculate amount = (quantity * price) * (1 + tax/100)"""
+        """Calculate amount = taxable value + GST, each rounded to the paisa"""
         try:
             quantity_str = self.vars["quantity"].get().strip()
             price_str = self.vars["price"].get().strip()
@@ -713,12 +710,12 @@ class ItemDialog(tk.Toplevel):
                 self.vars["amount"].config(state="readonly")
                 return
             
-            quantity = float(quantity_str)
-            price = float(price_str)
-            tax = float(tax_str) if tax_str else 0.0
-            
-            # Calculate: (quantity * price) * (1 + tax/100)
-            amount = (quantity * price) * (1 + tax / 100)
+            quantity = gst.to_decimal(quantity_str)
+            price = gst.to_decimal(price_str)
+            tax = gst.to_decimal(tax_str)
+
+            taxable, cgst, sgst, igst = gst.line_tax(quantity, price, tax, self.inter_state)
+            amount = taxable + cgst + sgst + igst
             
             self.vars["amount"].config(state="normal")
             self.vars["amount"].delete(0, tk.END)
@@ -742,10 +739,292 @@ class ItemDialog(tk.Toplevel):
         if not item["amount"]:
             self.calculate_amount()
             item["amount"] = self.vars["amount"].get().strip()
+        if self.save_to_catalogue_var.get():
+            try:
+                services.item_catalogue.save(item)
+            except Exception as exc:
+                messagebox.showwarning("Catalogue", f"Item added, but not saved to the catalogue: {exc}")
         self.callback(item)
         self.destroy()
 
 
+class CatalogueDialog(tk.Toplevel):
+    """Pick several catalogue items at once and add them without going through ItemDialog"""
+
+    def __init__(self, parent, callback, inter_state=False, client=""):
+        super().__init__(parent)
+        self.title("Add From Catalogue")
+        self.callback = callback
+        self.inter_state = inter_state
+        self.client = client
+        self.grab_set()
+
+        self.filter_var = tk.StringVar()
+        ttk.Label(self, text="Filter").grid(row=0, column=0, sticky="e", padx=10, pady=6)
+        filter_entry = ttk.Entry(self, textvariable=self.filter_var)
+        filter_entry.grid(row=0, column=1, sticky="ew", padx=10, pady=6)
+        filter_entry.bind("<KeyRelease>", lambda event: self.refresh())
+
+        self.listbox = tk.Listbox(self, selectmode="extended", height=14, width=40)
+        self.listbox.grid(row=1, column=0, columnspan=2, sticky="nsew", padx=10, pady=6)
+
+        self.quantity_var = tk.StringVar(value="1")
+        ttk.Label(self, text="Quantity each").grid(row=2, column=0, sticky="e", padx=10, pady=6)
+        ttk.Entry(self, textvariable=self.quantity_var, width=10).grid(row=2, column=1, sticky="w", padx=10, pady=6)
+
+        button_frame = ttk.Frame(self)
+        button_frame.grid(row=3, column=0, columnspan=2, pady=10)
+        ttk.Button(button_frame, text="Cancel", command=self.destroy).pack(side="right", padx=5)
+        ttk.Button(button_frame, text="Add Selected", command=self.submit).pack(side="right")
+        self.refresh()
+
+    def refresh(self):
+        self.listbox.delete(0, tk.END)
+        for name in services.item_catalogue.names(self.filter_var.get(), limit=500):
+            self.listbox.insert(tk.END, name)
+
+    def submit(self):
+        names = [self.listbox.get(index) for index in self.listbox.curselection()]
+        if not names:
+            messagebox.showwarning("Validation", "Select at least one item.", parent=self)
+            return
+        try:
+            items = []
+            for name in names:
+                record = services.item_catalogue.get(name)
+                if record is None:
+                    continue
+                price = services.item_catalogue.last_price(name, self.client) if self.client else None
+                items.append(catalogue.invoice_item(record, self.quantity_var.get(), price, self.inter_state))
+        except ValueError as exc:
+            messagebox.showwarning("Validation", str(exc), parent=self)
+            return
+        self.callback(items)
+        self.destroy()
+
+
+class InvoiceSearchFrame(ttk.Frame):
+    def __init__(self, parent, controller):
+        super().__init__(parent)
+        self.controller = controller
+        self._pending_search = None
+
+        header_bar = ttk.Frame(self)
+        header_bar.pack(fill="x", pady=(20, 10), padx=30)
+        ttk.Button(header_bar, text="← Back", command=lambda: controller.show_frame("HomeFrame")).pack(side="left")
+        ttk.Label(header_bar, text="Invoice Search", style="Header.TLabel").pack(side="left", padx=20)
+
+        form = ttk.Frame(self)
+        form.pack(padx=30, pady=(10, 5), fill="x")
+        ttk.Label(form, text="Search").grid(row=0, column=0, sticky="w", pady=8, padx=(0, 8))
+        self.query_var = tk.StringVar(value="")
+        query_entry = ttk.Entry(form, textvariable=self.query_var)
+        query_entry.grid(row=0, column=1, sticky="ew", pady=8)
+        query_entry.bind("<KeyRelease>", self.schedule_search)
+        form.grid_columnconfigure(1, weight=1)
+
+        self.status_label = ttk.Label(self, text="Loading invoice index...", style="Subheader.TLabel")
+        self.status_label.pack(fill="x", padx=30)
+
+        results_frame = ttk.Frame(self)
+        results_frame.pack(fill="both", expand=True, padx=30, pady=10)
+        columns = ("invoiceNumber", "invoiceDate", "billToName", "totalAmount", "filePath")
+        self.results_tree = ttk.Treeview(results_frame, columns=columns, show="headings")
+        headings = ["Invoice #", "Date", "Bill To", "Total", "File"]
+        widths = [120, 90, 180, 100, 300]
+        for col, heading, width in zip(columns, headings, widths):
+            self.results_tree.heading(col, text=heading)
+            self.results_tree.column(col, width=width, anchor="w")
+        results_scroll = ttk.Scrollbar(results_frame, orient="vertical", command=self.results_tree.yview)
+        self.results_tree.configure(yscrollcommand=results_scroll.set)
+        self.results_tree.pack(side="left", fill="both", expand=True)
+        results_scroll.pack(side="right", fill="y")
+        self.results_tree.bind("<Double-1>", self.open_selected)
+        ttk.Label(self, text="Double-click an invoice to reopen it for editing.").pack(anchor="w", padx=30, pady=(0, 10))
+
+        # Build or catch up the index off the UI thread so startup stays snappy
+        def load_index():
+            try:
+                services.invoice_index.sync()
+                message = f"{len(services.invoice_index.documents)} invoices indexed."
+            except Exception as exc:
+                message = f"Could not load invoice index: {exc}"
+            self.after(0, lambda: self.status_label.config(text=message))
+
+        threading.Thread(target=load_index, daemon=True).start()
+
+    def schedule_search(self, event=None):
+        if self._pending_search is not None:
+            self.after_cancel(self._pending_search)
+        self._pending_search = self.after(120, self.run_search)
+
+    def on_workspace_change(self):
+        if self._pending_search is not None:
+            self.after_cancel(self._pending_search)
+            self._pending_search = None
+
+    def run_search(self):
+        self._pending_search = None
+        for row in self.results_tree.get_children():
+            self.results_tree.delete(row)
+        query = self.query_var.get().strip()
+        if not query or not services.invoice_index.loaded:
+            return
+        started = dt.datetime.now()
+        results = services.invoice_index.search(query)
+        elapsed_ms = (dt.datetime.now() - started).total_seconds() * 1000
+        telemetry.GUI_ACTION_SECONDS.labels("invoice_search").observe(elapsed_ms / 1000)
+        for result in results:
+            self.results_tree.insert(
+                "",
+                "end",
+                values=tuple(result.get(key, "") for key in self.results_tree["columns"]),
+            )
+        self.status_label.config(text=f"{len(results)} results in {elapsed_ms:.1f} ms")
+
+    def open_selected(self, event=None):
+        selected = self.results_tree.selection()
+        if not selected:
+            return
+        values = self.results_tree.item(selected[0], "values")
+        meta = dict(zip(self.results_tree["columns"], values))
+        invoice_frame = self.controller.frames["InvoiceFrame"]
+        try:
+            invoice_frame.reopen_invoice(meta)
+        except (OSError, ValueError) as exc:
+            messagebox.showerror("Reopen Invoice", str(exc))
+            return
+        self.controller.show_frame("InvoiceFrame")
+
+
+class TimeTrackerFrame(ttk.Frame):
+    def __init__(self, parent, controller):
+        super().__init__(parent)
+        self.controller = controller
+        self._tick_job = None
+
+        header_bar = ttk.Frame(self)
+        header_bar.pack(fill="x", pady=(20, 10), padx=30)
+        ttk.Button(header_bar, text="← Back", command=lambda: controller.show_frame("HomeFrame")).pack(side="left")
+        ttk.Label(header_bar, text="Time Tracker", style="Header.TLabel").pack(side="left", padx=20)
+
+        form = ttk.Frame(self)
+        form.pack(padx=30, pady=10, fill="x")
+        self.client_var = tk.StringVar()
+        self.project_var = tk.StringVar()
+        self.note_var = tk.StringVar()
+        self.billable_var = tk.BooleanVar(value=True)
+
+        ttk.Label(form, text="Client").grid(row=0, column=0, sticky="w", pady=6)
+        self.client_combo = ttk.Combobox(form, textvariable=self.client_var)
+        self.client_combo.grid(row=0, column=1, sticky="ew", pady=6)
+        ttk.Label(form, text="Project").grid(row=1, column=0, sticky="w", pady=6)
+        ttk.Entry(form, textvariable=self.project_var).grid(row=1, column=1, sticky="ew", pady=6)
+        ttk.Label(form, text="Note").grid(row=2, column=0, sticky="w", pady=6)
+        ttk.Entry(form, textvariable=self.note_var).grid(row=2, column=1, sticky="ew", pady=6)
+        ttk.Checkbutton(form, text="Billable", variable=self.billable_var).grid(row=3, column=1, sticky="w", pady=6)
+        form.grid_columnconfigure(1, weight=1)
+
+        actions = ttk.Frame(self)
+        actions.pack(padx=30, pady=10, fill="x")
+        ttk.Button(actions, text="Start", style="Primary.TButton", command=self.start).pack(side="left")
+        ttk.Button(actions, text="Stop", command=self.stop).pack(side="left", padx=10)
+        ttk.Button(actions, text="Bill Selected Client", command=self.bill_selected_client).pack(side="left")
+        self.timer_label = ttk.Label(actions, text="", style="Subheader.TLabel")
+        self.timer_label.pack(side="right")
+
+        ttk.Label(self, text="Last 7 days").pack(anchor="w", padx=30)
+        columns = ("client", "project", "hours", "billable")
+        self.summary_tree = ttk.Treeview(self, columns=columns, show="headings", height=10)
+        for col, heading, width in (
+            ("client", "Client", 220),
+            ("project", "Project", 220),
+            ("hours", "Hours", 100),
+            ("billable", "Billable Hours", 120),
+        ):
+            self.summary_tree.heading(col, text=heading)
+            self.summary_tree.column(col, width=width, anchor="w" if col in ("client", "project") else "e")
+        self.summary_tree.pack(fill="both", expand=True, padx=30, pady=(5, 20))
+
+    def on_show(self):
+        try:
+            self.client_combo.config(values=services.session_tracker.clients())
+            today = dt.date.today()
+            rows = services.session_tracker.summary(today - dt.timedelta(days=6), today)
+        except Exception as exc:
+            messagebox.showerror("Time Tracker", str(exc))
+            return
+        self.summary_tree.delete(*self.summary_tree.get_children())
+        for row in rows:
+            self.summary_tree.insert(
+                "",
+                "end",
+                values=(row["client"], row["project"], f"{row['hours']:.2f}", f"{row['billable_hours']:.2f}"),
+            )
+        self.tick()
+
+    def on_workspace_change(self):
+        if self._tick_job is not None:
+            self.after_cancel(self._tick_job)
+            self._tick_job = None
+
+    def tick(self):
+        if self._tick_job is not None:
+            self.after_cancel(self._tick_job)
+            self._tick_job = None
+        session = services.session_tracker.active()
+        if session is None:
+            self.timer_label.config(text="Not tracking")
+            return
+        elapsed = dt.datetime.now() - dt.datetime.fromisoformat(session["started"])
+        hours, remainder = divmod(int(elapsed.total_seconds()), 3600)
+        label = f"{session['client']} / {session['project']}" if session["project"] else session["client"]
+        self.timer_label.config(text=f"{label}  {hours:d}:{remainder // 60:02d}:{remainder % 60:02d}")
+        self._tick_job = self.after(1000, self.tick)
+
+    def start(self):
+        try:
+            performance.stop_time_tracking()
+            services.session_tracker.start(
+                self.client_var.get(), self.project_var.get(), self.note_var.get(), self.billable_var.get()
+            )
+        except Exception as exc:
+            messagebox.showerror("Time Tracker", str(exc))
+            return
+        self.on_show()
+
+    def stop(self):
+        try:
+            session = performance.stop_time_tracking()
+        except Exception as exc:
+            messagebox.showerror("Time Tracker", str(exc))
+            return
+        if session is None:
+            messagebox.showinfo("Time Tracker", "No session is running.")
+        self.on_show()
+
+    def bill_selected_client(self):
+        selected = self.summary_tree.selection()
+        client = self.summary_tree.item(selected[0], "values")[0] if selected else self.client_var.get().strip()
+        if not client:
+            messagebox.showwarning("Time Tracker", "Select a row or enter a client to bill.")
+            return
+        rate = simpledialog.askfloat("Bill Client", f"Hourly rate for {client} (₹):", parent=self, minvalue=0)
+        if rate is None:
+            return
+        items, session_ids = services.session_tracker.invoice_items(client, rate)
+        if not items:
+            messagebox.showinfo("Bill Client", f"{client} has no unbilled billable time.")
+            return
+        invoice_frame = self.controller.frames["InvoiceFrame"]
+        if not invoice_frame.field_vars["billToName"].get().strip():
+            invoice_frame.field_vars["billToName"].set(client)
+        for item in items:
+            invoice_frame.add_item(item)
+        invoice_frame.tracked_session_ids.extend(session_ids)
+        self.controller.show_frame("InvoiceFrame")
+
+
 class TaxFrame(ttk.Frame):
     def __init__(self, parent, controller):
         super().__init__(parent)
@@ -778,9 +1057,20 @@ class TaxFrame(ttk.Frame):
         self.result_label = ttk.Label(self, text="", style="Subheader.TLabel", justify="left")
         self.result_label.pack(fill="x", padx=30)
 
+        monitor_box = ttk.LabelFrame(self, text="Turnover & Advance Tax")
+        monitor_box.pack(fill="x", padx=30, pady=(20, 0))
+        self.monitor_label = ttk.Label(monitor_box, text="", justify="left")
+        self.monitor_label.pack(fill="x", padx=10, pady=8)
+
+    def on_show(self):
+        try:
+            self.monitor_label.config(text=turnover.status_text(services.turnover_monitor.status()))
+        except Exception as exc:
+            self.monitor_label.config(text=f"Turnover monitor unavailable: {exc}")
+
     def handle_calculation(self):
         try:
-            result = calculate_tax(self.income_var.get(), self.invest_var.get(), self.health_var.get())
+            result = taxes.calculate_tax(self.income_var.get(), self.invest_var.get(), self.health_var.get())
         except Exception as exc:
             messagebox.showerror("Error", str(exc))
             return
@@ -815,57 +1105,79 @@ class ProductivityFrame(ttk.Frame):
         ttk.Entry(form, textvariable=self.profit_var).grid(row=1, column=1, sticky="ew", pady=8)
         form.grid_columnconfigure(1, weight=1)
 
-        ttk.Button(self, text="Calculate Productivity", style="Primary.TButton", command=self.handle_calc).pack(
-            padx=30, pady=10, anchor="w"
+        actions = ttk.Frame(self)
+        actions.pack(padx=30, pady=10, fill="x")
+        ttk.Button(actions, text="Calculate Productivity", style="Primary.TButton", command=self.handle_calc).pack(
+            side="left"
         )
+        ttk.Button(actions, text="Log Today's Hours", command=self.log_hours).pack(side="left", padx=10)
+        ttk.Button(actions, text="Use Last 30 Days", command=self.use_tracked_figures).pack(side="left")
         self.result_label = ttk.Label(self, text="", style="Subheader.TLabel", justify="left")
         self.result_label.pack(fill="x", padx=30)
 
+        history_box = ttk.LabelFrame(self, text="Earnings per Hour Over Time")
+        history_box.pack(fill="x", padx=30, pady=(20, 0))
+        self.history_label = ttk.Label(history_box, text="", justify="left")
+        self.history_label.pack(fill="x", padx=10, pady=8)
+
+    def on_show(self):
+        try:
+            summary = services.productivity_series.summary()
+        except Exception as exc:
+            self.history_label.config(text=f"Productivity history unavailable: {exc}")
+            return
+        lines = []
+        for window in summary["windows"]:
+            if window["per_hour"] is None:
+                lines.append(f"Last {window['days']} days: no hours logged")
+                continue
+            trend = "" if window["trend"] is None else f" ({window['trend']:+.0%} vs previous {window['days']} days)"
+            lines.append(
+                f"Last {window['days']} days: ₹{window['per_hour']:,.2f}/hr over {window['hours']:g} h{trend}"
+            )
+        percentiles = summary["percentiles"]
+        if percentiles[50] is not None:
+            lines.append(
+                "Daily ₹/hr percentiles (1 year): "
+                + ", ".join(f"p{pct} ₹{value:,.0f}" for pct, value in percentiles.items())
+            )
+        self.history_label.config(text="\n".join(lines))
+
+    def log_hours(self):
+        try:
+            services.productivity_series.log_hours(self.hours_var.get())
+        except Exception as exc:
+            messagebox.showerror("Error", str(exc))
+            return
+        self.on_show()
+
+    def use_tracked_figures(self):
+        window = services.productivity_series.window(30)
+        if not window["hours"]:
+            messagebox.showinfo("Productivity", "No hours have been logged in the last 30 days.")
+            return
+        self.hours_var.set(round(window["hours"] / 30, 2))
+        self.profit_var.set(round(window["profit"], 2))
+
     def handle_calc(self):
         try:
-            result = calculate_productivity(self.hours_var.get(), self.profit_var.get())
+            result = performance.calculate_productivity(self.hours_var.get(), self.profit_var.get())
         except Exception as exc:
             messagebox.showerror("Error", str(exc))
             return
-        tip = get_pro_tip()
+        tip = performance.get_pro_tip()
         self.result_label.config(
             text=(
                 f"Productivity: {result['productivity']:.2f}% of industry benchmark\n"
                 f"Daily Earnings: ₹{result['daily_rate']:.2f}\n"
-                f"You are {result['comparison']} the ₹5411/hr benchmark.\n"
+                f"You are {result['comparison']} the ₹{config.INDUSTRY_AVERAGE_RATE}/hr benchmark.\n"
                 f"Pro Tip: {tip}"
             )
         )
 
 
 class MoneyMonitorFrame(ttk.Frame):
-    CATEGORIES = [
-        "Sales Revenue",
-        "Customer Prepayments",
-        "Royalties & Licensing",
-        "Investment Returns",
-        "Grants & Subsidies",
-        "Financing Activities",
-        "Asset Liquidation",
-        "Affiliate/Referral",
-        "Rent & Utilities",
-        "Salaries & Wages",
-        "Software Licenses",
-        "Raw Materials / Inventory",
-        "Taxes & Compliance",
-        "Insurance",
-        "Branding & Design",
-        "Team Retreats / Perks",
-        "Premium Tools",
-        "Marketing Campaigns",
-        "Office Decor / Furniture",
-        "R&D",
-        "Capital Expenditure",
-        "Hiring for Scale",
-        "Market Expansion",
-        "Training & Upskilling",
-        "Data Infrastructure",
-    ]
+    CATEGORIES = ledger.CATEGORIES
 
     def __init__(self, parent, controller):
         super().__init__(parent)
@@ -898,6 +1210,37 @@ class MoneyMonitorFrame(ttk.Frame):
         self.status_label = ttk.Label(self, text="", style="Subheader.TLabel", justify="left")
         self.status_label.pack(fill="x", padx=30)
 
+        report_box = ttk.LabelFrame(self, text="Reports")
+        report_box.pack(fill="x", padx=30, pady=(20, 0))
+        self.report_var = tk.StringVar(value=next(iter(books.REPORTS)))
+        ttk.Combobox(report_box, textvariable=self.report_var, values=list(books.REPORTS), state="readonly").pack(
+            side="left", padx=10, pady=10
+        )
+        self.report_format_var = tk.StringVar(value=reports.REPORT_FORMATS[0])
+        ttk.Combobox(
+            report_box, textvariable=self.report_format_var, values=reports.REPORT_FORMATS, state="readonly", width=6
+        ).pack(side="left", pady=10)
+        ttk.Button(report_box, text="Export...", command=self.export_report).pack(side="left", padx=10, pady=10)
+
+    def export_report(self):
+        name, fmt = self.report_var.get(), self.report_format_var.get()
+        path = filedialog.asksaveasfilename(
+            parent=self,
+            title="Export Report",
+            defaultextension=f".{fmt}",
+            initialfile=f"{invoice_output.slugify(name)}.{fmt}",
+            filetypes=[(fmt.upper(), f"*.{fmt}")],
+        )
+        if not path:
+            return
+        try:
+            with telemetry.GUI_ACTION_SECONDS.labels("export_report").time():
+                reports.export_report(books.REPORTS[name](), path, fmt)
+        except Exception as exc:
+            messagebox.showerror("Export Report", str(exc))
+            return
+        self.status_label.config(text=f"{name} exported to {path}.")
+
     def save_entry(self):
         amount = self.amount_var.get()
         if amount == 0:
@@ -905,13 +1248,21 @@ class MoneyMonitorFrame(ttk.Frame):
             return
         note = self.note_entry.get().strip() or "None"
         try:
-            write_money_flow_entry(amount, self.category_var.get(), note)
+            with telemetry.GUI_ACTION_SECONDS.labels("save_entry").time():
+                level = services.turnover_monitor.status()["level"]
+                warnings = books.budget_warnings(amount, self.category_var.get())
+                books.write_money_flow_entry(amount, self.category_var.get(), note)
+                status = services.turnover_monitor.status()
         except Exception as exc:
             messagebox.showerror("Error", str(exc))
             return
         self.status_label.config(
-            text=f"Saved {self.category_var.get()} entry for ₹{amount:.2f}.\nLogged at {MONEY_FLOW_PATH}."
+            text=f"Saved {self.category_var.get()} entry for ₹{amount:.2f}.\nLogged at {config.MONEY_FLOW_PATH}."
         )
+        if warnings:
+            messagebox.showwarning("Budget", budgets.warning_text(warnings))
+        if status["level"] != level and status["level"] != "ok":
+            messagebox.showwarning("GST Threshold", turnover.status_text(status))
         self.note_entry.delete(0, tk.END)
         self.amount_var.set(0)
 
@@ -919,529 +1270,4 @@ class MoneyMonitorFrame(ttk.Frame):
 if __name__ == "__main__":
     app = SoloEntrepreneurApp()
     app.mainloop()
-import csv
-# import time
-# fill_invoice.py
-import os
-import re
-import random as r
-import datetime as dt
-
-
-
-# variables for LaTeX templete
-companyName,companyAddress,companyCity,companyCountry,companyPostal,billToName,billToAddress,billToCity,billToCountry,billToPostal,invoiceNumber,invoiceDate,invoiceDueDate,notesText,totalAmount="","","","","","","","","","","","","","",""
-# Values to replace with in latex code in the generated latex file
-fields = {
-    'companyName': companyName,
-    'companyAddress': companyAddress,
-    'companyCity': companyCity,
-    'companyCountry': companyCountry,
-    'companyPostal': companyPostal,
-    'billToName': billToName,
-    'billToAddress': billToAddress,
-    'billToCity': billToCity,
-    'billToCountry': billToCountry,
-    'billToPostal': billToPostal,
-    'invoiceNumber': invoiceNumber,
-    'invoiceDate': invoiceDate,
-    'invoiceDueDate': invoiceDueDate,
-    'notesText': notesText,
-    'totalAmount': totalAmount
-}
-
-
-
-# Example items list (each item is a dict)
-items = [
-#    {'itemName': 'Mini Notebook', 'description': 'Handmade 20-page mini notebook', 'quantity': '3', 'price': '₹150', 'tax': '0%', 'amount': '₹450'}, this is the format 
-]
-
-
-def getInvoiceFields():
-    noOfItems=int(input("Enter the Number of Items to put in the invoice: "))
-    for i in fields.keys():
-        fields[i]=input(f"Enter {i}: ")
-    for i in range(noOfItems):
-        tempd={}
-        itemName = input("Enter itemName: ")
-        description = input("Enter description: ")
-        quantity = input("Enter quantity: ")
-        price = input("Enter price: ")
-        tax = input("Enter tax: ")
-        amount = input("Enter amount: ")
-        tempd["itemName"]=str(itemName)
-        tempd["description"]=str(description)
-        tempd["quantity"]=str(quantity)
-        tempd["price"]=str("₹"+str(price))
-        tempd["tax"]=str(str(tax)+"%")
-        tempd["amount"]=str("₹"+str(amount))
-        items.append(tempd)
-    return fields,items                                    
-
-
-def createInvoice():
-    """Generate invoice .tex files from CSV. Returns list of generated file paths."""
-    generated_files = []
-    csv_path = 'C:\\Users\\aditk\\Desktop\\Solo Entrepreneur ToolKit\\invoiceHistory.csv'
-    
-    # Handle missing CSV gracefully
-    if not os.path.exists(csv_path):
-        return generated_files
-    
-    with open(csv_path, 'r') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            # Update fields dictionary with CSV row data
-            for key in fields.keys():
-                if key in row:
-                    fields[key] = row[key]
-
-            # create item rows from CSV data
-            items = []
-            for i in range(1, 6):  # Assuming up to 5 items
-                item_key = f'item{i}Name'
-                if item_key in row and row[item_key]:
-                    item = {
-                        'itemName': row[item_key],
-                        'description': row.get(f'item{i}Description', ''),
-                        'quantity': row.get(f'item{i}Quantity', '1'),
-                        'price': row.get(f'item{i}Price', '0'),
-                        'tax': row.get(f'item{i}Tax', '0%'),
-                        'amount': row.get(f'item{i}Amount', '0')
-                    }
-                    items.append(item)
-
-            # read and replace template using a callback to avoid regex backreference issues
-            template_path = 'C:\\Users\\aditk\\Desktop\\Solo Entrepreneur ToolKit\\invoiceTemplate.tex'
-            if not os.path.exists(template_path):
-                continue  # Skip if template is missing
-            
-            with open(template_path, 'r') as f:
-                tex = f.read()
-            
-            def replace_field(match):
-                """Callback to safely replace field values without regex backreference interference."""
-                key = match.group(1)
-                val = fields.get(key, '')
-                return match.group(0).split('{')[0] + '{' + val + '}'
-            
-            pattern = r'(\\newcommand\{\\([^}]+)\}\{)[^\}]*\}'
-            tex = re.sub(pattern, replace_field, tex)
-
-            # adds items to the space where required
-            rows = []
-            for it in items:
-                row = r'{' + it['itemName'] + '}&{' + it['description'] + '}&{' + it['quantity'] + '}&{₹' + it['price'] + '}&{' + it['tax'] + '%}&{₹' + it['amount'] + '}\\'
-                rows.append(row)
-
-            rows_text = '\n'.join(rows)
-            tex = tex.replace('%%ITEM_ROWS%%', rows_text)
-
-            # unique filename creator
-            base_dir = r"C:\Users\aditk\Desktop\Solo Entrepreneur ToolKit"
-            invoice_number = (fields.get('invoiceNumber') or '0000').replace('/', '-').strip()
-            output_tex_path = os.path.join(base_dir, f"invoice_{invoice_number}.tex")
-            with open(output_tex_path, 'w', encoding='utf-8') as f:
-                f.write(tex)
-            generated_files.append(output_tex_path)
-            print(f"Generated {output_tex_path}")
-    
-    return generated_files
-
-def recordInvoice(output_tex_file, csv_path=None):
-    """Record invoice to CSV. csv_path defaults to invoiceHistory.csv in BASE_DIR."""
-    if csv_path is None:
-        csv_path = INVOICE_HISTORY_PATH
-    
-    fieldnames = ['invoiceNumber', 'invoiceDate', 'billToName', 'totalAmount', 'filePath']
-    file_exists = os.path.exists(csv_path)
-    
-    with open(csv_path, 'a', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        if not file_exists or (os.path.exists(csv_path) and os.stat(csv_path).st_size == 0):
-            writer.writeheader()
-        writer.writerow({
-            'invoiceNumber': fields.get('invoiceNumber', ''),
-            'invoiceDate': fields.get('invoiceDate', ''),
-            'billToName': fields.get('billToName', ''),
-            'totalAmount': fields.get('totalAmount', ''),
-            'filePath': output_tex_file
-        })
-
-##########################################################################################################################################################
-
-def moneyMonitor_record(choice_index, amount, note, file_path=None):
-    """Record a money flow entry without interactive input. Returns the category used."""
-    if file_path is None:
-        file_path = MONEY_FLOW_PATH
-    
-    categories = [
-        "Sales Revenue",
-        "Customer Prepayments",
-        "Royalties & Licensing",
-        "Investment Returns",
-        "Grants & Subsidies",
-        "Financing Activities",
-        "Asset Liquidation",
-        "Affiliate/Referral",
-        "Rent & Utilities",
-        "Salaries & Wages",
-        "Software Licenses",
-        "Raw Materials / Inventory",
-        "Taxes & Compliance",
-        "Insurance",
-        "Branding & Design",
-        "Team Retreats / Perks",
-        "Premium Tools",
-        "Marketing Campaigns",
-        "Office Decor / Furniture",
-        "R&D",
-        "Capital Expenditure",
-        "Hiring for Scale",
-        "Market Expansion",
-        "Training & Upskilling",
-        "Data Infrastructure"
-    ]
-    if choice_index < 0 or choice_index >= len(categories):
-        raise IndexError(f"Invalid category index {choice_index}")
-    
-    category = categories[choice_index]
-    os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
-    with open(file_path, 'a', encoding='utf-8') as f:
-        f.write(f"{dt.datetime.now()},{amount},{category},{note}\n")
-    return category
-
-
-def proTip():
-    tips = [
-        r"Take regular breaks to maintain productivity.",
-        r"Prioritize tasks using the Eisenhower Matrix.",
-        r"Set specific goals for each work session.",
-        r"Eliminate distractions by turning off notifications.",
-        r"Use the Pomodoro Technique to manage time effectively.",
-        r"Frame your product as a transformation tool, not a utility—sell the future state, not the feature list.",
-        r"Mine competitor’s 1-star reviews to reverse-engineer your unique value proposition and preempt objections in copy.",
-        r"Start with a premium offer and down-sell later—reverse funnels attract high-intent buyers with low acquisition cost.",
-        r"Build a brand around one metric that matters—like “10x ROI in 30 days” or “zero churn.”",
-        r"#HARD Use customer interviews to uncover latent needs—what they don’t know they want is often more valuable than what they do.",
-        r"Invent a new category name for your product to avoid direct comparison and pricing pressure from incumbents.",
-        r"Use a rolling 13-week cash flow model to forecast liquidity gaps before they become existential threats.",
-        r"Pre-sell services with milestone-based billing to fund delivery without dipping into operational reserves.",
-        r"Create a “minimum lovable product” that delights early adopters and builds word-of-mouth before scaling.",
-        r"Use customer journey mapping to identify friction points and optimize conversion rates at every stage.",
-        r"Leverage social proof by showcasing user-generated content—real results from real users build trust faster.",
-        r"Create a “value ladder” of offerings that ascend in price and complexity, guiding customers to higher-value solutions.",
-        r"Use scarcity tactics like limited-time offers or exclusive access to drive urgency and increase conversions.",
-        r"Automate lead qualification with chatbots that ask key questions and route prospects to the right sales rep.",
-        r"Use A/B testing to optimize landing pages, email campaigns, and ad creatives for maximum conversion.",
-        r"Create a content syndication strategy to distribute your expertise across multiple platforms and reach new audiences.",
-        r"Build a community around your brand—engage users in forums, social media, or Slack/Discord channels to foster loyalty and advocacy.",
-        r"Factor invoices through fintech platforms to unlock cash early and reinvest before competitors even collect.",
-        r"Split your bank accounts into profit-first envelopes—automate transfers to isolate savings from operational burn.",
-        r"Use dynamic pricing algorithms that adjust based on demand signals, urgency, and customer segmentation tags.",
-        r"Automate onboarding with conditional logic forms that route clients into tailored flows based on budget or goals.",
-        r"Use n8n or Zapier to auto-generate invoices from form submissions and log them in your finance tracker.",
-        r"Build a shadow CRM using Google Sheets and Apps Script—lightweight, scalable, and fully customizable.",
-        r"Track internal assets using QR codes linked to Google Sheets for real-time inventory and location updates.",
-        r"Auto-assign tasks based on keywords in incoming emails using a simple NLP classifier and webhook trigger.",
-        r"Create a content calendar with Trello or Notion—visualize themes, deadlines, and publishing cadence.",
-        r"Bundle your core service with complementary tools or templates to increase perceived value and reduce churn.",
-        r"Create limited-edition versions of your product with countdown timers to drive urgency and exclusivity.",
-        r"Use LaTeX to generate premium-looking invoices and reports that signal professionalism and justify pricing.",
-        r"Offer white-label versions of your product to agencies who want to resell without building from scratch.",
-        r"Use feedback loops to evolve pricing tiers based on actual usage patterns and customer willingness to pay.",
-        r"Use Reddit and Quora to answer niche questions with embedded CTAs—organic traffic with high conversion intent.",
-        r"Turn micro case studies into carousel posts for LinkedIn—each slide a hook, each metric a proof.",
-        r"Pay users to post about your product instead of influencers—authenticity scales better than reach.",
-        r"Build a referral engine with double-sided rewards and automated tracking—turn every customer into a marketer.",
-        r"Use UTM parameters religiously to track every campaign, every click, and every conversion path across platforms.",
-        r"Use async video onboarding to reduce training time and standardize knowledge transfer across remote hires.",#
-        r"Create a skill matrix for hiring decisions—map roles to capabilities, not just resumes or degrees.",
-        r"Assign trial tasks before full-time offers—filter for execution, not just interview performance.",
-        r"Automate payroll using conditional logic—trigger bonuses, deductions, and compliance filings without manual effort.",
-        r"Build an internal wiki for SOPs—make tribal knowledge searchable, editable, and version-controlled.",
-        r"Offer micro-equity to retain top talent—align incentives without diluting control or burning cash.",
-        r"Gamify performance dashboards—turn KPIs into scoreboards that drive engagement and accountability.",
-        r"Maintain a “talent pool” of pre-vetted freelancers—scale instantly without recruitment lag.",
-        r"Create a “no-code” version of your product for non-technical users—expand your market without alienating devs.",
-        r"Use AI to screen resumes by skill tags—filter for relevance, not keyword stuffing.",
-        r"Automate feedback collection post-project—use forms and sentiment analysis to improve delivery cycles.",
-        r"Sell unused domain names—your parked assets could be someone’s dream brand, and a quick cash win.",
-        r"Create a business-in-a-box template—package your operations, branding, and SOPs for resale or licensing.", 
-        r"Use browser automation to scrape competitor pricing—stay ahead of market shifts without manual tracking.",
-        r"Offer lifetime deals to fund early growth—front-load cash flow while building a loyal user base.",
-        r"Run reverse auctions for vendor selection—let suppliers compete to offer you the best terms.",
-        r"Test demand with a ghost product—launch a landing page before building anything to validate interest.",
-        r"Simulate customer support with AI before hiring—train bots on FAQs and escalate only when needed.",
-        r"Build internal micro-SaaS tools, then sell them—your ops solution might be someone else’s missing piece.",
-        r"Turn your analytics into a product—offer dashboards or insights as a service to clients.",
-        r"Create a profitability simulator—let clients model ROI before buying, increasing trust and conversion.",
-        r"Use decision trees for client onboarding—route leads based on budget, urgency, and service fit.",
-        r"Build a modular business model—each unit should be plug-and-play, scalable, and independently profitable.",    
-        r"Design your org chart around workflows, not hierarchy—optimize for throughput, not titles.",
-        r"Use time-blocking for team operations—batch similar tasks to reduce context switching and increase velocity.",
-        r"Create a “fail-fast” sandbox—test risky ideas in isolated environments before scaling.",
-        r"Use version-controlled business plans—track pivots, assumptions, and learnings like a codebase.",
-        r"Build a KPI tree—map every metric to its upstream driver and downstream impact.",
-        r"Automate decision logging—record why choices were made to avoid repeating mistakes.",
-        r"Use a “one-page strategy” doc—distill your entire business model into a visual map.",
-        r"Create a feedback flywheel—every customer touchpoint should feed insights back into product or ops.",
-        r"Trademark your internal frameworks—protect your methodology as intellectual capital.",
-        r"License your onboarding flow to other agencies—turn your process into a revenue stream.",
-        r"Create a proprietary scoring system—use it to evaluate clients, deals, or product fit.",
-        r"Build a data moat—aggregate unique insights that competitors can’t easily replicate.",
-        r"Use naming conventions as brand assets—own the language your market uses to describe your solution.",
-        r"Integrate with platforms your users already love—reduce friction and increase adoption.",
-        r"Offer embeddable widgets—let users bring your product into their own workflows.",
-        r"Create a Zapier or n8n connector—unlock automation for power users and agencies.",
-        r"Use webhooks to trigger external workflows—extend your product’s reach without building everything.",
-        r"Build a plugin for a popular CMS or IDE—ride the wave of existing ecosystems.",
-        r"Use the “regret minimization” framework for decisions—ask what future-you would wish you’d done.",
-        r"Apply the “inversion” principle—ask how to fail, then avoid those paths deliberately.",
-        r"Use the “barbell strategy”—balance safe bets with high-risk, high-reward experiments.",
-        r"Apply the “80/20 of the 80/20”—find the 4% of actions that drive 64% of results.",
-        r"Use “second-order thinking”—consider not just the immediate impact, but the ripple effects.",
-        r"Build with exit in mind—structure your business so it can be sold, licensed, or franchised.",
-        r"Create a valuation dashboard—track metrics that investors or acquirers care about.",
-        r"Use deferred revenue models—lock in future cash flow while optimizing tax timing.",
-        r"License your brand to regional operators—expand without managing every location.", 
-        r"Create a “silent partner” model—let others run your playbook while you earn passive income.",
-        r"Document everything as if you’ll sell tomorrow—clarity and structure increase valuation instantly."
-    ]
-    i = r.randint(0, len(tips) - 1)
-    print("Pro Tip: \n" + tips[i])
-
-
-def printMoneyFlowChart():#outline for moneyMonitor Module and its part
-    print('''
-Inflow:
-1)    Sales Revenue
-2)    Customer Prepayments
-3)    Royalties & Licensing
-4)    Investment Returns
-5)    Grants & Subsidies
-6)    Financing Activities
-7)    Asset Liquidation
-8)    Affiliate/Referral
-Outflow:
-    Needs:
-    9)    Rent & Utilities
-    10)   Salaries & Wages
-    11)   Software Licenses
-    12)   Raw Materials / Inventory
-    13)   Taxes & Compliance  
-    14)   Insurance
-    Wants:
-    15)   Branding & Design
-    16)   Team Retreats / Perks
-    17)   Premium Tools
-    18)   Marketing Campaigns
-    19)   Office Decor / Furniture
-    Investments:
-    20)   R&D
-    21)   Capital Expenditure
-    22)   Hiring for Scale
-    23)   Market Expansion
-    24)   Training & Upskilling
-    25)   Data Infrastructure
-''')
-
-def getMoneyData():
-    pass
-
-def getInvoiceData():
-    pass
-
-def productivityCalculator(hrsWorkedPerDay=None, profitPerMonth=None):
-    """Calculate and return productivity percentage. If params not provided, prompt user."""
-    if hrsWorkedPerDay is None:
-        hrsWorkedPerDay = int(input("Enter hrs Worked Per Day:"))
-    if profitPerMonth is None:
-        profitPerMonth = int(input("Enter profit Per Month:"))
-    
-    if hrsWorkedPerDay == 0:
-        return 0.0
-    industrialAvg = 5411.0   # industrial average productivity in ₹/hr
-    yourRate = (profitPerMonth / 30.0) / float(hrsWorkedPerDay)
-    productivity = ((yourRate / industrialAvg) * 100.0)
-    
-    # Print if parameters were provided (not in test mode)
-    print(f"Your productivity is {productivity:.2f}%")
-    if yourRate < industrialAvg:
-        print(f"You are at ₹{(profitPerMonth/30):.2f} i.e. below the industrial average of ₹{industrialAvg}.\n")
-    elif yourRate > industrialAvg:
-        print(f"You are at ₹{(profitPerMonth/30):.2f} i.e. above the industrial average of ₹{industrialAvg}.\n")
-    else:
-        print(f"You are at ₹{(profitPerMonth/30):.2f} i.e. meeting the industrial average of ₹{industrialAvg}.\n")
-    proTip()
-    
-    return productivity
-
-
-def compileInvoiceGenerator():
-    import subprocess
-    createInvoice()
-    # Assuming the last generated invoice is the one to record
-    print("----- INVOICE gENERATOR -----")
-    invoice_number = fields.get('invoiceNumber', '0000').replace('/', '-')
-    output_tex_file = f'invoice_{invoice_number}.tex'
-    recordInvoice(output_tex_file)
-    
-    # Compile .tex to .pdf using pdflatex
-    base_dir = r"C:\Users\aditk\Desktop\Solo Entrepreneur ToolKit"
-    tex_path = os.path.join(base_dir, output_tex_file)
-    
-    if not os.path.exists(tex_path):
-        print(f"ERROR: {tex_path} not found.")
-        return
-    
-    # Run pdflatex twice (first pass for references, second for final output)
-    for run in range(1, 3):
-        print(f"\nCompiling (pass {run}/2)...")
-        try:
-            result = subprocess.run(
-                ['pdflatex', '-interaction=nonstopmode', '-halt-on-error', output_tex_file],
-                cwd=base_dir,
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-            if result.returncode != 0:
-                print(f"ERROR (pass {run}): pdflatex failed.")
-                print(result.stdout[-500:] if len(result.stdout) > 500 else result.stdout)
-                if result.stderr:
-                    print(result.stderr[-500:] if len(result.stderr) > 500 else result.stderr)
-                return
-        except Exception as e:
-            print(f"ERROR: Failed to run pdflatex: {e}")
-            return
-    
-    pdf_file = output_tex_file.replace('.tex', '.pdf')
-    pdf_path = os.path.join(base_dir, pdf_file)
-    if os.path.exists(pdf_path):
-        print(f"\n✅ PDF generated successfully: {pdf_path}")
-    else:
-        print(f"WARNING: PDF file not found at {pdf_path}")
-    
-def moneyMonitor():
-    print("----- MONEY MONITOR -----")
-    printMoneyFlowChart()
-    choice = int(input("Enter the number of your category: "))
-
-    categories = [
-        "Sales Revenue",
-        "Customer Prepayments",
-        "Royalties & Licensing",
-        "Investment Returns",
-        "Grants & Subsidies",
-        "Financing Activities",
-        "Asset Liquidation",
-        "Affiliate/Referral",
-        "Rent & Utilities",
-        "Salaries & Wages",
-        "Software Licenses",
-        "Raw Materials / Inventory",
-        "Taxes & Compliance",
-        "Insurance",
-        "Branding & Design",
-        "Team Retreats / Perks",
-        "Premium Tools",
-        "Marketing Campaigns",
-        "Office Decor / Furniture",
-        "R&D",
-        "Capital Expenditure",
-        "Hiring for Scale",
-        "Market Expansion",
-        "Training & Upskilling",
-        "Data Infrastructure"
-    ]
-
-    category = categories[choice-1]
-    amount = input("Enter amount: ")
-    note="None"
-    note = input("Enter note: ")
-
-    with open("C:\\Users\\aditk\\Desktop\\Solo Entrepreneur ToolKit\\moneyFlow.csv", "a") as f:
-        f.write(f"{dt.datetime.now()},{amount},{category},{note}\n")
-
-    print(f"\n Entry saved successfully under '{category}' category!\n")
-    f.close()
-
-
-
-
-def taxCalculator():
-    print("----- TAX CALCULATOR -----")
-
-    income = float(input("enter your yearly income (in ₹): "))
-
-    standard_deduction = 50000
-    print("standard deduction of ₹", standard_deduction, "is applied.")
-
-    investment_deduction = float(input("enter investment under 80C (max ₹150000): "))
-    if investment_deduction > 150000:
-        investment_deduction = 150000
-        print("only ₹150000 allowed under 80C, taking that.")
-
-    health_insurance = float(input("enter health insurance premium under 80D (max ₹25000): "))
-    if health_insurance > 25000:
-        health_insurance = 25000
-        print("only ₹25000 allowed under 80D, taking that.")
-
-    total_deductions = standard_deduction + investment_deduction + health_insurance
-    print("total deductions applied: ₹", total_deductions)
-
-    taxable_income = income - total_deductions
-    if taxable_income < 0:
-        taxable_income = 0
-    print("taxable income: ₹", taxable_income)
-
-    tax = 0
-    if taxable_income <= 250000:
-        tax = 0
-    elif taxable_income <= 500000:
-        tax = (taxable_income - 250000) * 0.05
-    elif taxable_income <= 1000000:
-        tax = (250000 * 0.05) + (taxable_income - 500000) * 0.20
-    else:
-        tax = (250000 * 0.05) + (500000 * 0.20) + (taxable_income - 1000000) * 0.30
-
-    if taxable_income <= 500000:
-        print("rebate under section 87A applied.")
-        tax = 0
-
-    print("--------------------------------")
-    print("final income tax payable: ₹", round(tax, 2))
-    print("--------------------------------")
-    print("Note:")
-    print("- keep all proofs for deductions claimed.")
-    print("- file ITR-3 or ITR-4 as applicable.")
-    print("- consider GST registration if turnover > ₹20 lakh.")
-    print("--------------------------------")
-
-
-if __name__ == "__main__":
-    while True:
-            print("""
-    Welcome to Solo Entrepreneur Toolkit\nMenu
-    1) Invoice Generator
-    2) Tax Calculator
-    3) Productivity Calculator
-    4) Money Monitor
-    5) Exit
-    """)
-            choice = input("Choose an option (1-5): ")
-            if choice == '1':
-                compileInvoiceGenerator()
-            elif choice == '2':
-                taxCalculator()
-            elif choice == '3':
-                productivityCalculator()
-            elif choice == '4':
-                moneyMonitor()
-            elif choice == '5':
-                print("Exiting.\nHave a nice time ahead.")
-                break
-            else:
-                print("Invalid option. Please choose between 1 and 5.")
+    telemetry.stop_exporter()
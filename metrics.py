@@ -0,0 +1,333 @@
+import bisect
+import contextlib
+import http.server
+import math
+import os
+import threading
+import time
+
+
+# Upper bounds in seconds, from a fast ledger append up to a stuck xelatex run
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+SUMMARY_QUANTILES = (0.5, 0.95, 0.99)
+
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def label_text(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in pairs) + "}"
+
+
+class CounterValue:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+
+class GaugeValue:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0
+        self.function = None
+
+    def set(self, value):
+        with self.lock:
+            self.value = value
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set_function(self, function):
+        """Read the value from function() at each scrape; a None result leaves the sample out."""
+        self.function = function
+
+    def read(self):
+        if self.function is None:
+            return self.value
+        try:
+            return self.function()
+        except Exception:
+            return None  # a broken probe must not take the whole scrape down
+
+
+class HistogramValue:
+    """Counts per fixed bucket plus a running sum; observe() is one bisect and one short lock."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.lock = threading.Lock()
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextlib.contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self):
+        """(cumulative counts per bound, with +Inf last; sum)."""
+        with self.lock:
+            counts, total = list(self.counts), self.sum
+        running, cumulative = 0, []
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total
+
+    def quantile(self, q, cumulative=None):
+        """Estimate of the q-quantile, interpolated within its bucket as Prometheus' histogram_quantile() does."""
+        if cumulative is None:
+            cumulative, _ = self.snapshot()
+        count = cumulative[-1]
+        if not count:
+            return None
+        rank = q * count
+        index = bisect.bisect_left(cumulative, rank)
+        if index >= len(self.bounds):
+            return self.bounds[-1]  # beyond the last bound: all that can be said
+        lower = self.bounds[index - 1] if index else 0.0
+        below = cumulative[index - 1] if index else 0
+        in_bucket = cumulative[index] - below
+        return lower + (self.bounds[index] - lower) * ((rank - below) / in_bucket if in_bucket else 1)
+
+
+class Metric:
+    """A named family of values, one per combination of label values."""
+
+    kind = "untyped"
+    value_class = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def labels(self, *values):
+        values = tuple(str(value) for value in values)
+        value = self.values.get(values)
+        if value is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}.")
+            with self.lock:
+                value = self.values.setdefault(values, self.make_value())
+        return value
+
+    def make_value(self):
+        return self.value_class()
+
+    def __getattr__(self, name):
+        # Unlabelled metrics: counter.inc(), histogram.observe(), ... go to the single value
+        if name.startswith("_") or self.labelnames:
+            raise AttributeError(name)
+        return getattr(self.labels(), name)
+
+    def samples(self):
+        """(suffix, label text, value) for each line of the exposition."""
+        with self.lock:
+            items = list(self.values.items())
+        for values, value in items:
+            reading = value.read() if self.kind == "gauge" else value.value
+            if reading is not None:
+                yield "", label_text(self.labelnames, values), reading
+
+
+class Counter(Metric):
+    kind = "counter"
+    value_class = CounterValue
+
+
+class Gauge(Metric):
+    kind = "gauge"
+    value_class = GaugeValue
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def make_value(self):
+        return HistogramValue(self.bounds)
+
+    def samples(self):
+        with self.lock:
+            items = list(self.values.items())
+        for values, value in items:
+            cumulative, total = value.snapshot()
+            for bound, count in zip((*self.bounds, math.inf), cumulative):
+                yield "_bucket", label_text(self.labelnames, values, [("le", format_value(bound))]), count
+            yield "_sum", label_text(self.labelnames, values), total
+            yield "_count", label_text(self.labelnames, values), cumulative[-1]
+
+    def quantiles(self):
+        """{label values: {q: estimate}} for SUMMARY_QUANTILES, for people reading the file by eye."""
+        with self.lock:
+            items = list(self.values.items())
+        result = {}
+        for values, value in items:
+            cumulative, _ = value.snapshot()
+            if cumulative[-1]:
+                result[values] = {q: value.quantile(q, cumulative) for q in SUMMARY_QUANTILES}
+        return result
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"A metric called {metric.name} is already registered.")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.add(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self.add(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.add(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self, with_quantiles=False):
+        """Prometheus text exposition format (0.0.4).
+
+        with_quantiles adds comment lines estimating p50/p95/p99 of each
+        histogram; scrapers skip comments, so the output stays valid.
+        """
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{labels} {format_value(value)}")
+            if with_quantiles and metric.kind == "histogram":
+                for values, estimates in metric.quantiles().items():
+                    text = " ".join(f"p{round(q * 100)}={estimate:.3f}s" for q, estimate in estimates.items())
+                    lines.append(f"# {metric.name}{label_text(metric.labelnames, values)} {text}")
+        return "\n".join(lines) + "\n"
+
+
+class Exporter:
+    """Rewrites a .prom file every `interval` seconds and, given a port, serves GET /metrics on loopback.
+
+    The file is replaced atomically, so a textfile collector or a person
+    with `cat` never sees half of it. Taking the port is best effort: when
+    another process already has it, only the file is written.
+    """
+
+    def __init__(self, registry, path=None, interval=15, host="127.0.0.1", port=None):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.host = host
+        self.port = port
+        self.stopping = threading.Event()
+        self.thread = None
+        self.server = None
+        self.server_thread = None
+
+    def write(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(self.registry.render(with_quantiles=True))
+        os.replace(temp_path, self.path)
+
+    def start(self):
+        if self.thread is not None or self.server is not None:
+            return
+        self.stopping.clear()
+        if self.port is not None:
+            self._serve()
+        if self.path:
+            self.thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+            self.thread.start()
+
+    def stop(self, timeout=5):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            self.server_thread = None
+
+    def _serve(self):
+        registry = self.registry
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self.server = http.server.ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError:
+            return  # port taken, most likely by another copy of the app
+        self.server.daemon_threads = True
+        self.server_thread = threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True)
+        self.server_thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.write()
+            except OSError:
+                pass  # tried again next round
+            if self.stopping.wait(self.interval):
+                break
+        try:
+            self.write()  # last word on the way out
+        except OSError:
+            pass
@@ -0,0 +1,229 @@
+import datetime as dt
+import http.client
+import json
+import os
+import random
+import threading
+import urllib.parse
+
+import secure_store
+
+
+DEFAULT_BATCH_SIZE = 500
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 300.0
+# Other processes append too; an idle dispatcher looks at the log this often
+IDLE_POLL_SECONDS = 1.0
+HTTP_TIMEOUT = 10
+
+
+class DeliveryError(Exception):
+    pass
+
+
+def json_default(value):
+    if isinstance(value, (dt.date, dt.datetime)):
+        return value.isoformat()
+    return str(value)  # Decimal amounts and anything else stay exact as text
+
+
+class Outbox:
+    """Append-only JSON-lines log of invoice and ledger events.
+
+    An event's id is the byte offset its line starts at, so ids are unique,
+    increase with time and need no counter of their own; the offset is read
+    with a lock held across processes, so two writers cannot both take it.
+    Listeners (one threading.Event per dispatcher thread) are set after
+    every append.
+
+    Writers append an event just after the row it describes, while still
+    holding that file's lock. A crash between the two keeps the row and
+    loses its event: recording is at most once for that window.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.listeners = []
+
+    def append(self, events):
+        """Append [(type, data)] in one write; returns the new event ids."""
+        if not events:
+            return []
+        now = dt.datetime.now().isoformat(timespec="seconds")
+        with self.lock, secure_store.file_lock(self.path + ".lock"):
+            offset = secure_store.getsize(self.path) if os.path.exists(self.path) else 0
+            ids, lines = [], []
+            for event_type, data in events:
+                line = json.dumps(
+                    {"id": offset, "type": event_type, "time": now, "data": data},
+                    default=json_default,
+                    ensure_ascii=False,
+                    separators=(",", ":"),
+                ).encode("utf-8") + b"\n"
+                ids.append(offset)
+                lines.append(line)
+                offset += len(line)
+            with secure_store.open(self.path, "ab") as log_file:
+                log_file.write(b"".join(lines))
+        for listener in list(self.listeners):
+            listener.set()
+        return ids
+
+    def size(self):
+        return secure_store.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def read(self, offset, limit):
+        """Up to `limit` (event, next_offset) pairs from offset; a half-written last line is left for later."""
+        if not os.path.exists(self.path):
+            return []
+        found = []
+        with secure_store.open(self.path, "rb") as log_file:
+            log_file.seek(offset)
+            while len(found) < limit:
+                line = log_file.readline()
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                try:
+                    found.append((json.loads(line), offset))
+                except ValueError:
+                    continue  # a damaged line is skipped rather than blocking every later event
+        return found
+
+
+class Dispatcher:
+    """Delivers outbox events to webhook endpoints in batches, at least once.
+
+    Each endpoint gets its own thread and keep-alive connection, so a slow
+    or failing receiver never holds up the others or the writers. A batch
+    is POSTed as {"events": [...]}; any 2xx advances the endpoint's
+    checkpoint (the next log offset to send), anything else is retried with
+    exponential backoff and jitter. Receivers should ignore event ids they
+    have already seen.
+
+    Endpoints are dicts: {"name", "url", "events": [types] (optional),
+    "headers": {...} (optional), "replay": True to start from the first
+    event instead of the end of the log}.
+    """
+
+    def __init__(self, outbox, checkpoint_path, endpoints, batch_size=DEFAULT_BATCH_SIZE):
+        self.outbox = outbox
+        self.checkpoint_path = checkpoint_path
+        self.endpoints = list(endpoints)
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.threads = []
+        self.state = {}
+        self.checkpoints = {}
+        if os.path.exists(checkpoint_path):
+            try:
+                with open(checkpoint_path, "r", encoding="utf-8") as checkpoint_file:
+                    self.checkpoints = {name: int(offset) for name, offset in json.load(checkpoint_file).items()}
+            except (OSError, ValueError, TypeError, AttributeError):
+                self.checkpoints = {}
+
+    def start(self):
+        if self.threads:
+            return
+        self.stopping.clear()
+        for endpoint in self.endpoints:
+            thread = threading.Thread(target=self._run, args=(endpoint,), name=f"webhook-{endpoint['name']}", daemon=True)
+            self.threads.append(thread)
+            thread.start()
+
+    def stop(self, timeout=5):
+        self.stopping.set()
+        for listener in list(self.outbox.listeners):
+            listener.set()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def status(self):
+        size = self.outbox.size()
+        with self.lock:
+            return {
+                endpoint["name"]: dict(
+                    self.state.get(endpoint["name"], {}),
+                    offset=self.checkpoints.get(endpoint["name"], 0),
+                    pending_bytes=max(size - self.checkpoints.get(endpoint["name"], 0), 0),
+                )
+                for endpoint in self.endpoints
+            }
+
+    def _save_checkpoint(self, name, offset):
+        with self.lock:
+            self.checkpoints[name] = offset
+            temp_path = self.checkpoint_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as checkpoint_file:
+                json.dump(self.checkpoints, checkpoint_file, indent=2, sort_keys=True)
+            os.replace(temp_path, self.checkpoint_path)
+
+    def _run(self, endpoint):
+        name = endpoint["name"]
+        wanted = set(endpoint.get("events") or ())
+        wake = threading.Event()
+        self.outbox.listeners.append(wake)
+        offset = self.checkpoints.get(name)
+        if offset is None:
+            offset = 0 if endpoint.get("replay") else self.outbox.size()
+            self._save_checkpoint(name, offset)
+        connection, failures = None, 0
+        try:
+            while not self.stopping.is_set():
+                wake.clear()
+                if offset > self.outbox.size():
+                    offset = 0  # the log was replaced
+                found = self.outbox.read(offset, self.batch_size)
+                if not found:
+                    wake.wait(IDLE_POLL_SECONDS)
+                    continue
+                batch = [event for event, _ in found if not wanted or event.get("type") in wanted]
+                if batch:
+                    try:
+                        connection = self._post(connection, endpoint, batch)
+                    except (OSError, http.client.HTTPException, DeliveryError) as exc:
+                        if connection is not None:
+                            connection.close()
+                        connection = None
+                        failures += 1
+                        delay = min(RETRY_BASE_DELAY * 2 ** (failures - 1), RETRY_MAX_DELAY) * random.uniform(0.5, 1)
+                        with self.lock:
+                            self.state.setdefault(name, {}).update(
+                                failures=failures, last_error=str(exc), retry_in=round(delay, 1)
+                            )
+                        self.stopping.wait(delay)
+                        continue
+                    failures = 0
+                    with self.lock:
+                        state = self.state.setdefault(name, {})
+                        state["delivered"] = state.get("delivered", 0) + len(batch)
+                        state["failures"] = 0
+                        state.pop("retry_in", None)
+                offset = found[-1][1]
+                self._save_checkpoint(name, offset)
+        finally:
+            self.outbox.listeners.remove(wake)
+            if connection is not None:
+                connection.close()
+
+    def _post(self, connection, endpoint, batch):
+        url = urllib.parse.urlsplit(endpoint["url"])
+        if connection is None:
+            connection_class = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+            connection = connection_class(url.hostname, url.port, timeout=HTTP_TIMEOUT)
+        body = json.dumps({"events": batch}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        headers = {"Content-Type": "application/json", "Content-Length": str(len(body))}
+        headers.update(endpoint.get("headers") or {})
+        target = (url.path or "/") + (f"?{url.query}" if url.query else "")
+        connection.request("POST", target, body, headers)
+        response = connection.getresponse()
+        response.read()
+        if not 200 <= response.status < 300:
+            raise DeliveryError(f"{endpoint['url']} answered {response.status} {response.reason}")
+        if response.getheader("Connection", "").lower() == "close":
+            connection.close()
+            connection = None
+        return connection
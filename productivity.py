@@ -0,0 +1,197 @@
+import csv
+import datetime as dt
+import os
+import threading
+
+import audit
+import ledger
+import secure_store
+
+
+ROLLING_WINDOWS = (7, 30, 90, 365)
+PERCENTILES = (25, 50, 75, 90)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class ProductivitySeries:
+    """Daily hours worked and ledger profit, with rolling earnings per hour.
+
+    Days are kept as two dense lists from the first day seen, plus running
+    prefix sums, so any window total is two lookups. The prefix sums are only
+    refreshed from the earliest day that changed; new entries land on the
+    last day, which keeps each update O(1) amortised. Both source files are
+    read from the byte offset reached last time; a change to the ledger's
+    audit trail rebuilds the series.
+    """
+
+    def __init__(self, hours_path, ledger_path):
+        self.hours_path = hours_path
+        self.ledger_path = ledger_path
+        self.lock = threading.RLock()
+        self.loaded = False
+        self._reset()
+
+    def _reset(self):
+        self.origin = None
+        self.hours = []
+        self.profit = []
+        self.hours_prefix = [0.0]
+        self.profit_prefix = [0.0]
+        self.dirty_from = 0
+        self.hours_offset = 0
+        self.ledger_offset = 0
+        self.ledger_revision = 0
+
+    def _index(self, day):
+        if self.origin is None:
+            self.origin = day
+        if day < self.origin:
+            padding = (self.origin - day).days
+            self.hours[:0] = [0.0] * padding
+            self.profit[:0] = [0.0] * padding
+            self.origin = day
+            self.dirty_from = 0
+        index = (day - self.origin).days
+        if index >= len(self.hours):
+            padding = index + 1 - len(self.hours)
+            self.hours.extend([0.0] * padding)
+            self.profit.extend([0.0] * padding)
+        self.dirty_from = min(self.dirty_from, index)
+        return index
+
+    def add_hours(self, day, hours):
+        with self.lock:
+            self.hours[self._index(day)] += hours
+
+    def add_profit(self, day, amount):
+        with self.lock:
+            self.profit[self._index(day)] += amount
+
+    def _add_ledger_row(self, row):
+        entry = ledger.parse_ledger_row(row)
+        if entry is None:
+            return
+        amount = float(entry["amount"])
+        self.add_profit(entry["timestamp"].date(), amount if ledger.is_inflow(entry["category"]) else -amount)
+
+    def _add_hours_row(self, row):
+        if len(row) < 2 or row[0] == "date":
+            return
+        try:
+            self.add_hours(dt.date.fromisoformat(row[0].strip()), float(row[1]))
+        except ValueError:
+            return
+
+    def load(self):
+        with self.lock:
+            self._reset()
+            self.ledger_revision = audit.revision(self.ledger_path)
+            self.loaded = True
+            self.sync()
+
+    def sync(self):
+        """Fold in rows appended to the hours log and the ledger since the last sync."""
+        with self.lock:
+            if not self.loaded:
+                self.load()
+                return
+            for path, offset in ((self.hours_path, self.hours_offset), (self.ledger_path, self.ledger_offset)):
+                if (secure_store.getsize(path) if os.path.exists(path) else 0) < offset:
+                    self.load()
+                    return
+            if audit.revision(self.ledger_path) != self.ledger_revision:
+                # A ledger row was voided or corrected, or the ledger compacted
+                self.load()
+                return
+            for row, offset in ledger.iter_csv_rows_from(self.hours_path, self.hours_offset):
+                self._add_hours_row(row)
+                self.hours_offset = offset
+            for row, offset in ledger.iter_csv_rows_from(self.ledger_path, self.ledger_offset):
+                self._add_ledger_row(row)
+                self.ledger_offset = offset
+
+    def log_hours(self, hours, day=None):
+        """Append an hours entry (several per day are summed) and apply it."""
+        if hours <= 0:
+            raise ValueError("Hours worked must be greater than 0.")
+        day = day or dt.date.today()
+        header_needed = not os.path.exists(self.hours_path) or os.path.getsize(self.hours_path) == 0
+        with open(self.hours_path, "a", newline="", encoding="utf-8") as hours_file:
+            writer = csv.writer(hours_file)
+            if header_needed:
+                writer.writerow(["date", "hours"])
+            writer.writerow([day.isoformat(), f"{hours:g}"])
+        self.sync()
+
+    def _refresh(self):
+        if self.dirty_from >= len(self.hours):
+            return
+        del self.hours_prefix[self.dirty_from + 1 :]
+        del self.profit_prefix[self.dirty_from + 1 :]
+        for index in range(self.dirty_from, len(self.hours)):
+            self.hours_prefix.append(self.hours_prefix[-1] + self.hours[index])
+            self.profit_prefix.append(self.profit_prefix[-1] + self.profit[index])
+        self.dirty_from = len(self.hours)
+
+    def _bounds(self, days, end):
+        """[start, stop) list indexes of the `days` days ending on `end`, clipped to the data."""
+        stop = min(max((end - self.origin).days + 1, 0), len(self.hours))
+        start = min(max((end - self.origin).days + 1 - days, 0), stop)
+        return start, stop
+
+    def window(self, days, end=None):
+        """Hours, profit and earnings per hour over the `days` days ending on `end` (inclusive)."""
+        with self.lock:
+            if not self.loaded:
+                self.load()
+            self._refresh()
+            end = end or dt.date.today()
+            if self.origin is None:
+                return {"hours": 0.0, "profit": 0.0, "per_hour": None}
+            start, stop = self._bounds(days, end)
+            hours = self.hours_prefix[stop] - self.hours_prefix[start]
+            profit = self.profit_prefix[stop] - self.profit_prefix[start]
+            return {"hours": hours, "profit": profit, "per_hour": profit / hours if hours else None}
+
+    def daily_rates(self, days, end=None):
+        """(date, profit per hour) for each day with hours logged in the window."""
+        with self.lock:
+            if not self.loaded:
+                self.load()
+            end = end or dt.date.today()
+            if self.origin is None:
+                return []
+            start, stop = self._bounds(days, end)
+            return [
+                (self.origin + dt.timedelta(days=index), self.profit[index] / self.hours[index])
+                for index in range(start, stop)
+                if self.hours[index] > 0
+            ]
+
+    def trend(self, days, end=None):
+        """Change in earnings per hour against the window just before, as a fraction, or None."""
+        end = end or dt.date.today()
+        current = self.window(days, end)["per_hour"]
+        previous = self.window(days, end - dt.timedelta(days=days))["per_hour"]
+        if current is None or not previous:
+            return None
+        return (current - previous) / abs(previous)
+
+    def percentiles(self, days, end=None, percents=PERCENTILES):
+        rates = sorted(rate for _, rate in self.daily_rates(days, end))
+        return {pct: percentile(rates, pct) for pct in percents}
+
+    def summary(self, end=None, windows=ROLLING_WINDOWS):
+        end = end or dt.date.today()
+        rows = []
+        for days in windows:
+            totals = self.window(days, end)
+            rows.append(dict(totals, days=days, trend=self.trend(days, end)))
+        return {"windows": rows, "percentiles": self.percentiles(max(windows), end)}
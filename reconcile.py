@@ -0,0 +1,250 @@
+import bisect
+import collections
+import datetime as dt
+import decimal
+import re
+
+import audit
+import gst
+import invoice_output
+import ledger
+
+
+DEFAULT_TOLERANCE = decimal.Decimal("1.00")
+DEFAULT_WINDOW_DAYS = 90
+RECEIPT_CATEGORIES = ("Sales Revenue",)
+# Words too common in business names to tie a note to one client
+NAME_STOPWORDS = {
+    "and", "the", "pvt", "private", "ltd", "limited", "llp", "inc", "company", "corp", "services",
+    "solutions", "india", "technologies", "enterprises", "payment", "invoice", "received", "from",
+}
+# A word in more client names than this says nothing about who paid
+COMMON_WORD_CLIENTS = 5
+# Note words that could be an invoice number: any run of letters, digits and separators holding a digit
+TOKEN_PATTERN = re.compile(r"[0-9A-Za-z/_.-]*[0-9][0-9A-Za-z/_.-]*")
+PUNCTUATION = re.compile(r"[^0-9A-Z]")
+
+
+def paise(amount):
+    return int(gst.to_paise(decimal.Decimal(amount)) * 100)
+
+
+def rupees(paise_amount):
+    return decimal.Decimal(paise_amount).scaleb(-2)
+
+
+def reference_key(text):
+    """Invoice numbers compared without case or punctuation: "inv-2025/0007" finds INV-2025-0007."""
+    key = PUNCTUATION.sub("", str(text).upper())
+    return key if len(key) >= 3 and any(char.isdigit() for char in key) else ""
+
+
+def client_key(name):
+    return " ".join(str(name).casefold().split())
+
+
+def name_words(text):
+    return {word for word in re.findall(r"[a-z0-9]+", str(text).casefold()) if len(word) >= 3 and word not in NAME_STOPWORDS}
+
+
+def load_invoices(history_path, start=None, end=None):
+    """Invoice history rows (voids and corrections applied) as {"invoiceNumber", "date", "client", "amount"}.
+
+    Rows whose date or amount cannot be read are left out.
+    """
+    invoices, header = [], None
+    for values in audit.current_rows(history_path):
+        if not values:
+            continue
+        if header is None:
+            header = values
+            continue
+        row = dict(zip(header, values))
+        date = invoice_output.parse_invoice_date(row.get("invoiceDate"))
+        if date is None:
+            continue
+        if (start is not None and date < start) or (end is not None and date > end):
+            continue
+        try:
+            amount = gst.to_decimal(row.get("totalAmount"))
+        except ValueError:
+            continue
+        invoices.append(
+            {"invoiceNumber": row.get("invoiceNumber", ""), "date": date, "client": row.get("billToName", ""), "amount": amount}
+        )
+    return invoices
+
+
+def load_receipts(ledger_path, start=None, end=None):
+    """Receipts ({"date", "amount", "note"}) from the ledger's RECEIPT_CATEGORIES rows."""
+    receipts = []
+    for entry in ledger.read_ledger(ledger_path):
+        date = entry["timestamp"].date()
+        if entry["category"] in RECEIPT_CATEGORIES and entry["amount"] > 0:
+            if (start is None or date >= start) and (end is None or date <= end):
+                receipts.append({"date": date, "amount": entry["amount"], "note": entry["note"]})
+    return receipts
+
+
+def reconcile_files(ledger_path, history_path, tolerance=DEFAULT_TOLERANCE, window_days=DEFAULT_WINDOW_DAYS, start=None, end=None):
+    """reconcile() over the invoices dated start..end and the receipts that could pay them."""
+    receipts_end = None if end is None else end + dt.timedelta(days=window_days)
+    return reconcile(
+        load_invoices(history_path, start, end), load_receipts(ledger_path, start, receipts_end), tolerance, window_days
+    )
+
+
+def reconcile(invoices, receipts, tolerance=DEFAULT_TOLERANCE, window_days=DEFAULT_WINDOW_DAYS):
+    """Match receipts to invoices in three passes, never comparing every receipt with every invoice.
+
+    1. "reference": a receipt whose note quotes invoice numbers pays those
+       invoices, found through a hash index of normalised numbers, as long
+       as it is dated no earlier than the invoice. A quoted number is
+       trusted however late the payment, so window_days does not apply.
+    2. "amount": receipts and invoices are both sorted by date and swept
+       together; the open invoices issued within window_days before the
+       receipt sit in a list sorted by amount, so the ones within tolerance
+       of the receipt are found by bisection. If the note names a client,
+       only that client's invoices qualify; the oldest wins.
+    3. "combined" and "partial": a receipt whose note names a client and
+       is still unapplied pays a run of that client's open invoices whose
+       total it matches (two pointers over them in date order), or else is
+       applied to them oldest first.
+
+    invoices are dicts with "invoiceNumber", "date", "client" and "amount";
+    receipts have "date", "amount" and "note". Returns {"allocations",
+    "invoices", "receipts"}: allocations link an invoice and a receipt with
+    the amount applied and the pass that matched them; invoices gain
+    "received", "outstanding" and a "status" of paid, part paid or unpaid;
+    receipts gain "applied", "remaining" and a "status" of matched, part
+    applied or unmatched. Amounts within tolerance of zero count as settled.
+    """
+    tolerance = paise(tolerance)
+    window = dt.timedelta(days=window_days)
+    invoices = sorted(
+        (dict(invoice, outstanding=paise(invoice["amount"]), client_key=client_key(invoice["client"])) for invoice in invoices),
+        key=lambda invoice: invoice["date"],
+    )
+    receipts = sorted((dict(receipt, remaining=paise(receipt["amount"])) for receipt in receipts), key=lambda receipt: receipt["date"])
+    allocations = []
+
+    def allocate(invoice, receipt, amount, method):
+        invoice["outstanding"] -= amount
+        receipt["remaining"] -= amount
+        allocations.append({"invoice": invoice, "receipt": receipt, "amount": amount, "method": method})
+
+    by_reference = {}
+    client_words = collections.defaultdict(set)
+    for invoice in invoices:
+        key = reference_key(invoice["invoiceNumber"])
+        if key:
+            by_reference.setdefault(key, invoice)
+        for word in name_words(invoice["client"]):
+            client_words[word].add(invoice["client_key"])
+    client_words = {word: keys for word, keys in client_words.items() if len(keys) <= COMMON_WORD_CLIENTS}
+    for receipt in receipts:
+        hits = collections.Counter(key for word in name_words(receipt["note"]) for key in client_words.get(word, ()))
+        best = max(hits.values(), default=0)
+        receipt["clients"] = {key for key, count in hits.items() if count == best}
+        receipt["references"] = []
+        for token in TOKEN_PATTERN.findall(str(receipt["note"])):
+            invoice = by_reference.get(reference_key(token))
+            if invoice is not None and invoice not in receipt["references"]:
+                receipt["references"].append(invoice)
+
+    # 1. Quoted invoice numbers
+    for receipt in receipts:
+        for invoice in receipt["references"]:
+            if receipt["date"] < invoice["date"]:
+                continue
+            amount = min(receipt["remaining"], invoice["outstanding"])
+            if amount > 0:
+                allocate(invoice, receipt, amount, "reference")
+
+    # 2. Sweep by date, with the open invoices in the window kept sorted by amount
+    for position, invoice in enumerate(invoices):
+        invoice["position"] = position
+    by_amount, in_window, next_invoice = [], collections.deque(), 0
+    for receipt in receipts:
+        while next_invoice < len(invoices) and invoices[next_invoice]["date"] <= receipt["date"]:
+            invoice = invoices[next_invoice]
+            next_invoice += 1
+            if invoice["outstanding"] > tolerance:
+                invoice["amount_key"] = (invoice["outstanding"], invoice["position"])
+                bisect.insort(by_amount, invoice["amount_key"])
+                in_window.append(invoice)
+        earliest = receipt["date"] - window
+        while in_window and in_window[0]["date"] < earliest:
+            invoice = in_window.popleft()
+            if invoice.get("amount_key") is not None:
+                del by_amount[bisect.bisect_left(by_amount, invoice["amount_key"])]
+                invoice["amount_key"] = None
+        if receipt["remaining"] <= tolerance:
+            continue
+        best = None
+        index = bisect.bisect_left(by_amount, (receipt["remaining"] - tolerance, -1))
+        while index < len(by_amount) and by_amount[index][0] <= receipt["remaining"] + tolerance:
+            invoice = invoices[by_amount[index][1]]
+            if not receipt["clients"] or invoice["client_key"] in receipt["clients"]:
+                if best is None or invoice["position"] < invoices[by_amount[best][1]]["position"]:
+                    best = index
+            index += 1
+        if best is not None:
+            invoice = invoices[by_amount.pop(best)[1]]
+            invoice["amount_key"] = None
+            allocate(invoice, receipt, min(receipt["remaining"], invoice["outstanding"]), "amount")
+
+    # 3. Combined and partial payments from a named client
+    by_client = collections.defaultdict(list)
+    for invoice in invoices:
+        by_client[invoice["client_key"]].append(invoice)
+    client_dates = {key: [invoice["date"] for invoice in client_invoices] for key, client_invoices in by_client.items()}
+    for receipt in receipts:
+        if receipt["remaining"] <= tolerance or not receipt["clients"]:
+            continue
+        earliest = receipt["date"] - window
+        candidates = []
+        for key in receipt["clients"]:
+            dates = client_dates[key]
+            window_slice = by_client[key][bisect.bisect_left(dates, earliest) : bisect.bisect_right(dates, receipt["date"])]
+            candidates.extend(invoice for invoice in window_slice if invoice["outstanding"] > tolerance)
+        candidates.sort(key=lambda invoice: invoice["position"])
+        run = combined_run(candidates, receipt["remaining"], tolerance)
+        if run:
+            for invoice in run:
+                allocate(invoice, receipt, min(receipt["remaining"], invoice["outstanding"]), "combined")
+            continue
+        for invoice in candidates:
+            if receipt["remaining"] <= tolerance:
+                break
+            allocate(invoice, receipt, min(receipt["remaining"], invoice["outstanding"]), "partial")
+
+    for invoice in invoices:
+        total = paise(invoice["amount"])
+        invoice["status"] = "paid" if invoice["outstanding"] <= tolerance else "part paid" if invoice["outstanding"] < total else "unpaid"
+        invoice["received"] = rupees(total - invoice["outstanding"])
+        invoice["outstanding"] = rupees(max(invoice["outstanding"], 0))
+        for key in ("client_key", "position", "amount_key"):
+            invoice.pop(key, None)
+    for receipt in receipts:
+        total = paise(receipt["amount"])
+        receipt["status"] = "matched" if receipt["remaining"] <= tolerance else "part applied" if receipt["remaining"] < total else "unmatched"
+        receipt["applied"] = rupees(total - receipt["remaining"])
+        receipt["remaining"] = rupees(max(receipt["remaining"], 0))
+        del receipt["clients"], receipt["references"]
+    for allocation in allocations:
+        allocation["amount"] = rupees(allocation["amount"])
+    return {"allocations": allocations, "invoices": invoices, "receipts": receipts}
+
+
+def combined_run(invoices, target, tolerance):
+    """Two or more consecutive invoices whose outstanding amounts add up to target, or None."""
+    start, total = 0, 0
+    for end, invoice in enumerate(invoices):
+        total += invoice["outstanding"]
+        while total > target + tolerance and start <= end:
+            total -= invoices[start]["outstanding"]
+            start += 1
+        if end > start and abs(total - target) <= tolerance:
+            return invoices[start : end + 1]
+    return None
@@ -0,0 +1,355 @@
+import csv
+import datetime as dt
+import decimal
+import json
+import os
+
+import audit
+import gst
+import invoice_output
+import invoice_pdf
+import ledger
+import reconcile
+import secure_store
+
+
+ZERO = decimal.Decimal("0")
+CHUNK_ROWS = 1000
+REPORT_FORMATS = ("csv", "json", "pdf")
+PNL_COLUMNS = ["Period", "Income", "Needs", "Wants", "Investments", "Other Expenses", "Total Expenses", "Net"]
+EXPENSE_GROUPS = ["Needs", "Wants", "Investments", "Other Expenses"]
+CATEGORY_COLUMNS = ["Group", "Category", "Amount", "Share of Group"]
+GROUP_ORDER = ["Inflow", "Other Income", *EXPENSE_GROUPS]
+CATEGORY_ORDER = {category: index for index, category in enumerate(ledger.CATEGORIES)}
+
+
+def in_range(date, start, end):
+    return (start is None or date >= start) and (end is None or date <= end)
+
+
+def ledger_entries(ledger_path, start=None, end=None):
+    for entry in ledger.read_ledger(ledger_path):
+        if in_range(entry["timestamp"].date(), start, end):
+            yield entry
+
+
+def period_key(date, period):
+    """(year, month) of a calendar month, or (first year, 4) of a financial year."""
+    if period == "month":
+        return (date.year, date.month)
+    return (date.year if date.month >= 4 else date.year - 1, 4)
+
+
+def period_label(key, period):
+    year, month = key
+    return f"{year:04d}-{month:02d}" if period == "month" else f"FY {ledger.financial_year(dt.date(year, month, 1))}"
+
+
+def add_to_pnl(totals, key, entry):
+    groups = totals.get(key)
+    if groups is None:
+        groups = totals[key] = dict.fromkeys(["Income", *EXPENSE_GROUPS], ZERO)
+    group = ledger.category_group(entry["category"])
+    groups["Income" if group in ("Inflow", "Other Income") else group] += entry["amount"]
+
+
+def profit_and_loss(ledger_path, period="month", start=None, end=None):
+    """Income and expenses by group per calendar month or financial year, with a total row.
+
+    One pass over the ledger; only one running total per (period, group) is kept.
+    """
+    if period not in ("month", "year"):
+        raise ValueError("P&L period must be 'month' or 'year'.")
+    totals = {}
+    for entry in ledger_entries(ledger_path, start, end):
+        add_to_pnl(totals, period_key(entry["timestamp"], period), entry)
+    title = "Monthly Profit & Loss" if period == "month" else "Annual Profit & Loss"
+    return {"title": title, "columns": PNL_COLUMNS, "rows": pnl_rows(totals, period)}
+
+
+def pnl_rows(totals, period):
+    grand = dict.fromkeys(["Income", *EXPENSE_GROUPS], ZERO)
+    for key in sorted(totals):
+        groups = totals[key]
+        for name, value in groups.items():
+            grand[name] += value
+        yield pnl_row(period_label(key, period), groups)
+    yield pnl_row("Total", grand)
+
+
+def pnl_row(label, groups):
+    expenses = sum((groups[name] for name in EXPENSE_GROUPS), ZERO)
+    return [label, groups["Income"], *(groups[name] for name in EXPENSE_GROUPS), expenses, groups["Income"] - expenses]
+
+
+def category_breakdown(ledger_path, start=None, end=None):
+    """Totals per category under the Inflow / Needs / Wants / Investments groups of the money-flow chart."""
+    totals = {}
+    for entry in ledger_entries(ledger_path, start, end):
+        key = (ledger.category_group(entry["category"]), entry["category"])
+        totals[key] = totals.get(key, ZERO) + entry["amount"]
+    return {"title": "Category Breakdown", "columns": CATEGORY_COLUMNS, "rows": category_rows(totals)}
+
+
+def category_rows(totals):
+    for group in GROUP_ORDER:
+        categories = sorted(
+            ((category, amount) for (name, category), amount in totals.items() if name == group),
+            key=lambda pair: (CATEGORY_ORDER.get(pair[0], len(CATEGORY_ORDER)), pair[0]),
+        )
+        if not categories:
+            continue
+        group_total = sum((amount for _, amount in categories), ZERO)
+        for category, amount in categories:
+            share = amount * 100 / group_total if group_total else ZERO
+            yield [group, category, amount, f"{share:.1f}%"]
+        yield [group, f"Total {group}", group_total, "100.0%"]
+
+
+def workspace_summary(ledger_path, start=None, end=None, passphrases=None):
+    """One business's partial totals for the consolidated reports, in one pass over its ledger.
+
+    Runs in a worker process, so the result is plain picklable data: P&L
+    group totals per month and totals per (group, category). passphrases
+    ({path: passphrase}) unlock encrypted files in the worker.
+    """
+    for path, passphrase in (passphrases or {}).items():
+        secure_store.protect(path, passphrase)
+    months, categories = {}, {}
+    for entry in ledger_entries(ledger_path, start, end):
+        add_to_pnl(months, period_key(entry["timestamp"], "month"), entry)
+        key = (ledger.category_group(entry["category"]), entry["category"])
+        categories[key] = categories.get(key, ZERO) + entry["amount"]
+    return {"months": months, "categories": categories}
+
+
+def consolidated_profit_and_loss(summaries, period="year"):
+    """Every business's P&L merged per period, then each business's own totals, then the grand total.
+
+    summaries maps business name to its workspace_summary().
+    """
+    if period not in ("month", "year"):
+        raise ValueError("P&L period must be 'month' or 'year'.")
+    merged = {}
+    for summary in summaries.values():
+        for month, groups in summary["months"].items():
+            key = period_key(dt.date(month[0], month[1], 1), period)
+            totals = merged.setdefault(key, dict.fromkeys(["Income", *EXPENSE_GROUPS], ZERO))
+            for name, value in groups.items():
+                totals[name] += value
+
+    def rows():
+        for row in pnl_rows(merged, period):
+            if row[0] != "Total":
+                yield row
+        grand = dict.fromkeys(["Income", *EXPENSE_GROUPS], ZERO)
+        for name in sorted(summaries):
+            business = dict.fromkeys(["Income", *EXPENSE_GROUPS], ZERO)
+            for groups in summaries[name]["months"].values():
+                for group, value in groups.items():
+                    business[group] += value
+                    grand[group] += value
+            yield pnl_row(f"Business: {name}", business)
+        yield pnl_row("Total", grand)
+
+    title = "Consolidated Monthly Profit & Loss" if period == "month" else "Consolidated Profit & Loss"
+    return {"title": title, "columns": PNL_COLUMNS, "rows": rows()}
+
+
+def consolidated_category_breakdown(summaries):
+    """category_breakdown() over every business's ledger together."""
+    merged = {}
+    for summary in summaries.values():
+        for key, amount in summary["categories"].items():
+            merged[key] = merged.get(key, ZERO) + amount
+    return {"title": "Consolidated Category Breakdown", "columns": CATEGORY_COLUMNS, "rows": category_rows(merged)}
+
+
+def invoice_register(history_path, start=None, end=None):
+    """Invoice history rows in file order, voids and corrections applied, streamed straight through, with a closing total.
+
+    A row whose date cannot be read is listed with the date as written, and
+    only when the register is not limited to a period.
+    """
+
+    def rows():
+        total, count = ZERO, 0
+        if not os.path.exists(history_path):
+            yield ["Total", "", f"{count} invoices", total]
+            return
+        header = None
+        for values in audit.current_rows(history_path):
+            if not values:
+                continue
+            if header is None:
+                header = values
+                continue
+            row = dict(zip(header, values))
+            date = invoice_output.parse_invoice_date(row.get("invoiceDate"))
+            if date is None:
+                if start is not None or end is not None:
+                    continue
+                date_text = row.get("invoiceDate", "")
+            elif not in_range(date, start, end):
+                continue
+            else:
+                date_text = date.isoformat()
+            try:
+                amount = gst.to_decimal(row.get("totalAmount"))
+            except ValueError:
+                amount = ZERO
+            total += amount
+            count += 1
+            yield [row.get("invoiceNumber", ""), date_text, row.get("billToName", ""), amount]
+        yield ["Total", "", f"{count} invoices", total]
+
+    return {"title": "Invoice Register", "columns": ["Invoice", "Date", "Bill To", "Amount"], "rows": rows()}
+
+
+def reconciliation(ledger_path, history_path, tolerance=reconcile.DEFAULT_TOLERANCE, window_days=reconcile.DEFAULT_WINDOW_DAYS, start=None, end=None):
+    """Each invoice with the receipts applied to it, then the receipts nothing matched, with totals."""
+    result = reconcile.reconcile_files(ledger_path, history_path, tolerance, window_days, start, end)
+    applied = {}
+    for allocation in result["allocations"]:
+        applied.setdefault(id(allocation["invoice"]), []).append(allocation)
+
+    def rows():
+        for invoice in result["invoices"]:
+            yield [
+                invoice["status"].capitalize(),
+                invoice["invoiceNumber"],
+                invoice["date"].isoformat(),
+                invoice["client"],
+                "",
+                invoice["amount"],
+                invoice["received"],
+                invoice["outstanding"],
+            ]
+            for allocation in sorted(applied.get(id(invoice), ()), key=lambda allocation: allocation["receipt"]["date"]):
+                receipt = allocation["receipt"]
+                yield ["", "", receipt["date"].isoformat(), f"  Receipt: {receipt['note']}", allocation["method"], receipt["amount"], allocation["amount"], ""]
+        for receipt in result["receipts"]:
+            if receipt["status"] != "matched":
+                yield [receipt["status"].capitalize() + " receipt", "", receipt["date"].isoformat(), receipt["note"], "", receipt["amount"], receipt["applied"], receipt["remaining"]]
+        invoiced = sum((invoice["amount"] for invoice in result["invoices"]), ZERO)
+        received = sum((invoice["received"] for invoice in result["invoices"]), ZERO)
+        outstanding = sum((invoice["outstanding"] for invoice in result["invoices"]), ZERO)
+        unpaid = sum(1 for invoice in result["invoices"] if invoice["status"] != "paid")
+        yield ["Total invoiced", "", "", f"{len(result['invoices'])} invoices, {unpaid} not fully paid", "", invoiced, received, outstanding]
+        receipts_total = sum((receipt["amount"] for receipt in result["receipts"]), ZERO)
+        unapplied = sum((receipt["remaining"] for receipt in result["receipts"]), ZERO)
+        unmatched = sum(1 for receipt in result["receipts"] if receipt["status"] != "matched")
+        yield ["Total received", "", "", f"{len(result['receipts'])} receipts, {unmatched} not fully applied", "", receipts_total, receipts_total - unapplied, unapplied]
+
+    columns = ["Status", "Invoice", "Date", "Client / Receipt", "Method", "Amount", "Applied", "Outstanding"]
+    return {"title": "Reconciliation", "columns": columns, "rows": rows()}
+
+
+def cell_text(value):
+    if isinstance(value, decimal.Decimal):
+        return f"{value:.2f}"
+    return str(value)
+
+
+def chunked(rows, size=CHUNK_ROWS):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_csv(report, path):
+    with open(path, "w", newline="", encoding="utf-8") as report_file:
+        writer = csv.writer(report_file)
+        writer.writerow(report["columns"])
+        for chunk in chunked(report["rows"]):
+            writer.writerows([cell_text(value) for value in row] for row in chunk)
+
+
+def json_value(value):
+    if isinstance(value, decimal.Decimal):
+        return float(gst.to_paise(value))
+    return value
+
+
+def write_json(report, path):
+    """{"title", "columns", "rows": [{column: value}]}, written a chunk of rows at a time."""
+    columns = report["columns"]
+    with open(path, "w", encoding="utf-8") as report_file:
+        report_file.write(f'{{"title": {json.dumps(report["title"])}, "columns": {json.dumps(columns)}, "rows": [\n')
+        first = True
+        for chunk in chunked(report["rows"]):
+            lines = [json.dumps(dict(zip(columns, map(json_value, row))), ensure_ascii=False) for row in chunk]
+            report_file.write(("" if first else ",\n") + ",\n".join(lines))
+            first = False
+        report_file.write("\n]}\n")
+
+
+def write_pdf(report, path):
+    """A paginated table on A4 using the direct PDF writer; pages go to disk as they fill."""
+    canvas = invoice_pdf.PdfCanvas(path)
+    try:
+        columns = None
+        page = 1
+        y = draw_report_page_top(canvas, report, page, first=True)
+        bottom = invoice_pdf.MARGIN + invoice_pdf.FOOTER_HEIGHT
+        for row in report["rows"]:
+            if columns is None:
+                columns = report_columns(report["columns"], row)
+                y = invoice_pdf.draw_table_header(canvas, columns, y)
+            if y < bottom:
+                canvas.new_page()
+                page += 1
+                y = invoice_pdf.draw_table_header(canvas, columns, draw_report_page_top(canvas, report, page))
+            bold = str(row[0]).startswith("Total") or str(row[1]).startswith("Total")
+            for value, (_, _, x, width, align) in zip(row, columns):
+                text = invoice_pdf.fit_text(invoice_pdf.clean_text(cell_text(value)), width - 6, 9, bold)
+                canvas.text(x + width - 3 if align == "right" else x + 3, y, text, 9, bold=bold, align=align)
+            y -= invoice_pdf.ROW_HEIGHT
+    finally:
+        canvas.close()
+
+
+def draw_report_page_top(canvas, report, page, first=False):
+    top = invoice_pdf.PAGE_HEIGHT - invoice_pdf.MARGIN
+    center = invoice_pdf.PAGE_WIDTH / 2
+    canvas.text(
+        center, invoice_pdf.MARGIN, f"Page {page}", 8, color=invoice_pdf.FOOTER_GRAY, align="center"
+    )
+    if not first:
+        return top - 10
+    canvas.text(invoice_pdf.MARGIN, top - 20, report["title"], 18, bold=True, color=invoice_pdf.PRIMARY_BLUE)
+    canvas.text(
+        invoice_pdf.MARGIN, top - 36, f"Generated {dt.datetime.now():%d %b %Y %H:%M}", 9, color=invoice_pdf.FOOTER_GRAY
+    )
+    return top - 56
+
+
+def report_columns(headings, sample_row):
+    """(heading, key, x, width, align) per column: text columns share the space left by numeric ones."""
+    numeric = [isinstance(value, decimal.Decimal) or str(value).endswith("%") for value in sample_row]
+    numeric_width = 74
+    text_count = max(len(headings) - sum(numeric), 1)
+    text_width = (invoice_pdf.CONTENT_WIDTH - numeric_width * sum(numeric)) / text_count
+    columns, x = [], invoice_pdf.MARGIN
+    for index, heading in enumerate(headings):
+        width = numeric_width if numeric[index] else text_width
+        columns.append((heading.upper(), index, x, width, "right" if numeric[index] else "left"))
+        x += width
+    return columns
+
+
+REPORT_WRITERS = {"csv": write_csv, "json": write_json, "pdf": write_pdf}
+
+
+def export_report(report, path, fmt=None):
+    """Write a report in the format named by fmt or, failing that, the file extension."""
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt not in REPORT_WRITERS:
+        raise ValueError(f"Unknown report format {fmt!r}; choose from {', '.join(REPORT_FORMATS)}.")
+    REPORT_WRITERS[fmt](report, path)
+    return path
@@ -0,0 +1,541 @@
+import builtins
+import contextlib
+import hashlib
+import io
+import os
+import secrets
+import struct
+import threading
+
+# Imported by require_cipher() on first use; 'cryptography' is optional and slow to import
+AESGCM = None
+
+
+MAGIC = b"SETKENC1"
+CHUNK_SIZE = 64 * 1024
+SALT_SIZE = 16
+NONCE_SIZE = 12
+TAG_SIZE = 16
+LENGTH = struct.Struct(">I")
+# magic, salt, chunk size, then an empty sealed message that proves the passphrase
+HEADER_SIZE = len(MAGIC) + SALT_SIZE + LENGTH.size + NONCE_SIZE + TAG_SIZE
+SCRYPT_PARAMS = {"n": 2**14, "r": 8, "p": 1, "dklen": 32}
+# Beside each encrypted file while an append is resealing its last chunk: the chunk as it was
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_POSITION = struct.Struct(">Q")
+# Held by whoever writes an encrypted file, in any process
+LOCK_SUFFIX = ".enc.lock"
+
+_protected = {}
+_keys = {}
+_locks = {}
+_registry_lock = threading.Lock()
+_held = threading.local()
+
+
+class EncryptionError(Exception):
+    pass
+
+
+def require_cipher():
+    global AESGCM
+    if AESGCM is None:
+        try:
+            from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+        except ImportError:
+            raise EncryptionError("Encrypted storage needs the 'cryptography' package (pip install cryptography).")
+
+
+def derive_key(passphrase, salt):
+    cache_key = (passphrase, salt)
+    key = _keys.get(cache_key)
+    if key is None:
+        key = _keys[cache_key] = hashlib.scrypt(passphrase.encode("utf-8"), salt=salt, **SCRYPT_PARAMS)
+    return key
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Exclusive lock across processes, held on a sidecar .lock file.
+
+    A thread that already holds it gets straight through; a second flock on
+    a new descriptor would wait on the thread itself.
+    """
+    path = os.path.abspath(path)
+    held = _held.__dict__.setdefault("files", set())
+    if path in held:
+        yield
+        return
+    with builtins.open(path, "a+b") as lock_file:
+        if os.name == "nt":
+            import msvcrt
+
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        held.add(path)
+        try:
+            yield
+        finally:
+            held.discard(path)
+            if os.name == "nt":
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+@contextlib.contextmanager
+def write_lock(path):
+    """Hold off everything else that writes the encrypted file at path, in this process and in others."""
+    path = os.path.abspath(path)
+    held = _held.__dict__.setdefault("paths", set())
+    if path in held:
+        yield  # already ours further up the stack; a second flock would wait on ourselves
+        return
+    with _lock_for(path), file_lock(path + LOCK_SUFFIX):
+        held.add(path)
+        try:
+            yield
+        finally:
+            held.discard(path)
+
+
+def recover(path):
+    """Put back the chunk an interrupted append was resealing, from its journal.
+
+    A journal cut short means the crash came before the file itself was
+    touched, so it is simply dropped.
+    """
+    journal_path = path + JOURNAL_SUFFIX
+    if not os.path.exists(journal_path):
+        return
+    with write_lock(path):
+        try:
+            with builtins.open(journal_path, "rb") as journal:
+                record = journal.read()
+        except FileNotFoundError:
+            return  # the append finished while we waited for the lock
+        body, digest = record[:-32], record[-32:]
+        if len(body) >= JOURNAL_POSITION.size and hashlib.sha256(body).digest() == digest:
+            (position,) = JOURNAL_POSITION.unpack(body[: JOURNAL_POSITION.size])
+            with builtins.open(path, "r+b") as data_file:
+                data_file.seek(position)
+                data_file.write(body[JOURNAL_POSITION.size :])
+                data_file.truncate()
+                data_file.flush()
+                os.fsync(data_file.fileno())
+        os.remove(journal_path)
+
+
+def is_encrypted(path):
+    try:
+        with builtins.open(path, "rb") as data_file:
+            return data_file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class EncryptedFile:
+    """A file stored as AES-GCM sealed chunks of CHUNK_SIZE plaintext bytes.
+
+    Every chunk but the last is full, so chunk i starts at a fixed offset and
+    a plaintext offset maps straight to its chunk. Each chunk is bound to its
+    index and to whether it is the final one, so chunks cannot be reordered,
+    dropped from the end or spliced in from another file. Appending only
+    reseals the last chunk, whatever the size of the file; the sealed chunk
+    is copied to a journal first, so a crash part way through leaves
+    something recover() can put back instead of a chunk that no longer
+    authenticates.
+    """
+
+    def __init__(self, path, passphrase):
+        require_cipher()
+        self.path = path
+        self.passphrase = passphrase
+        self.aead = None
+        self.salt = None
+        self.chunk_size = CHUNK_SIZE
+
+    @property
+    def slot_size(self):
+        return LENGTH.size + NONCE_SIZE + self.chunk_size + TAG_SIZE
+
+    def create(self):
+        """Start an empty file, a header and one empty final chunk, unless the file already has a header."""
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            return self.open_header()
+        with builtins.open(self.path, "wb") as data_file:
+            self.write_header(data_file)
+            data_file.write(self._seal(0, b"", True))
+        return self
+
+    def write_header(self, data_file):
+        """Pick a salt and write the header; the caller writes the chunks, at least one, the last sealed as final."""
+        self.salt = secrets.token_bytes(SALT_SIZE)
+        self.aead = AESGCM(derive_key(self.passphrase, self.salt))
+        prefix = MAGIC + self.salt + LENGTH.pack(self.chunk_size)
+        nonce = secrets.token_bytes(NONCE_SIZE)
+        data_file.write(prefix + nonce + self.aead.encrypt(nonce, b"", prefix))
+        return self
+
+    def open_header(self):
+        with builtins.open(self.path, "rb") as data_file:
+            header = data_file.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or not header.startswith(MAGIC):
+            raise EncryptionError(f"{self.path} is not an encrypted toolkit file.")
+        prefix_size = len(MAGIC) + SALT_SIZE + LENGTH.size
+        self.salt = header[len(MAGIC) : len(MAGIC) + SALT_SIZE]
+        (self.chunk_size,) = LENGTH.unpack(header[len(MAGIC) + SALT_SIZE : prefix_size])
+        self.aead = AESGCM(derive_key(self.passphrase, self.salt))
+        nonce, sealed = header[prefix_size : prefix_size + NONCE_SIZE], header[prefix_size + NONCE_SIZE :]
+        try:
+            self.aead.decrypt(nonce, sealed, header[:prefix_size])
+        except Exception:
+            raise EncryptionError(f"Wrong passphrase for {self.path}.")
+        return self
+
+    def chunk_count(self):
+        """Chunks in the file; every file has at least one, so a header on its own was cut short."""
+        stored = os.path.getsize(self.path) - HEADER_SIZE
+        if stored <= 0:
+            raise EncryptionError(f"{self.path} is damaged or has been cut short (no data after its header).")
+        return -(-stored // self.slot_size)
+
+    def plain_size(self):
+        count = self.chunk_count()
+        with builtins.open(self.path, "rb") as data_file:
+            data_file.seek(HEADER_SIZE + (count - 1) * self.slot_size)
+            (last_length,) = LENGTH.unpack(data_file.read(LENGTH.size))
+        return (count - 1) * self.chunk_size + last_length
+
+    def _aad(self, index, final):
+        return self.salt + struct.pack(">Q?", index, final)
+
+    def read_chunk(self, data_file, index, count):
+        data_file.seek(HEADER_SIZE + index * self.slot_size)
+        (length,) = LENGTH.unpack(data_file.read(LENGTH.size))
+        nonce = data_file.read(NONCE_SIZE)
+        sealed = data_file.read(length + TAG_SIZE)
+        try:
+            return self.aead.decrypt(nonce, sealed, self._aad(index, index == count - 1))
+        except Exception:
+            raise EncryptionError(f"{self.path} is damaged or has been tampered with (chunk {index}).")
+
+    def _seal(self, index, plain, final):
+        nonce = secrets.token_bytes(NONCE_SIZE)
+        return LENGTH.pack(len(plain)) + nonce + self.aead.encrypt(nonce, plain, self._aad(index, final))
+
+    def append(self, data):
+        """Append plaintext; only the current last chunk is read back and resealed. Callers hold write_lock()."""
+        if not data:
+            return
+        journal_path = self.path + JOURNAL_SUFFIX
+        with builtins.open(self.path, "r+b") as data_file:
+            count = self.chunk_count()
+            index = count - 1
+            position = HEADER_SIZE + index * self.slot_size
+            tail = self.read_chunk(data_file, index, count)
+            data_file.seek(position)
+            body = JOURNAL_POSITION.pack(position) + data_file.read()
+            with builtins.open(journal_path, "wb") as journal:
+                journal.write(body + hashlib.sha256(body).digest())
+                journal.flush()
+                os.fsync(journal.fileno())
+            data = tail + bytes(data)
+            pieces = [data[start : start + self.chunk_size] for start in range(0, len(data), self.chunk_size)]
+            data_file.seek(position)
+            for offset, piece in enumerate(pieces):
+                data_file.write(self._seal(index + offset, piece, offset == len(pieces) - 1))
+            data_file.flush()
+            os.fsync(data_file.fileno())
+        os.remove(journal_path)
+
+
+class EncryptedReader(io.RawIOBase):
+    """Seekable read-only view of an EncryptedFile's plaintext, decrypting one chunk at a time."""
+
+    def __init__(self, encrypted):
+        super().__init__()
+        self.encrypted = encrypted
+        self.data_file = builtins.open(encrypted.path, "rb")
+        # Not while an append is half way through writing the last chunk. The last chunk must
+        # authenticate as the final one, so a file cut short is refused even if it reads as empty
+        try:
+            with write_lock(encrypted.path):
+                self.count = encrypted.chunk_count()
+                self.cached_index = self.count - 1
+                self.cached_chunk = encrypted.read_chunk(self.data_file, self.cached_index, self.count)
+        except BaseException:
+            self.data_file.close()
+            raise
+        self.size = self.cached_index * encrypted.chunk_size + len(self.cached_chunk)
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self.position = max(offset, 0)
+        return self.position
+
+    def readinto(self, buffer):
+        if self.position >= self.size:
+            return 0
+        index, start = divmod(self.position, self.encrypted.chunk_size)
+        if index != self.cached_index:
+            try:
+                self.cached_chunk = self.encrypted.read_chunk(self.data_file, index, self.count)
+            except EncryptionError:
+                # An append since the file was opened, here or in another process, reseals what was
+                # the last chunk as an inner one (or is rewriting it right now); look again with appends held off
+                with write_lock(self.encrypted.path):
+                    self.count = self.encrypted.chunk_count()
+                    self.cached_chunk = self.encrypted.read_chunk(self.data_file, index, self.count)
+            self.cached_index = index
+        # Stop at the size seen on opening, so a reader never ends on half of a later append
+        stop = min(start + len(buffer), self.size - index * self.encrypted.chunk_size)
+        piece = self.cached_chunk[start:stop]
+        buffer[: len(piece)] = piece
+        self.position += len(piece)
+        return len(piece)
+
+    def close(self):
+        if not self.closed:
+            self.data_file.close()
+        super().close()
+
+
+class EncryptedAppender(io.RawIOBase):
+    """Write-only append stream; everything written is sealed onto the file at flush/close.
+
+    A stock BufferedWriter never passes flush() on to its raw stream, so
+    open() wraps this in a SealingWriter.
+    """
+
+    def __init__(self, encrypted):
+        super().__init__()
+        self.encrypted = encrypted
+        self.pending = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.pending += data
+        return len(data)
+
+    def flush(self):
+        if self.pending:
+            recover(self.encrypted.path)
+            with write_lock(self.encrypted.path):
+                self.encrypted.append(self.pending)
+            self.pending = bytearray()
+
+    def close(self):
+        if not self.closed:
+            self.flush()
+        super().close()
+
+
+class SealingWriter(io.BufferedWriter):
+    """BufferedWriter whose flush() also seals what it handed an EncryptedAppender."""
+
+    def flush(self):
+        super().flush()
+        self.raw.flush()
+
+
+def _lock_for(path):
+    with _registry_lock:
+        return _locks.setdefault(path, threading.Lock())
+
+
+def protect(path, passphrase):
+    """Keep path encrypted from now on, encrypting an existing plaintext file in place."""
+    require_cipher()
+    path = os.path.abspath(path)
+    recover(path)
+    with write_lock(path):
+        if os.path.exists(path) and os.path.getsize(path) > 0 and not is_encrypted(path):
+            encrypt_file(path, passphrase)
+        elif is_encrypted(path):
+            EncryptedFile(path, passphrase).open_header()
+        _protected[path] = passphrase
+
+
+def passphrase_for(path):
+    """The passphrase path was protected with in this process, or None."""
+    return _protected.get(os.path.abspath(path))
+
+
+def encrypt_file(path, passphrase, chunk_size=CHUNK_SIZE):
+    """Rewrite a plaintext file encrypted, via a temporary file so a crash leaves the original."""
+    temp_path = path + ".enc.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    encrypted = EncryptedFile(temp_path, passphrase)
+    encrypted.chunk_size = chunk_size
+    with builtins.open(path, "rb") as plain_file, builtins.open(temp_path, "wb") as data_file:
+        encrypted.write_header(data_file)
+        index = 0
+        piece = plain_file.read(chunk_size)
+        while True:
+            following = plain_file.read(chunk_size)
+            data_file.write(encrypted._seal(index, piece, not following))
+            if not following:
+                break
+            index, piece = index + 1, following
+        data_file.flush()
+        os.fsync(data_file.fileno())
+    os.replace(temp_path, path)
+
+
+def write_file(path, pieces, like):
+    """Write an iterable of bytes to a new file at path, encrypted when `like` is protected, and fsync it.
+
+    Used to build a replacement for `like` that is then swapped in with os.replace,
+    or a file derived from `like` that should be kept as private as it is.
+    """
+    passphrase = _protected.get(os.path.abspath(like))
+    if os.path.exists(path):
+        os.remove(path)
+    if passphrase is None:
+        with builtins.open(path, "wb") as data_file:
+            for piece in pieces:
+                data_file.write(piece)
+            data_file.flush()
+            os.fsync(data_file.fileno())
+        return
+    encrypted = EncryptedFile(path, passphrase)
+    with builtins.open(path, "wb") as data_file:
+        encrypted.write_header(data_file)
+        index, buffer = 0, bytearray()
+        for piece in pieces:
+            buffer += piece
+            # Hold back the last full chunk until we know whether it is the final one
+            while len(buffer) > encrypted.chunk_size:
+                data_file.write(encrypted._seal(index, bytes(buffer[: encrypted.chunk_size]), False))
+                del buffer[: encrypted.chunk_size]
+                index += 1
+        # Always a final chunk, empty if nothing was written, so the file cannot pass for one cut short
+        data_file.write(encrypted._seal(index, bytes(buffer), True))
+        data_file.flush()
+        os.fsync(data_file.fileno())
+
+
+def decrypt_file(path, passphrase):
+    """Turn an encrypted file back into plaintext in place and stop protecting it."""
+    path = os.path.abspath(path)
+    temp_path = path + ".plain.tmp"
+    recover(path)
+    with write_lock(path):
+        with EncryptedReader(EncryptedFile(path, passphrase).open_header()) as reader, builtins.open(
+            temp_path, "wb"
+        ) as plain_file:
+            while True:
+                piece = reader.read(CHUNK_SIZE)
+                if not piece:
+                    break
+                plain_file.write(piece)
+        os.replace(temp_path, path)
+        _protected.pop(path, None)
+
+
+def open(path, mode="r", encoding=None, newline=None, errors=None, like=None):
+    """Drop-in for the builtin open() for protected files; anything else goes to the builtin.
+
+    Protected files support reading ("r"/"rb"), appending ("a"/"ab") and
+    starting over ("w"/"wb"). like names a protected file whose passphrase
+    reads an encrypted file that is not itself protected, such as one made
+    by write_file(path, ..., like).
+    """
+    passphrase = _protected.get(os.path.abspath(path))
+    if passphrase is None and like is not None and "r" in mode and is_encrypted(path):
+        passphrase = _protected.get(os.path.abspath(like))
+        if passphrase is None:
+            raise EncryptionError(f"Unlock {os.path.basename(like)} before reading {path}.")
+    if passphrase is None:
+        if "b" in mode:
+            return builtins.open(path, mode)
+        return builtins.open(path, mode, encoding=encoding, newline=newline, errors=errors)
+    binary = "b" in mode
+    kind = mode.replace("b", "").replace("t", "")
+    encrypted = EncryptedFile(path, passphrase)
+    recover(path)
+    if kind == "r":
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        buffered = io.BufferedReader(EncryptedReader(encrypted.open_header()), buffer_size=encrypted.chunk_size)
+    elif kind in ("a", "w"):
+        with write_lock(path):
+            if kind == "w" and os.path.exists(path):
+                os.remove(path)
+            encrypted.create()
+        buffered = SealingWriter(EncryptedAppender(encrypted), buffer_size=encrypted.chunk_size)
+    else:
+        raise ValueError(f"Encrypted files can only be opened for reading, appending or writing afresh, not {mode!r}.")
+    if binary:
+        return buffered
+    return io.TextIOWrapper(buffered, encoding=encoding or "utf-8", errors=errors, newline=newline)
+
+
+def getsize(path):
+    """Plaintext size of path, encrypted or not."""
+    passphrase = _protected.get(os.path.abspath(path))
+    if passphrase is None or not is_encrypted(path):
+        return os.path.getsize(path)
+    recover(path)
+    with write_lock(path):
+        return EncryptedFile(path, passphrase).open_header().plain_size()
+
+
+def benchmark(size_mb=32, line=b"2025-04-22 11:11:39,107860,Sales Revenue,monthly retainer\n", appends=2000):
+    """Time streaming reads and single-row appends, plaintext against encrypted. Returns a dict of seconds."""
+    import tempfile
+    import time
+
+    require_cipher()
+    results = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        plain_path = os.path.join(scratch, "plain.csv")
+        with builtins.open(plain_path, "wb") as plain_file:
+            plain_file.write(line * (size_mb * 1024 * 1024 // len(line)))
+        encrypted_path = os.path.join(scratch, "encrypted.csv")
+        with builtins.open(plain_path, "rb") as source, builtins.open(encrypted_path, "wb") as target:
+            target.write(source.read())
+        encrypt_file(encrypted_path, "benchmark")
+        _protected[os.path.abspath(encrypted_path)] = "benchmark"
+        try:
+            for label, path in (("plain", plain_path), ("encrypted", encrypted_path)):
+                start = time.perf_counter()
+                with open(path, "r", encoding="utf-8", newline="") as data_file:
+                    for _ in data_file:
+                        pass
+                results[f"{label}_read"] = time.perf_counter() - start
+                start = time.perf_counter()
+                for _ in range(appends):
+                    with open(path, "a", encoding="utf-8", newline="") as data_file:
+                        data_file.write(line.decode("utf-8"))
+                results[f"{label}_append"] = (time.perf_counter() - start) / appends
+        finally:
+            _protected.pop(os.path.abspath(encrypted_path), None)
+    return results
+
+
+if __name__ == "__main__":
+    for name, seconds in benchmark().items():
+        print(f"{name:>18}: {seconds * 1000:.3f} ms")
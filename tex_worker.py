@@ -0,0 +1,199 @@
+import atexit
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import threading
+
+import invoice_output
+
+
+NEWCOMMAND_LINE = re.compile(r"^([ \t]*)\\newcommand(?=\{(\\\w+)\})", re.MULTILINE)
+JOB_NAME = "invoice"
+JOB_FILE = "invoice-job.tex"
+
+# Runs once the preamble (packages, fonts, colours) is loaded: wait for a job
+# file name on stdin, then typeset it. \read-1 reads the terminal without a prompt.
+WARM_DRIVER_TAIL = r"""\begin{document}
+{\endlinechar=-1 \global\read-1 to \invoicejob}
+\input{\invoicejob}
+"""
+
+
+class CompileTimeout(RuntimeError):
+    """The engine ran past its time limit; told apart from other failures for the metrics."""
+
+
+def split_preamble(tex):
+    """Split a rendered invoice into (static preamble, \\newcommand block, body after \\begin{document}).
+
+    Returns None when the document has no \\begin{document}.
+    """
+    preamble, marker, body = tex.partition("\\begin{document}")
+    if not marker:
+        return None
+    static_lines, command_lines = [], []
+    depth = 0
+    for line in preamble.splitlines(keepends=True):
+        if depth > 0 or NEWCOMMAND_LINE.match(line):
+            command_lines.append(line)
+            depth += line.count("{") - line.count("}")
+        else:
+            static_lines.append(line)
+    return "".join(static_lines), "".join(command_lines), body
+
+
+def preamble_key(static, commands):
+    """Spares are keyed on the preamble with the command names but not their values, which change per job."""
+    names = [match.group(2) for match in NEWCOMMAND_LINE.finditer(commands)]
+    return hashlib.sha1((static + "\0".join(names)).encode("utf-8")).hexdigest()
+
+
+def latex_error_details(log_file):
+    """Last few error lines of a TeX log, or an empty string."""
+    if not os.path.exists(log_file):
+        return ""
+    try:
+        with open(log_file, "r", encoding="utf-8", errors="ignore") as f:
+            error_lines = [line for line in f.read().split("\n") if "!" in line or "Error" in line or "Fatal" in line]
+    except OSError:
+        return ""
+    return "\n".join(error_lines[-10:])
+
+
+class WarmProcess:
+    def __init__(self, engine, driver_tex, env):
+        self.build_dir = invoice_output.make_build_dir()
+        with open(os.path.join(self.build_dir, "warm.tex"), "w", encoding="utf-8") as driver_file:
+            driver_file.write(driver_tex)
+        self.console = open(os.path.join(self.build_dir, "console.txt"), "w", encoding="utf-8")
+        popen_kwargs = {
+            "args": [engine, "-interaction=scrollmode", "-halt-on-error", f"-jobname={JOB_NAME}", "warm.tex"],
+            "cwd": self.build_dir,
+            "env": env,
+            "stdin": subprocess.PIPE,
+            "stdout": self.console,
+            "stderr": subprocess.STDOUT,
+            "text": True,
+        }
+        if os.name == "nt":
+            popen_kwargs["creationflags"] = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+        self.process = subprocess.Popen(**popen_kwargs)
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def close(self):
+        if self.alive():
+            self.process.kill()
+            self.process.wait()
+        self.console.close()
+        invoice_output.remove_build_dir(self.build_dir)
+
+
+class WarmTexService:
+    """Keep a TeX engine per preamble already loaded and parked on stdin.
+
+    A TeX run can only produce one PDF, so "resident" here means pre-forked:
+    each warm process has finished loading packages and fonts and is blocked
+    waiting for a job. Submitting a job hands over the variable definitions and
+    document body, and a replacement process starts warming immediately, so
+    the caller only waits for the actual typesetting.
+    """
+
+    def __init__(self, engine="xelatex", asset_dirs=(), timeout=60, log_dir=None, log_limit=0):
+        self.engine = engine
+        self.timeout = timeout
+        self.log_dir = log_dir
+        self.log_limit = log_limit
+        self.env = dict(os.environ)
+        self.env["TEXINPUTS"] = os.pathsep.join([*asset_dirs, self.env.get("TEXINPUTS", "")])
+        self.lock = threading.Lock()
+        self.warm = {}
+        atexit.register(self.shutdown)
+
+    def _take(self, key, driver_tex):
+        """A warm process for this preamble (cold if none is ready), leaving a fresh spare behind."""
+        with self.lock:
+            process = self.warm.pop(key, None)
+            if process is not None and not process.alive():
+                process.close()
+                process = None
+            if process is None:
+                process = WarmProcess(self.engine, driver_tex, self.env)
+            self.warm[key] = WarmProcess(self.engine, driver_tex, self.env)
+        return process
+
+    def prewarm(self, tex):
+        """Start an engine for this document's preamble ahead of the first real job."""
+        parts = split_preamble(tex)
+        if parts is None:
+            return
+        static, commands, _ = parts
+        key = preamble_key(static, commands)
+        with self.lock:
+            if key not in self.warm:
+                self.warm[key] = WarmProcess(self.engine, static + commands + WARM_DRIVER_TAIL, self.env)
+
+    def compile(self, tex_path, pdf_path):
+        with open(tex_path, "r", encoding="utf-8") as tex_file:
+            # Only the preamble is held in memory; the body is copied across as a stream
+            preamble = []
+            for line in tex_file:
+                before, marker, body_start = line.partition("\\begin{document}")
+                preamble.append(before)
+                if marker:
+                    break
+            else:
+                raise ValueError(f"{tex_path} has no \\begin{{document}}.")
+            static, commands, _ = split_preamble("".join(preamble) + marker)
+            key = preamble_key(static, commands)
+            process = self._take(key, static + commands + WARM_DRIVER_TAIL)
+            try:
+                with open(os.path.join(process.build_dir, JOB_FILE), "w", encoding="utf-8") as job_file:
+                    job_file.write(NEWCOMMAND_LINE.sub(r"\1\\renewcommand", commands))
+                    job_file.write(body_start)
+                    shutil.copyfileobj(tex_file, job_file)
+            except BaseException:
+                process.close()
+                raise
+        try:
+            try:
+                process.process.stdin.write(JOB_FILE + "\n")
+                process.process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass  # engine died while warming; its log says why
+            try:
+                returncode = process.process.wait(timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                raise CompileTimeout(
+                    f"PDF generation timed out after {self.timeout} seconds. The LaTeX file might be too complex or there's an issue with {self.engine}."
+                )
+            built_pdf = os.path.join(process.build_dir, f"{JOB_NAME}.pdf")
+            if not os.path.exists(built_pdf):
+                process.console.flush()
+                with open(os.path.join(process.build_dir, "console.txt"), "r", encoding="utf-8", errors="ignore") as console:
+                    output = console.read()[-1000:]
+                log_file = os.path.join(process.build_dir, f"{JOB_NAME}.log")
+                details = latex_error_details(log_file)
+                kept_log = None
+                if self.log_dir:
+                    log_name = os.path.splitext(os.path.basename(tex_path))[0] + ".log"
+                    kept_log = invoice_output.keep_failure_log(log_file, self.log_dir, self.log_limit, log_name)
+                raise RuntimeError(
+                    f"PDF generation failed (exit code {returncode}).\n"
+                    f"{self.engine} output:\n{output or 'No output'}\n"
+                    f"{details + chr(10) if details else ''}"
+                    f"{f'Full log: {kept_log}' if kept_log else ''}"
+                )
+            shutil.move(built_pdf, pdf_path)
+        finally:
+            process.close()
+        return pdf_path
+
+    def shutdown(self):
+        with self.lock:
+            for process in self.warm.values():
+                process.close()
+            self.warm.clear()
@@ -0,0 +1,196 @@
+import datetime as dt
+import sqlite3
+import threading
+
+import gst
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    client TEXT NOT NULL,
+    project TEXT NOT NULL,
+    note TEXT NOT NULL DEFAULT '',
+    billable INTEGER NOT NULL DEFAULT 1,
+    started TEXT NOT NULL,
+    stopped TEXT,
+    day TEXT NOT NULL,
+    invoice_number TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_day_client ON sessions (day, client);
+CREATE INDEX IF NOT EXISTS sessions_uninvoiced ON sessions (client, invoice_number, billable);
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    day TEXT NOT NULL,
+    client TEXT NOT NULL,
+    project TEXT NOT NULL,
+    seconds INTEGER NOT NULL DEFAULT 0,
+    billable_seconds INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, client, project)
+);
+CREATE INDEX IF NOT EXISTS daily_rollups_client ON daily_rollups (client, day);
+"""
+
+
+def split_by_day(started, stopped):
+    """[(date, seconds)] for a span, cut at each midnight it crosses."""
+    pieces = []
+    cursor = started
+    while cursor < stopped:
+        midnight = dt.datetime.combine(cursor.date() + dt.timedelta(days=1), dt.time())
+        piece_end = min(midnight, stopped)
+        pieces.append((cursor.date(), int(round((piece_end - cursor).total_seconds()))))
+        cursor = piece_end
+    return pieces
+
+
+class TimeTracker:
+    """Start/stop work sessions tagged with a client and project, kept in SQLite.
+
+    Stopping a session adds its time to per-day, per-client, per-project
+    rollups in the same transaction, so reports over any range read the
+    rollups instead of replaying sessions.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def active(self):
+        with self.lock:
+            row = self.connection.execute("SELECT * FROM sessions WHERE stopped IS NULL ORDER BY id LIMIT 1").fetchone()
+        return dict(row) if row else None
+
+    def start(self, client, project, note="", billable=True, now=None):
+        """Start a session, stopping any session still running first. Returns the new session id."""
+        client, project = client.strip(), project.strip()
+        if not client:
+            raise ValueError("Client is required to start tracking time.")
+        now = now or dt.datetime.now()
+        self.stop(now=now)
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO sessions (client, project, note, billable, started, day) VALUES (?, ?, ?, ?, ?, ?)",
+                (client, project, note.strip(), int(bool(billable)), now.isoformat(timespec="seconds"), now.date().isoformat()),
+            )
+        return cursor.lastrowid
+
+    def stop(self, now=None):
+        """Stop the running session. Returns it with "pieces" [(date, seconds)], or None if nothing was running."""
+        now = now or dt.datetime.now()
+        with self.lock, self.connection:
+            row = self.connection.execute("SELECT * FROM sessions WHERE stopped IS NULL ORDER BY id LIMIT 1").fetchone()
+            if row is None:
+                return None
+            started = dt.datetime.fromisoformat(row["started"])
+            stopped = max(now, started)
+            pieces = split_by_day(started, stopped)
+            self.connection.execute(
+                "UPDATE sessions SET stopped = ? WHERE id = ?", (stopped.isoformat(timespec="seconds"), row["id"])
+            )
+            self.connection.executemany(
+                "INSERT INTO daily_rollups (day, client, project, seconds, billable_seconds) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (day, client, project) DO UPDATE SET "
+                "seconds = seconds + excluded.seconds, billable_seconds = billable_seconds + excluded.billable_seconds",
+                [
+                    (day.isoformat(), row["client"], row["project"], seconds, seconds if row["billable"] else 0)
+                    for day, seconds in pieces
+                ],
+            )
+        session = dict(row, stopped=stopped.isoformat(timespec="seconds"))
+        session["pieces"] = pieces
+        return session
+
+    def daily_hours(self, start, end, client=None):
+        """{date: hours} from the rollups, for start <= day <= end."""
+        query = "SELECT day, SUM(seconds) AS seconds FROM daily_rollups WHERE day BETWEEN ? AND ?"
+        params = [start.isoformat(), end.isoformat()]
+        if client:
+            query += " AND client = ?"
+            params.append(client)
+        with self.lock:
+            rows = self.connection.execute(query + " GROUP BY day ORDER BY day", params).fetchall()
+        return {dt.date.fromisoformat(row["day"]): row["seconds"] / 3600 for row in rows}
+
+    def summary(self, start, end):
+        """[{client, project, hours, billable_hours}] over a date range, from the rollups."""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT client, project, SUM(seconds) AS seconds, SUM(billable_seconds) AS billable_seconds "
+                "FROM daily_rollups WHERE day BETWEEN ? AND ? GROUP BY client, project ORDER BY client, project",
+                (start.isoformat(), end.isoformat()),
+            ).fetchall()
+        return [
+            {
+                "client": row["client"],
+                "project": row["project"],
+                "hours": row["seconds"] / 3600,
+                "billable_hours": row["billable_seconds"] / 3600,
+            }
+            for row in rows
+        ]
+
+    def clients(self):
+        with self.lock:
+            return [row[0] for row in self.connection.execute("SELECT DISTINCT client FROM sessions ORDER BY client")]
+
+    def unbilled_sessions(self, client):
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT * FROM sessions WHERE client = ? AND invoice_number IS NULL AND billable = 1 "
+                "AND stopped IS NOT NULL ORDER BY started",
+                (client,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def invoice_items(self, client, hourly_rate, tax=""):
+        """Unbilled billable time for a client as invoice items, one per project, and the session ids used."""
+        projects = {}
+        session_ids = []
+        for session in self.unbilled_sessions(client):
+            seconds = (dt.datetime.fromisoformat(session["stopped"]) - dt.datetime.fromisoformat(session["started"])).total_seconds()
+            project = projects.setdefault(session["project"], {"seconds": 0, "first": session["day"], "last": session["day"]})
+            project["seconds"] += seconds
+            project["last"] = session["day"]
+            session_ids.append(session["id"])
+        rate = gst.to_decimal(hourly_rate)
+        items = []
+        for name, project in projects.items():
+            hours = gst.to_paise(gst.to_decimal(project["seconds"]) / 3600)
+            taxable, cgst, sgst, igst = gst.line_tax(hours, rate, gst.to_decimal(tax), False)
+            period = project["first"] if project["first"] == project["last"] else f"{project['first']} to {project['last']}"
+            items.append(
+                {
+                    "itemName": name or client,
+                    "description": f"{hours} h, {period}",
+                    "hsn": "",
+                    "quantity": f"{hours}",
+                    "price": f"{rate:.2f}",
+                    "tax": str(tax),
+                    "amount": f"{taxable + cgst + sgst + igst:.2f}",
+                }
+            )
+        return items, session_ids
+
+    def mark_invoiced(self, session_ids, invoice_number):
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "UPDATE sessions SET invoice_number = ? WHERE id = ?",
+                [(invoice_number, session_id) for session_id in session_ids],
+            )
+
+    def close(self):
+        with self.lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
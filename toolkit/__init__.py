@@ -0,0 +1,14 @@
+"""Core of the Solo Entrepreneur Toolkit, with no GUI dependency.
+
+Importing the package or any submodule has no side effects: stores,
+indexes and the TeX service in toolkit.services are created on first use.
+
+    config       paths and settings
+    services     lazily created stores and services
+    invoicing    invoice rendering, PDF compilation and history
+    books        money-flow ledger entries and their receipts, reports and encrypted storage
+    taxes        income-tax calculation
+    performance  productivity calculation, time-tracking hours and pro tips
+    workspaces   one data directory per business, and consolidated reports
+    telemetry    counters, latency histograms and queue depths, exported as Prometheus text
+"""
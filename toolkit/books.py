@@ -0,0 +1,202 @@
+import contextlib
+import csv
+import datetime as dt
+import os
+import threading
+import time
+
+import audit
+import ledger
+import reconcile
+import secure_store
+from toolkit import config, services, telemetry, workspaces
+
+
+_ledger_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _ledger_writes():
+    """Hold off everything else that writes moneyFlow.csv or its audit log, here and in other processes."""
+    with _ledger_lock, secure_store.file_lock(config.MONEY_FLOW_PATH + ".lock"):
+        yield
+
+
+def enable_encrypted_storage(passphrase):
+    """Encrypt the ledger and invoice history (first run) or unlock them; raises EncryptionError."""
+    for path in config.ENCRYPTED_DATA_PATHS:
+        secure_store.protect(path, passphrase)
+
+
+def write_money_flow_entries(entries):
+    """Append (amount, category, note) rows with one file open, so bursts of writes share the cost."""
+    timestamp = dt.datetime.now().isoformat(sep=" ", timespec="seconds")
+    start = time.perf_counter()
+    with _ledger_writes():
+        header_needed = not os.path.exists(config.MONEY_FLOW_PATH) or secure_store.getsize(config.MONEY_FLOW_PATH) == 0
+        with secure_store.open(config.MONEY_FLOW_PATH, "a", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            if header_needed:
+                writer.writerow(["timestamp", "amount", "category", "note"])
+            writer.writerows([timestamp, amount, category, note] for amount, category, note in entries)
+        telemetry.APPEND_SECONDS.labels("ledger").observe(time.perf_counter() - start)
+        telemetry.APPENDED_ROWS.labels("ledger").inc(len(entries))
+        services.event_outbox.append(
+            [
+                ("ledger.entry", {"timestamp": timestamp, "amount": amount, "category": category, "note": note})
+                for amount, category, note in entries
+            ]
+        )
+    _sync_ledger_views()
+
+
+def _sync_ledger_views():
+    if services.turnover_monitor.loaded:
+        services.turnover_monitor.sync()
+    if services.budget_monitor.loaded:
+        services.budget_monitor.sync()
+    if services.productivity_series.loaded:
+        services.productivity_series.sync()
+
+
+def load_ledger_views():
+    """Load the turnover and budget monitors, building their totals from the ledger and history if need be."""
+    # Taken once, so a workspace switch while this runs on a background thread cannot mix two businesses
+    monitors = services.turnover_monitor, services.budget_monitor
+    for monitor in monitors:
+        monitor.sync()
+
+
+def write_money_flow_entry(amount, category, note):
+    write_money_flow_entries([(amount, category, note)])
+
+
+def budget_warnings(amount, category):
+    """Warnings for the budgets an entry would run into; check them before write_money_flow_entry()."""
+    return services.budget_monitor.check(amount, category)
+
+
+def ledger_entries(start=None, end=None, category=None):
+    """Parsed ledger entries with their row "id", oldest first, optionally limited to a date range and one category."""
+    for row_id, row, _ in audit.rows(config.MONEY_FLOW_PATH):
+        entry = ledger.parse_ledger_row(row)
+        if entry is None:
+            continue
+        day = entry["timestamp"].date()
+        if (start is None or day >= start) and (end is None or day <= end) and category in (None, entry["category"]):
+            entry["id"] = row_id
+            yield entry
+
+
+def void_ledger_entry(row_id, reason="", user=""):
+    """Void an entry by logging a tombstone for it; moneyFlow.csv itself is left alone. Returns the audit record."""
+    return _change_ledger_entry(row_id, None, reason, user)
+
+
+def correct_ledger_entry(row_id, amount, category, note, reason="", user=""):
+    """Log a replacement amount, category and note for an entry, which keeps its timestamp. Returns the audit record."""
+    return _change_ledger_entry(row_id, (amount, category, note), reason, user)
+
+
+def _change_ledger_entry(row_id, replacement, reason, user):
+    trail = services.ledger_audit
+    with _ledger_writes():
+        before = trail.row(row_id)
+        if ledger.parse_ledger_row(before) is None:
+            raise ValueError(f"Row {row_id} is not a ledger entry.")
+        if replacement is None:
+            record = trail.void(row_id, user, reason)
+        else:
+            after = [before[0], *(str(value) for value in replacement)]
+            if ledger.parse_ledger_row(after) is None:
+                raise ValueError(f"{replacement[0]!r} is not an amount.")
+            record = trail.correct(row_id, after, user, reason)
+        services.event_outbox.append([("ledger.voided" if replacement is None else "ledger.corrected", record)])
+    _sync_ledger_views()
+    return record
+
+
+def compact_ledger():
+    """Fold pending voids and corrections into moneyFlow.csv; returns how many were folded."""
+    with _ledger_writes():
+        folded = services.ledger_audit.compact()
+    if folded:
+        _relink_ledger_attachments()
+        _sync_ledger_views()
+    return folded
+
+
+def attach_receipts(links):
+    """Store files and attach them to ledger entries; links are (row id, path) pairs.
+
+    Thousands can go in one call: the files are hashed on parallel threads
+    and linked in one transaction. Returns ({path: digest}, {path: error})
+    for the files stored and the ones that could not be read.
+    """
+    links = list(links)
+    _relink_ledger_attachments()
+    for row_id in {row_id for row_id, _ in links}:
+        if ledger.parse_ledger_row(services.ledger_audit.row(row_id)) is None:
+            raise ValueError(f"Row {row_id} is not a ledger entry.")
+    store = services.document_store
+    added, failed = store.add_many(path for _, path in links)
+    store.link_many(("ledger", row_id, added[path], os.path.basename(path)) for row_id, path in links if path in added)
+    return added, failed
+
+
+def ledger_attachments(row_id):
+    """The documents attached to a ledger entry; see DocumentStore.attachments()."""
+    _relink_ledger_attachments()
+    return services.document_store.attachments("ledger", row_id)
+
+
+def detach_receipt(row_id, digest):
+    """Take a document off a ledger entry; returns True if it was attached. The stored file stays."""
+    _relink_ledger_attachments()
+    return services.document_store.unlink("ledger", row_id, digest)
+
+
+def _relink_ledger_attachments():
+    # Attachments are keyed by row id, which a compaction (here or in another process) can move;
+    # rows voided since keep their documents under "detached:<old id>".
+    store = services.document_store
+    generation, _ = services.ledger_audit.snapshot()
+    stale = [key for key in store.keys("ledger") if not key.startswith((f"{generation}:", "detached:"))]
+    if stale:
+        moved = services.ledger_audit.translate(stale)
+        store.rekey("ledger", {old: new or f"detached:{old}" for old, new in moved.items()})
+
+
+def reconcile_receipts(start=None, end=None):
+    """Invoices dated start..end matched against the ledger's Sales Revenue receipts; see reconcile.reconcile()."""
+    return reconcile.reconcile_files(
+        config.MONEY_FLOW_PATH, config.INVOICE_HISTORY_PATH, config.RECONCILE_TOLERANCE, config.RECONCILE_WINDOW_DAYS, start, end
+    )
+
+
+def build_report(builder, *args):
+    import reports  # brings in the PDF writer, so it is loaded only when a report is run
+
+    return getattr(reports, builder)(*args)
+
+
+# Report name -> function building it; each report is streamed to the chosen writer
+REPORTS = {
+    "Monthly P&L": lambda: build_report("profit_and_loss", config.MONEY_FLOW_PATH, "month"),
+    "Annual P&L": lambda: build_report("profit_and_loss", config.MONEY_FLOW_PATH, "year"),
+    "Category Breakdown": lambda: build_report("category_breakdown", config.MONEY_FLOW_PATH),
+    "Invoice Register": lambda: build_report("invoice_register", config.INVOICE_HISTORY_PATH),
+    "Reconciliation": lambda: build_report(
+        "reconciliation",
+        config.MONEY_FLOW_PATH,
+        config.INVOICE_HISTORY_PATH,
+        config.RECONCILE_TOLERANCE,
+        config.RECONCILE_WINDOW_DAYS,
+    ),
+    "Consolidated P&L (all businesses)": lambda: build_report(
+        "consolidated_profit_and_loss", workspaces.consolidated_summaries(), "year"
+    ),
+    "Consolidated Category Breakdown (all businesses)": lambda: build_report(
+        "consolidated_category_breakdown", workspaces.consolidated_summaries()
+    ),
+}
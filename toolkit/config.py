@@ -0,0 +1,137 @@
+import os
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Each business is a workspace: the default one keeps its data in BASE_DIR, the others in
+# WORKSPACES_DIR/<name>. toolkit.workspaces.activate() re-points the paths below at a workspace.
+WORKSPACES_DIR = os.path.join(BASE_DIR, "workspaces")
+DEFAULT_WORKSPACE = "default"
+WORKSPACE_ENV_VAR = "SOLO_TOOLKIT_WORKSPACE"
+WORKSPACE = DEFAULT_WORKSPACE
+DATA_DIR = BASE_DIR
+INVOICE_TEMPLATE_PATH = os.path.join(BASE_DIR, "invoiceTemplate.tex")
+INVOICE_HISTORY_PATH = os.path.join(BASE_DIR, "invoiceHistory.csv")
+MONEY_FLOW_PATH = os.path.join(BASE_DIR, "moneyFlow.csv")
+LOGO_PATH = os.path.join(BASE_DIR, "logo.png")
+GST_RATES_PATH = os.path.join(BASE_DIR, "gstRates.csv")
+INVOICE_INDEX_PATH = os.path.join(BASE_DIR, "invoiceIndex.jsonl")
+INVOICE_DRAFT_PATH = os.path.join(BASE_DIR, "invoiceDraft.jsonl")
+INVOICE_DRAFT_BACKUP_PATH = os.path.join(BASE_DIR, "invoiceDraft.bak.jsonl")
+INVOICE_SEQUENCE_PATH = os.path.join(BASE_DIR, "invoiceSequence.json")
+TURNOVER_STATE_PATH = os.path.join(BASE_DIR, "turnoverMonitor.json")
+BUDGET_STATE_PATH = os.path.join(BASE_DIR, "budgetMonitor.json")
+PRODUCTIVITY_HOURS_PATH = os.path.join(BASE_DIR, "productivityHours.csv")
+TIME_TRACKER_DB_PATH = os.path.join(BASE_DIR, "timeTracker.sqlite3")
+# Receipts and supporting documents, stored once each by SHA-256 and linked to ledger entries and invoices.
+# With ENCRYPT_DATA_FILES on, the blobs are encrypted like the ledger; the SQLite index holds only
+# digests, sizes, file names and links.
+DOCUMENT_STORE_DIR = os.path.join(BASE_DIR, "documents")
+DOCUMENT_INDEX_PATH = os.path.join(DOCUMENT_STORE_DIR, "index.sqlite3")
+# Threads hashing files in parallel when many are attached at once
+DOCUMENT_HASH_WORKERS = 4
+CLIENT_DIRECTORY_PATH = os.path.join(BASE_DIR, "clients.sqlite3")
+ITEM_CATALOGUE_PATH = os.path.join(BASE_DIR, "catalogue.sqlite3")
+# {YYYY}/{YY}/{MM}/{DD} expand from the invoice date, {seq:04} is the zero-padded counter
+INVOICE_NUMBER_PATTERN = "INV-{YYYY}-{seq:04}"
+INVOICE_OUTPUT_DIR = os.path.join(BASE_DIR, "invoices")
+# "flat", "month" (invoices/YYYY/MM) or "client" (invoices/<bill-to name>)
+INVOICE_OUTPUT_LAYOUT = "month"
+INVOICE_LOG_DIR = os.path.join(INVOICE_OUTPUT_DIR, "log")
+# Only the logs of the most recent failed builds are kept; successful builds leave nothing behind
+FAILED_BUILD_LOG_LIMIT = 20
+# Keep a pre-loaded xelatex parked for the next invoice instead of cold-starting one per PDF
+TEX_WARM_WORKER = True
+# "latex", "direct" (built-in PDF writer, no TeX needed) or "auto" (latex when xelatex is on PATH)
+DEFAULT_PDF_BACKEND = "auto"
+# Lines of item rows per page in the LaTeX invoice; each page is its own table with a subtotal row.
+# A row takes as many lines as its description wraps to at INVOICE_DESCRIPTION_LINE_CHARS characters.
+INVOICE_FIRST_PAGE_ROWS = 24
+INVOICE_ROWS_PER_PAGE = 44
+INVOICE_DESCRIPTION_LINE_CHARS = 45
+ITEM_ROW_CHUNK_SIZE = 500
+# Round the invoice grand total to the nearest rupee and show the round-off
+ROUND_INVOICE_TOTAL = False
+# Aggregate turnover above which GST registration is required (₹40 lakh for goods-only suppliers)
+GST_REGISTRATION_THRESHOLD = 2000000
+# Benchmark earnings per hour (₹) the productivity calculator compares against
+INDUSTRY_AVERAGE_RATE = 5411
+# Keep the money-flow ledger, invoice history and the files derived from them encrypted on disk
+# (needs the 'cryptography' package). Invoice JSON sidecars follow the history; the client directory
+# and item catalogue are kept in memory instead of in SQLite. Invoice PDFs and .tex files are not
+# encrypted. The passphrase comes from this environment variable, or is asked for at startup.
+ENCRYPT_DATA_FILES = False
+PASSPHRASE_ENV_VAR = "SOLO_TOOLKIT_PASSPHRASE"
+EVENT_LOG_PATH = os.path.join(BASE_DIR, "events.jsonl")
+OUTBOX_CHECKPOINT_PATH = os.path.join(BASE_DIR, "outboxCheckpoints.json")
+# Voids and corrections of the ledger and invoice history (audit.log_path() of each); records are never removed
+MONEY_FLOW_AUDIT_PATH = MONEY_FLOW_PATH + ".audit.jsonl"
+INVOICE_HISTORY_AUDIT_PATH = INVOICE_HISTORY_PATH + ".audit.jsonl"
+ENCRYPTED_DATA_PATHS = [
+    MONEY_FLOW_PATH,
+    INVOICE_HISTORY_PATH,
+    EVENT_LOG_PATH,
+    MONEY_FLOW_AUDIT_PATH,
+    INVOICE_HISTORY_AUDIT_PATH,
+    INVOICE_INDEX_PATH,
+    INVOICE_DRAFT_PATH,
+    INVOICE_DRAFT_BACKUP_PATH,
+    TURNOVER_STATE_PATH,
+    BUDGET_STATE_PATH,
+]
+# Every AUDIT_COMPACT_INTERVAL seconds, a file with at least AUDIT_COMPACT_THRESHOLD pending
+# voids and corrections is rewritten with them folded in
+AUDIT_COMPACT_INTERVAL = 600
+AUDIT_COMPACT_THRESHOLD = 100
+# Reconciliation: a receipt within RECONCILE_TOLERANCE of an invoice, and no more than
+# RECONCILE_WINDOW_DAYS after it, pays it. A receipt whose note quotes the invoice number
+# pays it however late, though never before the invoice date
+RECONCILE_TOLERANCE = "1.00"
+RECONCILE_WINDOW_DAYS = 90
+# Monthly budgets in ₹, per envelope (Needs, Wants, Investments, Other Expenses) and per category,
+# e.g. {"Wants": 20000} and {"Marketing Campaigns": 8000}; leave out whatever has no limit
+ENVELOPE_BUDGETS = {}
+CATEGORY_BUDGETS = {}
+# Profit first: every inflow is split into envelopes by percentage as it is recorded. A rule
+# naming the inflow's category wins over the "*" rule; "Profit" is set aside and never spent from.
+ALLOCATION_RULES = [
+    {"categories": ["*"], "split": {"Profit": 10, "Needs": 50, "Wants": 15, "Investments": 25}},
+]
+# Local JSON API (python api.py); it only ever listens on a loopback address
+API_HOST = "127.0.0.1"
+API_PORT = 8765
+# Every request sends the token kept in this file as "Authorization: Bearer <token>"; made on first start
+API_TOKEN_PATH = os.path.join(BASE_DIR, "apiToken.txt")
+# PDF compiles run on this many worker threads; at most API_JOB_QUEUE_LIMIT wait behind them
+API_PDF_WORKERS = 2
+API_JOB_QUEUE_LIMIT = 64
+# Finished jobs kept for GET /jobs/<id>
+API_JOB_HISTORY = 1000
+# Webhooks told about every recorded invoice ("invoice.recorded") and ledger entry ("ledger.entry"), e.g.
+# {"name": "sheet", "url": "http://127.0.0.1:5678/webhook/ledger", "events": ["ledger.entry"]}
+WEBHOOK_ENDPOINTS = []
+WEBHOOK_BATCH_SIZE = 500
+# Emailed invoices; leave SMTP_HOST empty to keep email off
+MAIL_QUEUE_PATH = os.path.join(BASE_DIR, "mailQueue.sqlite3")
+SMTP_HOST = ""
+SMTP_PORT = 587
+SMTP_USERNAME = ""
+# The SMTP password is read from this environment variable, never stored here
+SMTP_PASSWORD_ENV_VAR = "SOLO_TOOLKIT_SMTP_PASSWORD"
+SMTP_STARTTLS = True
+SMTP_SSL = False
+EMAIL_FROM = ""
+# Stay inside the mail provider's sending limits
+EMAIL_RATE_PER_MINUTE = 60
+# {field} placeholders take the invoice fields
+EMAIL_SUBJECT = "Invoice {invoiceNumber} from {companyName}"
+EMAIL_BODY = (
+    "Hello {billToName},\n\n"
+    "Please find attached invoice {invoiceNumber} dated {invoiceDate} for {totalAmount}.\n\n"
+    "Thank you for your business.\n{companyName}\n"
+)
+# Operational metrics, per process: rewritten every METRICS_INTERVAL seconds to METRICS_PATH
+# ({process} is gui, cli or api) and served as Prometheus text on 127.0.0.1:METRICS_PORT/metrics
+# by the GUI and CLI (the API serves GET /metrics on its own port). None turns either off.
+METRICS_PATH = os.path.join(BASE_DIR, "metrics", "{process}.prom")
+METRICS_INTERVAL = 15
+METRICS_PORT = 9464
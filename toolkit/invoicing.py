@@ -0,0 +1,442 @@
+import collections
+import contextlib
+import csv
+import decimal
+import os
+import re
+import shutil
+import subprocess
+import textwrap
+import threading
+import time
+
+import audit
+import gst
+import invoice_output
+import invoice_pdf
+import invoice_search
+import secure_store
+import tex_worker
+from toolkit import config, services, telemetry
+
+
+_history_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _history_writes():
+    """Hold off everything else that writes invoiceHistory.csv or its audit log, here and in other processes."""
+    with _history_lock, secure_store.file_lock(config.INVOICE_HISTORY_PATH + ".lock"):
+        yield
+
+
+INVOICE_FIELD_KEYS = [
+    ("Company Name", "companyName"),
+    ("Company Address", "companyAddress"),
+    ("Company City", "companyCity"),
+    ("Company Country", "companyCountry"),
+    ("Company Postal", "companyPostal"),
+    ("Company State", "companyState"),
+    ("Bill To Name", "billToName"),
+    ("Bill To Address", "billToAddress"),
+    ("Bill To City", "billToCity"),
+    ("Bill To Country", "billToCountry"),
+    ("Bill To Postal", "billToPostal"),
+    ("Place of Supply", "placeOfSupply"),
+    ("Invoice Number", "invoiceNumber"),
+    ("Invoice Date", "invoiceDate"),
+    ("Invoice Due Date", "invoiceDueDate"),
+    ("Total Amount", "totalAmount"),
+]
+
+
+def compute_invoice_tax(fields, items):
+    return gst.compute_invoice_tax(
+        items,
+        supplier_state=fields.get("companyState", ""),
+        place_of_supply=fields.get("placeOfSupply", ""),
+        rate_table=services.gst_rate_table,
+        round_total=config.ROUND_INVOICE_TOTAL,
+    )
+
+
+def blank_invoice_fields():
+    return {key: "" for _, key in INVOICE_FIELD_KEYS} | {"notesText": ""}
+
+
+def item_row_tex(item):
+    return (
+        f"{{{item['itemName']}}}&"
+        f"{{{item['description']}}}&"
+        f"{{{item['quantity']}}}&"
+        f"{{₹{item['price']}}}&"
+        f"{{{item['tax']}\\%}}&"
+        f"{{₹{item['amount']}}}\\\\"
+    )
+
+
+def item_row_lines(item):
+    """Lines a row takes in the items table: the description column wraps, the others do not."""
+    return max(len(textwrap.wrap(str(item.get("description") or ""), config.INVOICE_DESCRIPTION_LINE_CHARS)), 1)
+
+
+def page_subtotal_tex(subtotal):
+    return f"\\midrule\n\\multicolumn{{5}}{{@{{}}r}}{{\\textit{{Page subtotal}}}}&{{₹{subtotal:,.2f}}}\\\\"
+
+
+def write_item_rows(tex_file, items, table_open, table_close):
+    """Stream item rows into the open .tex, closing the table and starting a new page every page's worth.
+
+    Each page gets its own tabularx (one long tabularx cannot break across
+    pages and is held in TeX memory whole) with a page subtotal row, and rows
+    are written in chunks so memory stays flat however long the invoice is.
+    Pages are filled by lines, counting wrapped descriptions, so a page of
+    long descriptions does not run over and its subtotal matches its rows.
+    """
+    page_capacity = config.INVOICE_FIRST_PAGE_ROWS
+    lines_on_page = 0
+    page_subtotal = decimal.Decimal("0")
+    chunk = []
+    paged = False
+    for item in items:
+        lines = item_row_lines(item)
+        if lines_on_page and lines_on_page + lines > page_capacity:
+            chunk.append(page_subtotal_tex(page_subtotal))
+            chunk.append(table_close + "\n\\newpage\n" + table_open)
+            page_capacity, lines_on_page, page_subtotal = config.INVOICE_ROWS_PER_PAGE, 0, decimal.Decimal("0")
+            paged = True
+        chunk.append(item_row_tex(item))
+        lines_on_page += lines
+        page_subtotal += gst.parse_amount(item["amount"])
+        if len(chunk) >= config.ITEM_ROW_CHUNK_SIZE:
+            tex_file.write("\n".join(chunk) + "\n")
+            chunk = []
+    if not items:
+        chunk.append("{No items added}&{}&{}&{}&{}&{}\\\\")
+    elif paged:
+        chunk.append(page_subtotal_tex(page_subtotal))
+    tex_file.write("\n".join(chunk))
+
+
+def render_invoice_tex(fields, items):
+    """Write the invoice's .tex; a missing number is allocated first and written into fields."""
+    if not os.path.exists(config.INVOICE_TEMPLATE_PATH):
+        raise FileNotFoundError("invoiceTemplate.tex is missing.")
+    if not fields.get("invoiceNumber"):
+        fields["invoiceNumber"] = services.invoice_allocator.allocate(invoice_output.invoice_date(fields))
+
+    with open(config.INVOICE_TEMPLATE_PATH, "r", encoding="utf-8") as template_file:
+        tex = template_file.read()
+
+    for key, val in fields.items():
+        pattern = r"(\\newcommand\{\\" + re.escape(key) + r"\}\{)[^\}]*\}"
+
+        def repl(match, value=val):
+            return match.group(1) + (value or "") + "}"
+
+        tex = re.sub(pattern, repl, tex)
+
+    safe_invoice_number = str(fields["invoiceNumber"]).replace("/", "-").strip() or "0000"
+    output_dir = invoice_output.output_dir_for(fields, config.INVOICE_OUTPUT_LAYOUT, config.INVOICE_OUTPUT_DIR)
+    output_tex_path = os.path.join(output_dir, f"invoice_{safe_invoice_number}.tex")
+    head, _, tail = tex.partition("%%ITEM_ROWS%%")
+    # Everything from \begin{tabularx} to the placeholder (header rows) and on to \end{tabularx}
+    table_open = head[head.rindex("\\begin{tabularx}"):]
+    table_close = tail[: tail.index("\\end{tabularx}") + len("\\end{tabularx}")]
+    with open(output_tex_path, "w", encoding="utf-8") as tex_file:
+        tex_file.write(head)
+        write_item_rows(tex_file, items, table_open, table_close)
+        tex_file.write(tail)
+    invoice_search.write_invoice_sidecar(output_tex_path, fields, items, like=config.INVOICE_HISTORY_PATH)
+    return output_tex_path
+
+
+def prewarm_tex_service():
+    """Start loading the invoice preamble and fonts before the first PDF is requested."""
+    if not config.TEX_WARM_WORKER or resolve_pdf_backend() != "latex":
+        return
+    try:
+        with open(config.INVOICE_TEMPLATE_PATH, "r", encoding="utf-8") as template_file:
+            services.tex_service.prewarm(template_file.read())
+    except OSError:
+        pass  # xelatex or the template is missing; compile_tex_to_pdf reports it properly
+
+
+def compile_tex_to_pdf(tex_path):
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        pdf_path = _compile_tex_to_pdf(tex_path)
+        outcome = "ok"
+        return pdf_path
+    except tex_worker.CompileTimeout:
+        outcome = "timeout"
+        raise
+    finally:
+        telemetry.TEX_COMPILE_SECONDS.labels(outcome).observe(time.perf_counter() - start)
+
+
+def _compile_tex_to_pdf(tex_path):
+    output_dir = os.path.dirname(tex_path)
+    tex_name = os.path.basename(tex_path)
+    pdf_path = os.path.splitext(tex_path)[0] + ".pdf"
+    base_name = os.path.splitext(tex_name)[0]
+
+    if config.TEX_WARM_WORKER:
+        try:
+            return services.tex_service.compile(tex_path, pdf_path)
+        except FileNotFoundError as exc:
+            raise RuntimeError(
+                "xelatex is not installed or not available in PATH. Please install it to generate PDFs."
+            ) from exc
+
+    # Compile in a private scratch directory (tmpfs where available) so aux files never hit the output tree
+    work_dir = invoice_output.make_build_dir()
+    try:
+        shutil.copyfile(tex_path, os.path.join(work_dir, tex_name))
+        # Let \includegraphics find logo.png and friends next to the .tex, in the workspace or beside the app
+        env = dict(os.environ)
+        env["TEXINPUTS"] = os.pathsep.join([output_dir, config.DATA_DIR, config.BASE_DIR, env.get("TEXINPUTS", "")])
+        try:
+            # Use timeout to prevent hanging (60 seconds should be enough)
+            subprocess_kwargs = {
+                "args": ["xelatex", "-interaction=batchmode", "-halt-on-error", tex_name],
+                "cwd": work_dir,
+                "env": env,
+                "check": False,
+                "stdout": subprocess.PIPE,
+                "stderr": subprocess.STDOUT,
+                "text": True,
+                "timeout": 60,
+            }
+            # Add CREATE_NO_WINDOW flag on Windows to prevent console window
+            if os.name == 'nt':
+                try:
+                    subprocess_kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+                except AttributeError:
+                    # CREATE_NO_WINDOW not available in this Python version, skip it
+                    pass
+
+            result = subprocess.run(**subprocess_kwargs)
+        except FileNotFoundError as exc:
+            raise RuntimeError(
+                "xelatex is not installed or not available in PATH. Please install it to generate PDFs."
+            ) from exc
+        except subprocess.TimeoutExpired:
+            raise tex_worker.CompileTimeout("PDF generation timed out after 60 seconds. The LaTeX file might be too complex or there's an issue with xelatex.")
+        except Exception as exc:
+            raise RuntimeError(f"Error during PDF generation: {str(exc)}")
+
+        built_pdf = os.path.join(work_dir, f"{base_name}.pdf")
+        log_file = os.path.join(work_dir, f"{base_name}.log")
+        # Check if PDF was created
+        if not os.path.exists(built_pdf):
+            error_details = tex_worker.latex_error_details(log_file)
+            kept_log = invoice_output.keep_failure_log(log_file, config.INVOICE_LOG_DIR, config.FAILED_BUILD_LOG_LIMIT)
+
+            raise RuntimeError(
+                f"PDF generation failed (exit code {result.returncode}).\n"
+                f"xelatex output:\n{result.stdout[-1000:] if result.stdout else 'No output'}\n"
+                f"{error_details + chr(10) if error_details else ''}"
+                f"{f'Full log: {kept_log}' if kept_log else ''}"
+            )
+
+        shutil.move(built_pdf, pdf_path)
+    finally:
+        # Aux files (.aux, .log, .out, ...) go away with the scratch directory
+        invoice_output.remove_build_dir(work_dir)
+
+    return pdf_path
+
+
+def record_invoice(fields, pdf_path):
+    start = time.perf_counter()
+    with _history_writes():
+        file_exists = os.path.exists(config.INVOICE_HISTORY_PATH) and secure_store.getsize(config.INVOICE_HISTORY_PATH) > 0
+        with secure_store.open(config.INVOICE_HISTORY_PATH, "a", newline="", encoding="utf-8") as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=invoice_search.HISTORY_FIELDS)
+            if not file_exists:
+                writer.writeheader()
+            row = {
+                "invoiceNumber": fields.get("invoiceNumber", ""),
+                "invoiceDate": fields.get("invoiceDate", ""),
+                "billToName": fields.get("billToName", ""),
+                "totalAmount": fields.get("totalAmount", ""),
+                "filePath": pdf_path,
+            }
+            writer.writerow(row)
+        telemetry.APPEND_SECONDS.labels("invoice_history").observe(time.perf_counter() - start)
+        telemetry.APPENDED_ROWS.labels("invoice_history").inc()
+        services.event_outbox.append([("invoice.recorded", row)])
+    services.invoice_allocator.mark_used(fields.get("invoiceNumber"))
+    services.client_directory.remember(fields)
+    services.client_directory.save_company_profile(fields)
+    _sync_history_views()
+
+
+def _sync_history_views():
+    # Only appended rows are read back; an unloaded index catches up on its first load.
+    if services.invoice_index.loaded:
+        services.invoice_index.sync()
+    if services.turnover_monitor.loaded:
+        services.turnover_monitor.sync()
+
+
+def _history_row(values):
+    return dict(zip(invoice_search.HISTORY_FIELDS, values + [""] * (len(invoice_search.HISTORY_FIELDS) - len(values))))
+
+
+def invoice_history():
+    """Invoice history rows with their row "id", oldest first, voids and corrections applied."""
+    for row_id, values, _ in audit.rows(config.INVOICE_HISTORY_PATH):
+        if values and values != invoice_search.HISTORY_FIELDS:
+            yield dict(_history_row(values), id=row_id)
+
+
+def void_invoice(row_id, reason="", user=""):
+    """Void a history row by logging a tombstone for it. The invoice number stays used. Returns the audit record."""
+    return _change_invoice(row_id, None, reason, user)
+
+
+def correct_invoice(row_id, changes, reason="", user=""):
+    """Log corrected values ({history field: value}) for a history row. Returns the audit record."""
+    unknown = set(changes) - set(invoice_search.HISTORY_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown invoice history fields: {', '.join(sorted(unknown))}.")
+    return _change_invoice(row_id, changes, reason, user)
+
+
+def _change_invoice(row_id, changes, reason, user):
+    trail = services.invoice_audit
+    with _history_writes():
+        before = trail.row(row_id)
+        if not before or before == invoice_search.HISTORY_FIELDS:
+            raise ValueError(f"Row {row_id} is not an invoice.")
+        if changes is None:
+            record = trail.void(row_id, user, reason)
+        else:
+            row = dict(_history_row(before), **{key: str(value) for key, value in changes.items()})
+            record = trail.correct(row_id, [row[key] for key in invoice_search.HISTORY_FIELDS], user, reason)
+        services.event_outbox.append([("invoice.voided" if changes is None else "invoice.corrected", record)])
+    _sync_history_views()
+    return record
+
+
+def compact_invoice_history():
+    """Fold pending voids and corrections into invoiceHistory.csv; returns how many were folded."""
+    with _history_writes():
+        folded = services.invoice_audit.compact()
+    if folded:
+        _sync_history_views()
+    return folded
+
+
+def attach_invoice_documents(invoice_number, paths):
+    """Store files (hashed on parallel threads) and attach them to an invoice; returns ({path: digest}, {path: error})."""
+    if not services.invoice_allocator.is_used(invoice_number):
+        raise ValueError(f"There is no invoice {invoice_number!r}.")
+    store = services.document_store
+    added, failed = store.add_many(paths)
+    store.link_many(("invoice", invoice_number, digest, os.path.basename(path)) for path, digest in added.items())
+    return added, failed
+
+
+def invoice_documents(invoice_number):
+    """The documents attached to an invoice; see DocumentStore.attachments()."""
+    return services.document_store.attachments("invoice", invoice_number)
+
+
+def load_client_directory():
+    """Load the client autocomplete, seeding an empty directory from past invoices first.
+
+    With ENCRYPT_DATA_FILES on, both the directory and the item catalogue
+    live in memory only, so the catalogue is seeded from the same pass.
+    """
+    # Taken once, so a workspace switch while this runs on a background thread cannot mix two businesses
+    directory, history_path = services.client_directory, config.INVOICE_HISTORY_PATH
+    index, item_catalogue = services.invoice_index, services.item_catalogue if config.ENCRYPT_DATA_FILES else None
+    if directory.is_empty() and os.path.exists(history_path):
+        with secure_store.open(history_path, "r", newline="", encoding="utf-8") as history_file:
+            for row in csv.DictReader(history_file):
+                try:
+                    fields, items = index.load_document(row)
+                except (OSError, ValueError):
+                    fields, items = row, []
+                directory.remember(fields)
+                if item_catalogue is not None and items:
+                    item_catalogue.record_invoice(fields, items, invoice_output.invoice_date(fields))
+    directory.load()
+
+
+def render_with_latex(fields, items):
+    tex_path = render_invoice_tex(fields, items)
+    return tex_path, compile_tex_to_pdf(tex_path)
+
+
+def render_with_direct_pdf(fields, items):
+    safe_invoice_number = str(fields["invoiceNumber"]).replace("/", "-").strip() or "0000"
+    output_dir = invoice_output.output_dir_for(fields, config.INVOICE_OUTPUT_LAYOUT, config.INVOICE_OUTPUT_DIR)
+    pdf_path = os.path.join(output_dir, f"invoice_{safe_invoice_number}.pdf")
+    invoice_pdf.render_invoice_pdf(fields, items, pdf_path)
+    invoice_search.write_invoice_sidecar(pdf_path, fields, items, like=config.INVOICE_HISTORY_PATH)
+    return None, pdf_path
+
+
+# Each backend takes (fields, items) and returns (source_path or None, pdf_path)
+PDF_BACKENDS = {
+    "latex": render_with_latex,
+    "direct": render_with_direct_pdf,
+}
+
+
+def resolve_pdf_backend(backend=None):
+    backend = backend or config.DEFAULT_PDF_BACKEND
+    if backend == "auto":
+        backend = "latex" if shutil.which("xelatex") else "direct"
+    if backend not in PDF_BACKENDS:
+        raise ValueError(f"Unknown PDF backend {backend!r}; choose from {', '.join(PDF_BACKENDS)} or auto.")
+    return backend
+
+
+def generate_invoice_pdf(fields, items, backend=None):
+    """Build, record and catalogue an invoice; returns (source_path or None, pdf_path).
+
+    An invoice without a number gets the next one, written into fields so
+    the caller can show it. If the PDF cannot be built, that number is
+    given back and fields["invoiceNumber"] is blank again.
+    """
+    backend = resolve_pdf_backend(backend)
+    allocated = not fields.get("invoiceNumber")
+    if allocated:
+        fields["invoiceNumber"] = services.invoice_allocator.allocate(invoice_output.invoice_date(fields))
+    try:
+        try:
+            source_path, pdf_path = PDF_BACKENDS[backend](fields, items)
+        except Exception:
+            if allocated and services.invoice_allocator.release(fields["invoiceNumber"], invoice_output.invoice_date(fields)):
+                fields["invoiceNumber"] = ""
+            raise
+        record_invoice(fields, pdf_path)
+    except tex_worker.CompileTimeout:
+        telemetry.INVOICES_FAILED.labels(backend, "timeout").inc()
+        raise
+    except Exception:
+        telemetry.INVOICES_FAILED.labels(backend, "error").inc()
+        raise
+    telemetry.INVOICES_GENERATED.labels(backend).inc()
+    services.item_catalogue.record_invoice(fields, items, invoice_output.invoice_date(fields))
+    return source_path, pdf_path
+
+
+def email_invoice(fields, pdf_path, recipient):
+    """Queue the invoice PDF for emailing to recipient; returns the queued message id."""
+    if not config.SMTP_HOST:
+        raise RuntimeError("Email is not set up; fill in SMTP_HOST and EMAIL_FROM in toolkit/config.py.")
+    values = collections.defaultdict(str, fields)
+    return services.mail_queue.enqueue(
+        recipient,
+        config.EMAIL_SUBJECT.format_map(values),
+        config.EMAIL_BODY.format_map(values),
+        pdf_path,
+        fields.get("invoiceNumber", ""),
+    )
@@ -0,0 +1,209 @@
+import threading
+
+from toolkit import config
+
+
+def _invoice_index():
+    import invoice_search
+
+    return invoice_search.InvoiceSearchIndex(config.INVOICE_INDEX_PATH, config.INVOICE_HISTORY_PATH, config.DATA_DIR)
+
+
+def _invoice_allocator():
+    import invoice_numbers
+
+    return invoice_numbers.InvoiceNumberAllocator(
+        config.INVOICE_SEQUENCE_PATH, config.INVOICE_HISTORY_PATH, config.INVOICE_NUMBER_PATTERN
+    )
+
+
+def _tex_service():
+    import tex_worker
+
+    return tex_worker.WarmTexService(
+        "xelatex", asset_dirs=[config.DATA_DIR, config.BASE_DIR], log_dir=config.INVOICE_LOG_DIR, log_limit=config.FAILED_BUILD_LOG_LIMIT
+    )
+
+
+def _turnover_monitor():
+    import turnover
+    from toolkit import taxes
+
+    return turnover.TurnoverMonitor(
+        config.TURNOVER_STATE_PATH,
+        config.MONEY_FLOW_PATH,
+        config.INVOICE_HISTORY_PATH,
+        threshold=config.GST_REGISTRATION_THRESHOLD,
+        tax_function=lambda income: taxes.calculate_tax(float(income), 0, 0)["tax"],
+    )
+
+
+def _budget_monitor():
+    import budgets
+
+    return budgets.BudgetMonitor(
+        config.BUDGET_STATE_PATH,
+        config.MONEY_FLOW_PATH,
+        config.CATEGORY_BUDGETS,
+        config.ENVELOPE_BUDGETS,
+        config.ALLOCATION_RULES,
+    )
+
+
+def _productivity_series():
+    import productivity
+
+    return productivity.ProductivitySeries(config.PRODUCTIVITY_HOURS_PATH, config.MONEY_FLOW_PATH)
+
+
+def _session_tracker():
+    import time_tracker
+
+    return time_tracker.TimeTracker(config.TIME_TRACKER_DB_PATH)
+
+
+def _client_directory():
+    import clients
+
+    # SQLite files cannot be encrypted here, so with ENCRYPT_DATA_FILES on the directory is
+    # kept in memory and invoicing.load_client_directory() rebuilds it from the history
+    return clients.ClientDirectory(":memory:" if config.ENCRYPT_DATA_FILES else config.CLIENT_DIRECTORY_PATH)
+
+
+def _item_catalogue():
+    import catalogue
+
+    # In memory while ENCRYPT_DATA_FILES is on, like the client directory
+    return catalogue.Catalogue(":memory:" if config.ENCRYPT_DATA_FILES else config.ITEM_CATALOGUE_PATH)
+
+
+def _event_outbox():
+    import outbox
+
+    return outbox.Outbox(config.EVENT_LOG_PATH)
+
+
+def _event_dispatcher():
+    import outbox
+
+    return outbox.Dispatcher(
+        __getattr__("event_outbox"), config.OUTBOX_CHECKPOINT_PATH, config.WEBHOOK_ENDPOINTS, config.WEBHOOK_BATCH_SIZE
+    )
+
+
+def _mail_queue():
+    import os
+
+    import mailer
+
+    pool = mailer.SmtpPool(
+        config.SMTP_HOST,
+        config.SMTP_PORT,
+        config.SMTP_USERNAME,
+        os.environ.get(config.SMTP_PASSWORD_ENV_VAR, ""),
+        starttls=config.SMTP_STARTTLS,
+        use_ssl=config.SMTP_SSL,
+    )
+    return mailer.MailQueue(
+        config.MAIL_QUEUE_PATH, pool, config.EMAIL_FROM or config.SMTP_USERNAME, config.EMAIL_RATE_PER_MINUTE
+    )
+
+
+def _ledger_audit():
+    import audit
+
+    return audit.trail_for(config.MONEY_FLOW_PATH)
+
+
+def _invoice_audit():
+    import audit
+
+    return audit.trail_for(config.INVOICE_HISTORY_PATH)
+
+
+def _audit_compactor():
+    import audit
+    from toolkit import books, invoicing
+
+    return audit.Compactor(
+        [(__getattr__("ledger_audit"), books.compact_ledger), (__getattr__("invoice_audit"), invoicing.compact_invoice_history)],
+        interval=config.AUDIT_COMPACT_INTERVAL,
+        threshold=config.AUDIT_COMPACT_THRESHOLD,
+    )
+
+
+def _document_store():
+    import docstore
+
+    return docstore.DocumentStore(
+        config.DOCUMENT_STORE_DIR, config.DOCUMENT_INDEX_PATH, config.DOCUMENT_HASH_WORKERS, like=config.MONEY_FLOW_PATH
+    )
+
+
+def _gst_rate_table():
+    import gst
+
+    return gst.GstRateTable.load(config.GST_RATES_PATH)
+
+
+# Service name -> factory. Each is built on first attribute access (services.invoice_index, ...)
+# and then stored as a plain module global, so later lookups cost nothing.
+FACTORIES = {
+    "invoice_index": _invoice_index,
+    "invoice_allocator": _invoice_allocator,
+    "tex_service": _tex_service,
+    "turnover_monitor": _turnover_monitor,
+    "budget_monitor": _budget_monitor,
+    "productivity_series": _productivity_series,
+    "session_tracker": _session_tracker,
+    "client_directory": _client_directory,
+    "item_catalogue": _item_catalogue,
+    "event_outbox": _event_outbox,
+    "event_dispatcher": _event_dispatcher,
+    "mail_queue": _mail_queue,
+    "ledger_audit": _ledger_audit,
+    "invoice_audit": _invoice_audit,
+    "audit_compactor": _audit_compactor,
+    "gst_rate_table": _gst_rate_table,
+    "document_store": _document_store,
+}
+
+# How each running service is shut down when reset() drops it
+SHUTDOWN = {
+    "event_dispatcher": "stop",
+    "audit_compactor": "stop",
+    "mail_queue": "stop",
+    "tex_service": "shutdown",
+    "session_tracker": "close",
+    "document_store": "close",
+}
+
+_lock = threading.RLock()
+
+
+def start_background_workers():
+    """Start webhook delivery, audit compaction and, when SMTP is set up, the email queue; the shells call this once."""
+    __getattr__("event_dispatcher").start()
+    __getattr__("audit_compactor").start()
+    if config.SMTP_HOST:
+        __getattr__("mail_queue").start()
+
+
+def reset():
+    """Shut down and forget every service built so far; the next access builds it again from config."""
+    with _lock:
+        for name in FACTORIES:
+            service = globals().pop(name, None)
+            if service is not None and name in SHUTDOWN:
+                getattr(service, SHUTDOWN[name])()
+
+
+def __getattr__(name):
+    factory = FACTORIES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _lock:
+        if name not in globals():
+            globals()[name] = factory()
+        return globals()[name]
+
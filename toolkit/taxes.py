@@ -0,0 +1,30 @@
+def calculate_tax(income, investment_deduction, health_insurance):
+    standard_deduction = 50000
+    investment_deduction = min(max(investment_deduction, 0), 150000)
+    health_insurance = min(max(health_insurance, 0), 25000)
+
+    total_deductions = standard_deduction + investment_deduction + health_insurance
+    taxable_income = max(income - total_deductions, 0)
+
+    tax = 0
+    if taxable_income <= 250000:
+        tax = 0
+    elif taxable_income <= 500000:
+        tax = (taxable_income - 250000) * 0.05
+    elif taxable_income <= 1000000:
+        tax = (250000 * 0.05) + (taxable_income - 500000) * 0.20
+    else:
+        tax = (250000 * 0.05) + (500000 * 0.20) + (taxable_income - 1000000) * 0.30
+
+    if taxable_income <= 500000:
+        tax = 0
+        rebate_text = "Rebate under section 87A applied."
+    else:
+        rebate_text = "No rebate available."
+
+    return {
+        "taxable_income": taxable_income,
+        "tax": round(tax, 2),
+        "total_deductions": total_deductions,
+        "rebate_text": rebate_text,
+    }
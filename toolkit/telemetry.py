@@ -0,0 +1,67 @@
+import metrics
+from toolkit import config, services
+
+
+# Process-wide, so the numbers carry on across workspace switches
+REGISTRY = metrics.Registry()
+
+INVOICES_GENERATED = REGISTRY.counter(
+    "solo_invoices_generated_total", "Invoice PDFs generated and recorded.", ["backend"]
+)
+INVOICES_FAILED = REGISTRY.counter(
+    "solo_invoices_failed_total", "Invoice PDFs that failed; reason is timeout for xelatex timeouts, else error.", ["backend", "reason"]
+)
+TEX_COMPILE_SECONDS = REGISTRY.histogram(
+    "solo_tex_compile_seconds", "compile_tex_to_pdf() latency by outcome (ok, timeout, error).", ["outcome"]
+)
+APPEND_SECONDS = REGISTRY.histogram(
+    "solo_append_seconds", "Time to append a batch of rows to a data file, lock wait included.", ["file"]
+)
+APPENDED_ROWS = REGISTRY.counter("solo_appended_rows_total", "Rows appended to a data file.", ["file"])
+QUEUE_DEPTH = REGISTRY.gauge("solo_queue_depth", "Work waiting in each queue.", ["queue"])
+GUI_ACTION_SECONDS = REGISTRY.histogram(
+    "solo_gui_action_seconds", "Time the GUI spends on an action, dialogs excluded.", ["action"]
+)
+
+_exporter = None
+
+
+def _built(name):
+    """The service if something already built it; a scrape never builds one."""
+    return vars(services).get(name)
+
+
+def _mail_queued():
+    mail_queue = _built("mail_queue")
+    return None if mail_queue is None else mail_queue.counts().get("queued", 0)
+
+
+def _audit_pending(name):
+    trail = _built(name)
+    return None if trail is None else trail.pending_count()
+
+
+QUEUE_DEPTH.labels("mail").set_function(_mail_queued)
+QUEUE_DEPTH.labels("ledger_audit").set_function(lambda: _audit_pending("ledger_audit"))
+QUEUE_DEPTH.labels("invoice_audit").set_function(lambda: _audit_pending("invoice_audit"))
+
+
+def start_exporter(process, port=None):
+    """Write this process's metrics to config.METRICS_PATH and, given a port, serve them; the shells call this once."""
+    global _exporter
+    if _exporter is None:
+        path = config.METRICS_PATH.format(process=process) if config.METRICS_PATH else None
+        _exporter = metrics.Exporter(REGISTRY, path, config.METRICS_INTERVAL, port=port)
+        _exporter.start()
+    return _exporter
+
+
+def stop_exporter():
+    global _exporter
+    if _exporter is not None:
+        _exporter.stop()
+        _exporter = None
+
+
+def render():
+    return REGISTRY.render()
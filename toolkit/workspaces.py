@@ -0,0 +1,126 @@
+import concurrent.futures
+import multiprocessing
+import os
+import re
+
+import secure_store
+from toolkit import config, services
+
+
+# Settings that point into the active workspace's data directory; everything else in config is shared
+WORKSPACE_SETTINGS = (
+    "INVOICE_HISTORY_PATH",
+    "MONEY_FLOW_PATH",
+    "INVOICE_INDEX_PATH",
+    "INVOICE_DRAFT_PATH",
+    "INVOICE_DRAFT_BACKUP_PATH",
+    "INVOICE_SEQUENCE_PATH",
+    "TURNOVER_STATE_PATH",
+    "BUDGET_STATE_PATH",
+    "PRODUCTIVITY_HOURS_PATH",
+    "TIME_TRACKER_DB_PATH",
+    "CLIENT_DIRECTORY_PATH",
+    "ITEM_CATALOGUE_PATH",
+    "INVOICE_OUTPUT_DIR",
+    "INVOICE_LOG_DIR",
+    "EVENT_LOG_PATH",
+    "OUTBOX_CHECKPOINT_PATH",
+    "MONEY_FLOW_AUDIT_PATH",
+    "INVOICE_HISTORY_AUDIT_PATH",
+    "MAIL_QUEUE_PATH",
+    "DOCUMENT_STORE_DIR",
+    "DOCUMENT_INDEX_PATH",
+)
+# Taken from the workspace when it has its own copy, else the shared one beside the app
+WORKSPACE_ASSETS = ("INVOICE_TEMPLATE_PATH", "LOGO_PATH")
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9 _.-]{0,63}$")
+
+_defaults = {name: getattr(config, name) for name in (*WORKSPACE_SETTINGS, *WORKSPACE_ASSETS, "ENCRYPTED_DATA_PATHS")}
+
+
+def workspace_dir(name):
+    if name == config.DEFAULT_WORKSPACE:
+        return config.BASE_DIR
+    if not NAME_PATTERN.match(name or "") or name.strip() != name:
+        raise ValueError(f"{name!r} is not a usable workspace name: use letters, digits, spaces, '.', '_' or '-'.")
+    return os.path.join(config.WORKSPACES_DIR, name)
+
+
+def workspace_names():
+    """The default workspace first, then the others by name."""
+    names = []
+    if os.path.isdir(config.WORKSPACES_DIR):
+        names = sorted(
+            entry.name for entry in os.scandir(config.WORKSPACES_DIR) if entry.is_dir() and NAME_PATTERN.match(entry.name)
+        )
+    return [config.DEFAULT_WORKSPACE, *(name for name in names if name != config.DEFAULT_WORKSPACE)]
+
+
+def workspace_settings(name):
+    """The config values for a workspace: its data paths, its template and logo, and DATA_DIR."""
+    directory = workspace_dir(name)
+
+    def relocate(path):
+        return os.path.join(directory, os.path.relpath(path, config.BASE_DIR))
+
+    settings = {setting: relocate(_defaults[setting]) for setting in WORKSPACE_SETTINGS}
+    for setting in WORKSPACE_ASSETS:
+        own = relocate(_defaults[setting])
+        settings[setting] = own if os.path.exists(own) else _defaults[setting]
+    settings["ENCRYPTED_DATA_PATHS"] = [relocate(path) for path in _defaults["ENCRYPTED_DATA_PATHS"]]
+    settings["DATA_DIR"] = directory
+    return settings
+
+
+def create_workspace(name):
+    """Make an empty workspace; drop an invoiceTemplate.tex or logo.png into its directory to override the shared ones."""
+    directory = workspace_dir(name)
+    if name == config.DEFAULT_WORKSPACE or os.path.exists(directory):
+        raise ValueError(f"Workspace {name!r} already exists.")
+    os.makedirs(directory)
+    return directory
+
+
+def activate(name):
+    """Point config at a workspace and drop the services built for the previous one.
+
+    The caller unlocks the workspace's encrypted files, if any, and restarts
+    the background workers afterwards.
+    """
+    directory = workspace_dir(name)
+    if not os.path.isdir(directory):
+        raise ValueError(f"There is no workspace called {name!r}.")
+    services.reset()
+    for setting, value in workspace_settings(name).items():
+        setattr(config, setting, value)
+    config.WORKSPACE = name
+
+
+def consolidated_summaries(names=None, start=None, end=None, workers=None):
+    """reports.workspace_summary() of each workspace, computed side by side in worker processes.
+
+    Workers are spawned rather than forked, since the shells run background
+    threads; with a single CPU everything runs here instead. An encrypted
+    workspace must have been unlocked in this session; its passphrase is
+    handed to the worker that reads it.
+    """
+    import reports  # brings in the PDF writer, so it is loaded only when a report is run
+
+    names = list(names or workspace_names())
+    jobs = []
+    for name in names:
+        settings = workspace_settings(name)
+        passphrases = {}
+        for path in (settings["MONEY_FLOW_PATH"], settings["MONEY_FLOW_AUDIT_PATH"]):
+            passphrase = secure_store.passphrase_for(path)
+            if passphrase is not None:
+                passphrases[path] = passphrase
+            elif os.path.exists(path) and secure_store.is_encrypted(path):
+                raise secure_store.EncryptionError(f"Open the {name} workspace and unlock it before consolidating it.")
+        jobs.append((name, settings["MONEY_FLOW_PATH"], passphrases))
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1:
+        return {name: reports.workspace_summary(path, start, end) for name, path, _ in jobs}
+    with concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {name: pool.submit(reports.workspace_summary, path, start, end, passphrases) for name, path, passphrases in jobs}
+        return {name: future.result() for name, future in futures.items()}
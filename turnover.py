@@ -0,0 +1,238 @@
+import datetime as dt
+import decimal
+import json
+import os
+import threading
+
+import audit
+import gst
+import invoice_output
+import ledger
+import secure_store
+
+
+ZERO = decimal.Decimal("0")
+GST_REGISTRATION_THRESHOLD = decimal.Decimal("2000000")
+# Warn once turnover reaches this share of the threshold
+THRESHOLD_WARNING_SHARE = decimal.Decimal("0.8")
+# Advance tax is due only when the year's liability is at least this much (s.208)
+ADVANCE_TAX_MINIMUM = decimal.Decimal("10000")
+# (month, day, cumulative % of the year's tax) for each instalment
+ADVANCE_TAX_INSTALMENTS = [(6, 15, 15), (9, 15, 45), (12, 15, 75), (3, 15, 100)]
+TOTAL_KEYS = ("sales", "invoiced", "inflow", "outflow")
+# Bumped when totals are counted differently, so saved totals are rebuilt rather than trusted
+STATE_FORMAT = 2
+
+
+def instalment_dates(financial_year):
+    start = ledger.financial_year_start(financial_year)
+    return [
+        (dt.date(start.year if month >= 4 else start.year + 1, month, day), percent)
+        for month, day, percent in ADVANCE_TAX_INSTALMENTS
+    ]
+
+
+class TurnoverMonitor:
+    """Running per-financial-year totals from the money-flow ledger and invoice history.
+
+    The totals are saved together with the byte offset reached in each file,
+    so sync() only reads rows appended since the last call, whether they came
+    from this process or not. A file that has shrunk, or whose audit trail has
+    changed (a void, correction or compaction), is rescanned from the start.
+    """
+
+    def __init__(self, state_path, ledger_path, history_path, threshold=GST_REGISTRATION_THRESHOLD, tax_function=None):
+        self.state_path = state_path
+        self.ledger_path = ledger_path
+        self.history_path = history_path
+        self.threshold = decimal.Decimal(threshold)
+        self.tax_function = tax_function
+        self.lock = threading.RLock()
+        self.loaded = False
+        self._reset()
+
+    def _reset(self):
+        self.years = {}
+        self.ledger_offset = 0
+        self.history_offset = 0
+        self.ledger_revision = 0
+        self.history_revision = 0
+
+    def load(self):
+        with self.lock:
+            self._reset()
+            if os.path.exists(self.state_path):
+                try:
+                    with secure_store.open(self.state_path, "r", encoding="utf-8") as state_file:
+                        state = json.load(state_file)
+                    if state.get("format") != STATE_FORMAT:
+                        raise ValueError("turnover totals saved in an older format")
+                    self.years = {
+                        year: {key: decimal.Decimal(totals.get(key, "0")) for key in TOTAL_KEYS}
+                        for year, totals in state["years"].items()
+                    }
+                    self.ledger_offset = int(state["ledger_offset"])
+                    self.history_offset = int(state["history_offset"])
+                    self.ledger_revision = int(state.get("ledger_revision", 0))
+                    self.history_revision = int(state.get("history_revision", 0))
+                except (OSError, ValueError, KeyError, TypeError, AttributeError, decimal.InvalidOperation):
+                    self._reset()
+            self.loaded = True
+            self.sync(force_save=True)
+
+    def _year(self, date):
+        label = ledger.financial_year(date)
+        totals = self.years.get(label)
+        if totals is None:
+            totals = self.years[label] = {key: ZERO for key in TOTAL_KEYS}
+        return totals
+
+    def _add_ledger_row(self, row):
+        entry = ledger.parse_ledger_row(row)
+        if entry is None:
+            return
+        totals = self._year(entry["timestamp"].date())
+        if ledger.is_inflow(entry["category"]):
+            totals["inflow"] += entry["amount"]
+            if entry["category"] == "Sales Revenue":
+                totals["sales"] += entry["amount"]
+        else:
+            totals["outflow"] += entry["amount"]
+
+    def _add_history_row(self, row):
+        if len(row) < 4 or row[0] == "invoiceNumber":
+            return
+        date = invoice_output.parse_invoice_date(row[1])
+        if date is None:
+            return
+        try:
+            amount = gst.to_decimal(row[3])
+        except ValueError:
+            return
+        self._year(date)["invoiced"] += amount
+
+    def sync(self, force_save=False):
+        """Fold in rows appended to the ledger and invoice history since the last sync."""
+        with self.lock:
+            if not self.loaded:
+                self.load()
+                return
+            for path, offset in ((self.ledger_path, self.ledger_offset), (self.history_path, self.history_offset)):
+                size = secure_store.getsize(path) if os.path.exists(path) else 0
+                if size < offset:
+                    self._reset()
+                    break
+            changed = force_save
+            revisions = (audit.revision(self.ledger_path), audit.revision(self.history_path))
+            if revisions != (self.ledger_revision, self.history_revision):
+                self._reset()
+                self.ledger_revision, self.history_revision = revisions
+                changed = True
+            for row, offset in ledger.iter_csv_rows_from(self.ledger_path, self.ledger_offset):
+                self._add_ledger_row(row)
+                self.ledger_offset = offset
+                changed = True
+            for row, offset in ledger.iter_csv_rows_from(self.history_path, self.history_offset):
+                self._add_history_row(row)
+                self.history_offset = offset
+                changed = True
+            if changed:
+                self.save()
+
+    def save(self):
+        state = {
+            "format": STATE_FORMAT,
+            "ledger_offset": self.ledger_offset,
+            "history_offset": self.history_offset,
+            "ledger_revision": self.ledger_revision,
+            "history_revision": self.history_revision,
+            "years": {year: {key: str(value) for key, value in totals.items()} for year, totals in self.years.items()},
+        }
+        temp_path = self.state_path + ".tmp"
+        # Encrypted along with the ledger when that is
+        secure_store.write_file(temp_path, [json.dumps(state, indent=2, sort_keys=True).encode("utf-8")], like=self.state_path)
+        os.replace(temp_path, self.state_path)
+
+    def totals(self, financial_year):
+        with self.lock:
+            # Cheap unless the ledger or history changed, here or in another process, since the last look
+            self.sync()
+            return dict(self.years.get(financial_year) or {key: ZERO for key in TOTAL_KEYS})
+
+    def status(self, today=None):
+        """Turnover against the GST threshold and this year's advance-tax instalments.
+
+        Profit so far is projected over the whole financial year to estimate
+        the year's tax; instalment amounts are cumulative, as the law sets them.
+        """
+        today = today or dt.date.today()
+        year = ledger.financial_year(today)
+        totals = self.totals(year)
+        turnover = max(totals["sales"], totals["invoiced"])
+        if turnover >= self.threshold:
+            level = "crossed"
+        elif turnover >= self.threshold * THRESHOLD_WARNING_SHARE:
+            level = "approaching"
+        else:
+            level = "ok"
+
+        start = ledger.financial_year_start(year)
+        year_days = (start.replace(year=start.year + 1) - start).days
+        elapsed_days = min(max((today - start).days + 1, 1), year_days)
+        profit = totals["inflow"] - totals["outflow"]
+        projected_profit = max(profit, ZERO) * year_days / elapsed_days
+        estimated_tax = ZERO
+        if self.tax_function is not None:
+            estimated_tax = decimal.Decimal(str(self.tax_function(projected_profit)))
+
+        instalments = []
+        if estimated_tax >= ADVANCE_TAX_MINIMUM:
+            next_found = False
+            for due, percent in instalment_dates(year):
+                if due < today:
+                    state = "past"
+                elif not next_found:
+                    state, next_found = "next", True
+                else:
+                    state = "upcoming"
+                amount = gst.to_paise(estimated_tax * percent / gst.HUNDRED)
+                instalments.append({"due": due, "percent": percent, "amount": amount, "state": state})
+
+        return {
+            "financial_year": year,
+            "sales": totals["sales"],
+            "invoiced": totals["invoiced"],
+            "turnover": turnover,
+            "threshold": self.threshold,
+            "level": level,
+            "profit": profit,
+            "projected_profit": gst.to_paise(projected_profit),
+            "estimated_tax": gst.to_paise(estimated_tax),
+            "instalments": instalments,
+        }
+
+
+def status_text(status):
+    """Multi-line summary of status() for the GUI and the CLI."""
+    lines = [
+        f"FY {status['financial_year']}: sales ₹{status['sales']:,.2f}, invoiced ₹{status['invoiced']:,.2f}",
+    ]
+    if status["level"] == "crossed":
+        lines.append(
+            f"Turnover ₹{status['turnover']:,.2f} has crossed the ₹{status['threshold']:,.0f} GST registration threshold."
+        )
+    elif status["level"] == "approaching":
+        share = status["turnover"] / status["threshold"] * gst.HUNDRED
+        lines.append(f"Turnover is at {share:.0f}% of the ₹{status['threshold']:,.0f} GST registration threshold.")
+    lines.append(
+        f"Profit so far ₹{status['profit']:,.2f}; projected for the year ₹{status['projected_profit']:,.2f}, "
+        f"estimated tax ₹{status['estimated_tax']:,.2f}."
+    )
+    if not status["instalments"]:
+        lines.append(f"No advance tax due while the year's tax stays under ₹{ADVANCE_TAX_MINIMUM:,.0f}.")
+    for instalment in status["instalments"]:
+        marker = {"past": "  ", "next": "→ ", "upcoming": "  "}[instalment["state"]]
+        lines.append(
+            f"{marker}{instalment['due']:%d %b %Y}: {instalment['percent']}% = ₹{instalment['amount']:,.2f} cumulative"
+        )
+    return "\n".join(lines)